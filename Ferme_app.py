@@ -1,6 +1,16 @@
+import heapq
+import io
 import json
 import os
-from datetime import datetime, timedelta
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager, redirect_stdout
+from functools import lru_cache, wraps
+from itertools import chain, islice
+from datetime import date, datetime, timedelta
 
 # --- Chemins des fichiers de données ---
 STOCK_FILE = 'stock.json'
@@ -11,23 +21,1794 @@ OUVRIERS_FILE = 'ouvriers.json'
 TACHES_FILE = 'taches.json'
 EQUIPEMENTS_FILE = 'equipements.json'
 FOURNISSEURS_CLIENTS_FILE = 'fournisseurs_clients.json' # Nouveau fichier
+SQLITE_FILE = 'ferme.db'
+FINANCE_JOURNAL_FILE = 'finance_journal.jsonl' # Journal des transactions pas encore intégrées à FINANCE_FILE
+UNITE_DE_TRAVAIL_FILE = 'unite_de_travail.json' # Présent uniquement pendant la validation d'une unité de travail
+FINANCE_COLONNES_DIR = 'finance_colonnes' # Copie en colonnes binaires des transactions, pour les rapports
+FINANCE_AGREGATS_FILE = os.path.join(FINANCE_COLONNES_DIR, 'agregats.json') # Totaux par jour et par mois
+FINANCE_AGREGATS_JOURNAL_FILE = os.path.join(FINANCE_COLONNES_DIR, 'agregats.jsonl') # Totaux ajoutés depuis agregats.json
+VERROU_FILE = 'ferme.lock' # Verrou partagé par tous les programmes qui utilisent ces fichiers
+CATEGORIES_DEPENSES_FILE = 'categories_depenses.json' # Mots-clés de chaque catégorie de dépense, modifiable
+COMPTEURS_FILE = 'compteurs.json' # Totaux et répartitions des collections, pour les statistiques rapides
+SEQUENCES_FILE = 'sequences.json' # Dernier id attribué dans chaque collection à id
+MAINTENANCE_JOURNAL_FILE = 'maintenance.jsonl' # Opérations de maintenance des équipements (ajout seul)
+
+# --- Paramètres du journal financier ---
+TAILLE_MAX_JOURNAL_FINANCE = 1024 * 1024 # Octets : au-delà, le journal est compacté dans FINANCE_FILE
+INTERVALLE_POINT_CONTROLE_SOLDE = 50 # Nombre de transactions entre deux points de contrôle du solde
+
+# --- Paramètres de la lecture en continu ---
+TAILLE_BLOC_LECTURE = 64 * 1024 # Caractères lus à la fois dans un fichier JSON
+TAILLE_LOT_COLONNES = 10000 # Transactions accumulées en mémoire avant écriture dans les colonnes
+
+# --- Choix du stockage : 'json' (fichiers plats, par défaut) ou 'sqlite' (SQLITE_FILE) ---
+BACKEND_STOCKAGE = os.environ.get('FERME_BACKEND', 'json')
+
+# Table SQLite et colonnes indexées (clés naturelles) pour chaque collection
+SCHEMA_SQLITE = {
+    STOCK_FILE: ('stock', ['nom']),
+    FINANCE_FILE: ('transactions', ['date', 'type']),
+    ANIMAUX_FILE: ('animaux', ['nom_id']),
+    CULTURES_FILE: ('cultures', ['nom_parcelle']),
+    OUVRIERS_FILE: ('ouvriers', ['id', 'nom']),
+    TACHES_FILE: ('taches', ['id']),
+    EQUIPEMENTS_FILE: ('equipements', ['id', 'nom']),
+    FOURNISSEURS_CLIENTS_FILE: ('fournisseurs_clients', ['id', 'nom_entreprise']),
+}
+
+# --- Cache en mémoire des collections ---
+# fichier -> (signature du fichier sur disque, données chargées)
+_cache_donnees = {}
+# fichier -> compteur incrémenté à chaque changement du contenu en cache
+_generations_donnees = {}
+
+def _signature_fichier(fichier):
+    # (mtime, taille) suffit à détecter une modification faite par un autre programme
+    try:
+        stat = os.stat(fichier)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _signature_stockage(fichier):
+    if BACKEND_STOCKAGE == 'sqlite':
+        # data_version change dès qu'une autre connexion modifie la base
+        return ('sqlite', _connexion_sqlite().execute('PRAGMA data_version').fetchone()[0])
+    if fichier == FINANCE_FILE:
+        return (_signature_fichier(FINANCE_FILE), _signature_fichier(FINANCE_JOURNAL_FILE))
+    return _signature_fichier(fichier)
+
+def _mettre_en_cache(fichier, signature, donnees):
+    _cache_donnees[fichier] = (signature, donnees)
+    _generations_donnees[fichier] = _generations_donnees.get(fichier, 0) + 1
+
+def generation_donnees(fichier):
+    # Permet aux autres caches (index, tableau de bord...) de savoir si une collection a changé
+    return _generations_donnees.get(fichier, 0)
+
+def vider_cache_donnees(fichier=None):
+    if fichier is None:
+        for f in list(_cache_donnees):
+            vider_cache_donnees(f)
+        return
+    if _cache_donnees.pop(fichier, None) is not None:
+        _generations_donnees[fichier] = _generations_donnees.get(fichier, 0) + 1
+
+def definir_backend_stockage(backend):
+    global BACKEND_STOCKAGE
+    if backend not in ('json', 'sqlite'):
+        raise ValueError(f"Backend de stockage inconnu : '{backend}'. Utilisez 'json' ou 'sqlite'.")
+    BACKEND_STOCKAGE = backend
+    vider_cache_donnees()
+    _modifications_sqlite.clear()
+
+# --- Verrouillage entre processus (plusieurs terminaux ou postes sur les mêmes fichiers) ---
+# Verrou consultatif fcntl sur VERROU_FILE : partagé pendant la lecture d'un fichier, exclusif pendant
+# toute une opération d'écriture (lecture, modification, sauvegarde). En plus, chaque sauvegarde vérifie
+# que le fichier n'a pas changé depuis sa lecture (version = signature du stockage gardée dans le
+# cache) : sinon l'opération est annulée au lieu d'écraser les modifications de l'autre programme.
+try:
+    import fcntl
+except ImportError: # Windows : pas de verrou, seule la vérification de version protège les données
+    fcntl = None
+
+_verrou = {'fichier': None, 'mode': None} # mode : None, 'partage' ou 'exclusif'
+
+class ConflitDeVersion(Exception):
+    pass
+
+def _poser_verrou(mode):
+    if fcntl is None:
+        return
+    if _verrou['fichier'] is None:
+        _verrou['fichier'] = open(VERROU_FILE, 'a')
+    operation = {None: fcntl.LOCK_UN, 'partage': fcntl.LOCK_SH, 'exclusif': fcntl.LOCK_EX}[mode]
+    fcntl.flock(_verrou['fichier'].fileno(), operation)
+
+@contextmanager
+def verrou_donnees(exclusif=True):
+    # Réentrant ; un verrou exclusif déjà posé couvre aussi les lectures
+    precedent = _verrou['mode']
+    mode = 'exclusif' if exclusif or precedent == 'exclusif' else 'partage'
+    if mode != precedent:
+        _poser_verrou(mode)
+        _verrou['mode'] = mode
+    try:
+        yield
+    finally:
+        if mode != precedent:
+            _poser_verrou(precedent)
+            _verrou['mode'] = precedent
+
+def _operation_exclusive(fonction):
+    # Pour les fonctions qui modifient les données : aucun autre programme n'écrit entre la lecture
+    # et la sauvegarde. Un conflit de version (écriture non verrouillée) annule l'opération.
+    @wraps(fonction)
+    def operation(*args, **kwargs):
+        if _verrou['mode'] == 'exclusif':
+            return fonction(*args, **kwargs) # Opération imbriquée : le conflit est traité par l'englobante
+        try:
+            with verrou_donnees():
+                return fonction(*args, **kwargs)
+        except ConflitDeVersion as e:
+            print(f"Erreur : {e}")
+            return False
+    return operation
+
+def _verifier_versions(fichiers):
+    # Les données à écrire doivent provenir de la version actuelle du fichier
+    for fichier, donnees in fichiers.items():
+        entree = _cache_donnees.get(fichier)
+        if entree is not None and entree[1] is donnees and entree[0] != _signature_stockage(fichier):
+            for f in list(fichiers) + [COMPTEURS_FILE]:
+                vider_cache_donnees(f) # Les objets en cache ont été modifiés : ils seront relus
+            raise ConflitDeVersion(f"'{fichier}' a été modifié par un autre programme depuis sa lecture. Opération annulée, veuillez réessayer.")
+
+# --- Stockage SQLite ---
+_connexion = None
+# fichier -> {'collection': liste chargée, 'lignes': {id(enregistrement): (rowid, json sérialisé, enregistrement)}} ;
+# pour FINANCE_FILE, {'collection': transactions chargées, 'nombre': transactions déjà dans la table}
+_lignes_sqlite = {}
+# fichier -> {'collection', 'touches': {id(enregistrement): (enregistrement, présent)}} : enregistrements
+# ajoutés, modifiés ou retirés depuis la dernière sauvegarde, notés par _indexer/_desindexer.
+# Une sauvegarde n'écrit que ces lignes (un INSERT, UPDATE ou DELETE chacune), sans parcourir la collection.
+_modifications_sqlite = {}
+
+def _connexion_sqlite():
+    global _connexion
+    if _connexion is None:
+        import sqlite3 # Seulement avec le stockage SQLite
+        with verrou_donnees(): # Un seul programme crée la base et y importe les fichiers JSON
+            nouvelle_base = not os.path.exists(SQLITE_FILE)
+            _connexion = sqlite3.connect(SQLITE_FILE, check_same_thread=False)
+            _creer_schema_sqlite(_connexion)
+            if nouvelle_base and any(os.path.exists(fichier) for fichier in SCHEMA_SQLITE):
+                migrer_json_vers_sqlite() # Ferme existante : sans cela, la base s'ouvrirait vide
+    return _connexion
+
+def _creer_schema_sqlite(connexion):
+    with connexion:
+        for table, colonnes in SCHEMA_SQLITE.values():
+            colonnes_sql = ''.join(f", {colonne}" for colonne in colonnes)
+            connexion.execute(f"CREATE TABLE IF NOT EXISTS {table} (rowid INTEGER PRIMARY KEY{colonnes_sql}, donnees TEXT NOT NULL)")
+            for colonne in colonnes:
+                connexion.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{colonne} ON {table} ({colonne})")
+        connexion.execute("CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT)")
+
+def _valeurs_cles_sqlite(enregistrement, fichier):
+    # Les clés naturelles sont stockées en minuscules : les recherches de l'application sont insensibles à la casse
+    valeurs = []
+    for colonne in SCHEMA_SQLITE[fichier][1]:
+        valeur = enregistrement.get(colonne)
+        valeurs.append(valeur.lower() if isinstance(valeur, str) and fichier != FINANCE_FILE else valeur)
+    return valeurs
+
+def _charger_sqlite(fichier):
+    connexion = _connexion_sqlite()
+    if fichier not in SCHEMA_SQLITE:
+        # Document isolé (ex : COMPTEURS_FILE) : une ligne de la table meta
+        ligne = connexion.execute("SELECT valeur FROM meta WHERE cle = ?", (fichier,)).fetchone()
+        return json.loads(ligne[0]) if ligne else []
+    table, _ = SCHEMA_SQLITE[fichier]
+    if fichier == FINANCE_FILE:
+        # Les transactions ne sont jamais modifiées après coup : seul leur nombre est retenu
+        transactions = [json.loads(texte) for (texte,) in connexion.execute(f"SELECT donnees FROM {table} ORDER BY rowid")]
+        _lignes_sqlite[fichier] = {'collection': transactions, 'nombre': len(transactions)}
+        ligne = connexion.execute("SELECT valeur FROM meta WHERE cle = 'solde'").fetchone()
+        return {'transactions': transactions, 'solde': float(ligne[0]) if ligne else 0.0}
+    enregistrements = []
+    lignes = {}
+    for rowid, texte in connexion.execute(f"SELECT rowid, donnees FROM {table} ORDER BY rowid"):
+        enregistrement = json.loads(texte)
+        enregistrements.append(enregistrement)
+        lignes[id(enregistrement)] = (rowid, texte, enregistrement)
+    _lignes_sqlite[fichier] = {'collection': enregistrements, 'lignes': lignes}
+    return enregistrements
+
+def _noter_modification_sqlite(fichier, collection, enregistrement, present):
+    if BACKEND_STOCKAGE != 'sqlite' or fichier not in SCHEMA_SQLITE:
+        return
+    entree = _modifications_sqlite.get(fichier)
+    if entree is None or entree['collection'] is not collection:
+        entree = _modifications_sqlite[fichier] = {'collection': collection, 'touches': {}}
+    entree['touches'][id(enregistrement)] = (enregistrement, present)
+
+def _ecrire_ligne_sqlite(connexion, fichier, lignes, enregistrement):
+    # INSERT ou UPDATE d'un enregistrement ; rien si son JSON n'a pas changé
+    table, colonnes = SCHEMA_SQLITE[fichier]
+    texte = json.dumps(enregistrement)
+    ligne = lignes.get(id(enregistrement))
+    if ligne is not None and ligne[1] == texte:
+        return
+    valeurs = _valeurs_cles_sqlite(enregistrement, fichier) + [texte]
+    if ligne is None:
+        marqueurs = ', '.join('?' for _ in valeurs)
+        curseur = connexion.execute(f"INSERT INTO {table} ({', '.join(colonnes + ['donnees'])}) VALUES ({marqueurs})", valeurs)
+        lignes[id(enregistrement)] = (curseur.lastrowid, texte, enregistrement)
+    else:
+        affectations = ', '.join(f"{colonne} = ?" for colonne in colonnes + ['donnees'])
+        connexion.execute(f"UPDATE {table} SET {affectations} WHERE rowid = ?", valeurs + [ligne[0]])
+        lignes[id(enregistrement)] = (ligne[0], texte, enregistrement)
+
+def _ecrire_sqlite(connexion, donnees, fichier):
+    # La validation (commit) est faite par l'appelant
+    if fichier not in SCHEMA_SQLITE:
+        connexion.execute("INSERT OR REPLACE INTO meta (cle, valeur) VALUES (?, ?)", (fichier, json.dumps(donnees)))
+        return
+    table, colonnes = SCHEMA_SQLITE[fichier]
+    chargees = _lignes_sqlite.get(fichier)
+
+    if fichier == FINANCE_FILE:
+        transactions = donnees['transactions']
+        if chargees is None or chargees['collection'] is not transactions:
+            connexion.execute(f"DELETE FROM {table}") # Historique qui ne vient pas de la base : réécrit en entier
+            chargees = _lignes_sqlite[fichier] = {'collection': transactions, 'nombre': 0}
+        marqueurs = ', '.join('?' for _ in range(len(colonnes) + 1))
+        connexion.executemany(f"INSERT INTO {table} ({', '.join(colonnes + ['donnees'])}) VALUES ({marqueurs})",
+                              (_valeurs_cles_sqlite(t, fichier) + [json.dumps(t)] for t in islice(transactions, chargees['nombre'], None)))
+        chargees['nombre'] = len(transactions)
+        connexion.execute("INSERT OR REPLACE INTO meta (cle, valeur) VALUES ('solde', ?)", (str(donnees['solde']),))
+        return
+
+    modifications = _modifications_sqlite.pop(fichier, None)
+    if chargees is None or chargees['collection'] is not donnees:
+        # Liste qui ne vient pas de _charger_sqlite : comparaison complète avec les lignes connues
+        anciennes = chargees['lignes'] if chargees is not None else {}
+        lignes = {}
+        for enregistrement in donnees:
+            if id(enregistrement) in anciennes:
+                lignes[id(enregistrement)] = anciennes[id(enregistrement)]
+            _ecrire_ligne_sqlite(connexion, fichier, lignes, enregistrement)
+        rowids_conserves = {ligne[0] for ligne in lignes.values()}
+        connexion.executemany(f"DELETE FROM {table} WHERE rowid = ?",
+                              [(ligne[0],) for ligne in anciennes.values() if ligne[0] not in rowids_conserves])
+        _lignes_sqlite[fichier] = {'collection': donnees, 'lignes': lignes}
+        return
+
+    if modifications is None or modifications['collection'] is not donnees:
+        return # Aucun enregistrement ajouté, modifié ou retiré
+    lignes = chargees['lignes']
+    for enregistrement, present in modifications['touches'].values():
+        if present:
+            _ecrire_ligne_sqlite(connexion, fichier, lignes, enregistrement)
+        elif id(enregistrement) in lignes:
+            connexion.execute(f"DELETE FROM {table} WHERE rowid = ?", (lignes.pop(id(enregistrement))[0],))
+
+def _sauvegarder_sqlite(modifications):
+    # Toutes les collections modifiées sont écrites dans une seule transaction SQLite
+    connexion = _connexion_sqlite()
+    try:
+        with connexion:
+            for fichier, donnees in modifications.items():
+                _ecrire_sqlite(connexion, donnees, fichier)
+    except BaseException:
+        # Transaction annulée : les lignes connues ne correspondent plus à la base, tout sera relu
+        for fichier in modifications:
+            _lignes_sqlite.pop(fichier, None)
+            _modifications_sqlite.pop(fichier, None)
+            vider_cache_donnees(fichier)
+        raise
+
+@_operation_exclusive
+def migrer_json_vers_sqlite():
+    # Import unique des fichiers JSON existants dans SQLITE_FILE (fait à la création de la base)
+    connexion = _connexion_sqlite()
+    for fichier, (table, colonnes) in SCHEMA_SQLITE.items():
+        if connexion.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+            print(f"Table '{table}' déjà remplie, '{fichier}' ignoré.")
+            continue
+        donnees = _lire_json(fichier)
+        enregistrements = donnees['transactions'] if fichier == FINANCE_FILE else donnees
+        colonnes_sql = ', '.join(colonnes + ['donnees'])
+        marqueurs = ', '.join('?' for _ in range(len(colonnes) + 1))
+        with connexion:
+            connexion.executemany(
+                f"INSERT INTO {table} ({colonnes_sql}) VALUES ({marqueurs})",
+                (_valeurs_cles_sqlite(e, fichier) + [json.dumps(e)] for e in enregistrements)
+            )
+            if fichier == FINANCE_FILE:
+                connexion.execute("INSERT OR REPLACE INTO meta (cle, valeur) VALUES ('solde', ?)", (str(donnees['solde']),))
+        print(f"{len(enregistrements)} enregistrement(s) importé(s) de '{fichier}' dans la table '{table}'.")
+    if os.path.exists(SEQUENCES_FILE) and not connexion.execute("SELECT 1 FROM meta WHERE cle = ?", (SEQUENCES_FILE,)).fetchone():
+        with open(SEQUENCES_FILE, 'r', encoding='utf-8') as f, connexion:
+            # Sans elle, un id supprimé avant la migration pourrait être réattribué
+            connexion.execute("INSERT INTO meta (cle, valeur) VALUES (?, ?)", (SEQUENCES_FILE, f.read()))
+    if BACKEND_STOCKAGE == 'sqlite':
+        vider_cache_donnees()
 
 # --- Fonctions utilitaires pour charger/sauvegarder les données ---
-def charger_donnees(fichier):
+def _lire_json(fichier):
     if not os.path.exists(fichier) or os.path.getsize(fichier) == 0:
         if fichier == FINANCE_FILE:
-            return {'transactions': [], 'solde': 0.0}
+            donnees = {'transactions': [], 'solde': 0.0}
         else: # Pour les autres fichiers (stock, animaux, cultures, ouvriers, tâches, équipements, fournisseurs_clients)
             return []
-    with open(fichier, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    else:
+        with open(fichier, 'r', encoding='utf-8') as f:
+            donnees = json.load(f)
+    if fichier == FINANCE_FILE:
+        _rejouer_journal_finance(donnees)
+    return donnees
+
+def charger_donnees(fichier):
+    if _unite_de_travail is not None and fichier in _unite_de_travail['fichiers']:
+        return _unite_de_travail['fichiers'][fichier] # Modification pas encore écrite sur le disque
+    _terminer_unite_interrompue()
+
+    # Renvoie l'objet en cache tant que le stockage n'a pas changé
+    signature = _signature_stockage(fichier)
+    entree = _cache_donnees.get(fichier)
+    if entree is not None and entree[0] == signature:
+        return entree[1]
+
+    # Verrou partagé : pas de lecture au milieu de la validation d'une unité d'un autre programme
+    with verrou_donnees(exclusif=False):
+        signature = _signature_stockage(fichier)
+        if BACKEND_STOCKAGE == 'sqlite':
+            donnees = _charger_sqlite(fichier)
+        else:
+            donnees = _lire_json(fichier)
+    _mettre_en_cache(fichier, signature, donnees)
+    return donnees
 
 def sauvegarder_donnees(donnees, fichier):
-    with open(fichier, 'w', encoding='utf-8') as f:
+    if _unite_de_travail is not None:
+        _unite_de_travail['fichiers'][fichier] = donnees # Écrit une seule fois, à la fin de l'unité de travail
+        return
+    _valider_modifications({fichier: donnees}, [])
+
+def _ecrire_json_atomique(donnees, fichier):
+    # Écrit dans un fichier temporaire synchronisé sur le disque ; os.replace le rend visible d'un coup
+    temporaire = fichier + '.tmp'
+    with open(temporaire, 'w', encoding='utf-8') as f:
         json.dump(donnees, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    return temporaire
+
+# --- Dates : validation à la saisie et analyse mémorisée ---
+# Les dates sont stockées en texte 'AAAA-MM-JJ' (jours) ou 'AAAA-MM-JJ HH:MM:SS' (transactions).
+# Elles sont normalisées et vérifiées une fois à l'écriture ; en lecture, _analyser_date remplace
+# strptime et garde les jours déjà vus (les mêmes dates reviennent dans toutes les collections).
+@lru_cache(maxsize=4096)
+def _analyser_date(texte):
+    # date, ou None si le texte n'est pas une date valide
+    try:
+        # fromisoformat seulement pour 'AAAA-MM-JJ' : il accepte aussi d'autres formes ISO (ex : '2024-W10-1')
+        if len(texte) == 10 and texte[4] == '-' == texte[7] and (texte[:4] + texte[5:7] + texte[8:]).isdigit():
+            return date.fromisoformat(texte)
+        return datetime.strptime(texte, "%Y-%m-%d").date() # Anciennes saisies sans zéros (ex : 2024-3-5)
+    except (TypeError, ValueError):
+        return None
+
+def normaliser_date(valeur):
+    # 'AAAA-MM-JJ' à partir d'une chaîne ou d'un objet date ; None si la date est invalide
+    if isinstance(valeur, datetime):
+        valeur = valeur.date()
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    jour = _analyser_date(valeur.strip()) if isinstance(valeur, str) else None
+    return None if jour is None else jour.isoformat()
+
+def _normaliser_dates(obligatoires, dates):
+    # Renvoie les dates normalisées (même ordre) ; ValueError si l'une est invalide.
+    # Hors 'obligatoires', None (pas de date / pas de changement) et '' (date effacée) sont acceptés.
+    normalisees = {}
+    for champ, valeur in dates.items():
+        if valeur is None or valeur == '':
+            if champ in obligatoires:
+                raise ValueError(f"Date manquante pour '{champ}'.")
+            normalisees[champ] = valeur
+            continue
+        normalisees[champ] = normaliser_date(valeur)
+        if normalisees[champ] is None:
+            raise ValueError(f"Date invalide pour '{champ}' : '{valeur}'. Utilisez le format AAAA-MM-JJ.")
+    return normalisees
+
+def _valider_dates(obligatoires=(), **dates):
+    # Comme _normaliser_dates, mais affiche l'erreur et renvoie None
+    try:
+        return _normaliser_dates(obligatoires, dates)
+    except ValueError as e:
+        print(f"Erreur : {e}")
+        return None
+
+# --- Unité de travail : une opération métier = une écriture par fichier touché ---
+# Pendant l'unité, sauvegarder_donnees, les transactions financières et les ajouts aux journaux
+# (_ajouter_au_journal) ne font qu'enregistrer les modifications en mémoire ; tout est écrit à la
+# sortie du bloc 'with'.
+_unite_de_travail = None
+
+@contextmanager
+def unite_de_travail():
+    global _unite_de_travail, _compteurs_en_attente
+    if _unite_de_travail is not None:
+        yield # Unité imbriquée : les écritures rejoignent l'unité englobante
+        return
+
+    _unite_de_travail = {'fichiers': {}, 'journal': [], 'finance': None, 'ajouts': {}}
+    try:
+        yield
+    except BaseException:
+        unite, _unite_de_travail = _unite_de_travail, None
+        if _compteurs_en_attente is not None:
+            _compteurs_en_attente = None
+            vider_cache_donnees(COMPTEURS_FILE)
+        # Les objets en cache ont pu être modifiés en place : on les relira depuis le disque
+        for fichier in list(unite['fichiers']) + ([FINANCE_FILE] if unite['journal'] else []):
+            vider_cache_donnees(fichier)
+        raise
+    unite, _unite_de_travail = _unite_de_travail, None
+    if unite['journal'] and FINANCE_FILE not in unite['fichiers']:
+        _valider_modifications(unite['fichiers'], unite['journal'], unite['finance'], unite['ajouts'])
+    else:
+        _valider_modifications(unite['fichiers'], [], ajouts=unite['ajouts'])
+
+def _valider_modifications(fichiers, lignes_journal, finance_data=None, ajouts=None):
+    global _compteurs_en_attente
+    if _compteurs_en_attente is not None and COMPTEURS_FILE not in fichiers:
+        fichiers = dict(fichiers)
+        fichiers[COMPTEURS_FILE] = _compteurs_en_attente # Écrits avec les données qu'ils décrivent
+    _compteurs_en_attente = None
+    with verrou_donnees():
+        _verifier_versions({**fichiers, **({FINANCE_FILE: finance_data} if finance_data is not None else {})})
+        _ecrire_modifications(fichiers, lignes_journal, finance_data, ajouts or {})
+
+def _ecrire_modifications(fichiers, lignes_journal, finance_data, ajouts):
+    finance_modifiee = fichiers.get(FINANCE_FILE, finance_data)
+    signature_finance = _signature_persistante_finance() if finance_modifiee is not None else None
+
+    if BACKEND_STOCKAGE == 'sqlite':
+        _sauvegarder_sqlite(fichiers)
+        for fichier, lignes in ajouts.items(): # Journaux hors de la base : ajoutés après sa validation
+            _ajouter_lignes(fichier, _taille_fichier(fichier), lignes)
+    else:
+        # 1. Fichiers temporaires complets ; 2. liste des remplacements (point de validation) ;
+        # 3. remplacements. Après un arrêt brutal, _reprendre_unite_de_travail termine l'étape 3.
+        temporaires = [_ecrire_json_atomique(donnees, fichier) for fichier, donnees in fichiers.items()]
+        if len(temporaires) > 1 or lignes_journal or ajouts:
+            ajouts = {fichier: {'taille': _taille_fichier(fichier), 'lignes': lignes} for fichier, lignes in ajouts.items()}
+            _ecrire_json_atomique({'fichiers': list(fichiers), 'journal': lignes_journal, 'ajouts': ajouts}, UNITE_DE_TRAVAIL_FILE)
+            os.replace(UNITE_DE_TRAVAIL_FILE + '.tmp', UNITE_DE_TRAVAIL_FILE)
+            _reprendre_unite_de_travail()
+        else:
+            for fichier, temporaire in zip(fichiers, temporaires):
+                os.replace(temporaire, fichier)
+                if fichier == FINANCE_FILE and os.path.exists(FINANCE_JOURNAL_FILE):
+                    os.remove(FINANCE_JOURNAL_FILE) # Son contenu est désormais dans FINANCE_FILE
+
+    for fichier, donnees in fichiers.items():
+        _mettre_en_cache(fichier, _signature_stockage(fichier), donnees)
+    if finance_data is not None:
+        _mettre_en_cache(FINANCE_FILE, _signature_stockage(FINANCE_FILE), finance_data)
+    if finance_modifiee is not None:
+        _apres_ecriture_finance(finance_modifiee, signature_finance)
+    if lignes_journal and BACKEND_STOCKAGE == 'json':
+        _compacter_si_necessaire(finance_data)
+
+def _terminer_unite_interrompue():
+    if BACKEND_STOCKAGE == 'json' and os.path.exists(UNITE_DE_TRAVAIL_FILE):
+        with verrou_donnees(): # Attend la fin d'une validation en cours dans un autre programme
+            if os.path.exists(UNITE_DE_TRAVAIL_FILE):
+                _reprendre_unite_de_travail()
+
+def _reprendre_unite_de_travail():
+    # Rejouer les remplacements est sans risque : un fichier déjà remplacé n'a plus de .tmp
+    # et les lignes de journal déjà ajoutées sont ignorées à la relecture grâce à leur numéro 'n'.
+    with open(UNITE_DE_TRAVAIL_FILE, 'r', encoding='utf-8') as f:
+        unite = json.load(f)
+    for fichier in unite['fichiers']:
+        if os.path.exists(fichier + '.tmp'):
+            os.replace(fichier + '.tmp', fichier)
+    if FINANCE_FILE in unite['fichiers']:
+        if os.path.exists(FINANCE_JOURNAL_FILE):
+            os.remove(FINANCE_JOURNAL_FILE)
+    elif unite['journal']:
+        with open(FINANCE_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+            f.write(''.join(ligne + '\n' for ligne in unite['journal']))
+    for fichier, ajout in unite.get('ajouts', {}).items():
+        _ajouter_lignes(fichier, ajout['taille'], ajout['lignes'])
+    os.remove(UNITE_DE_TRAVAIL_FILE)
+
+# --- Journaux en ajout seul (JSON Lines) ---
+def _taille_fichier(fichier):
+    return os.path.getsize(fichier) if os.path.exists(fichier) else 0
+
+def _ajouter_lignes(fichier, taille_avant, lignes):
+    # Rejouable : si l'ajout a déjà eu lieu (taille attendue) rien n'est écrit ; un ajout interrompu
+    # est retiré avant d'être refait.
+    contenu = ''.join(ligne + '\n' for ligne in lignes).encode('utf-8')
+    taille = _taille_fichier(fichier)
+    if taille == taille_avant + len(contenu):
+        return
+    with open(fichier, 'ab') as f:
+        if taille > taille_avant:
+            f.truncate(taille_avant)
+        f.write(contenu)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _ajouter_au_journal(fichier, lignes):
+    if _unite_de_travail is not None:
+        _unite_de_travail['ajouts'].setdefault(fichier, []).extend(lignes) # Écrites à la fin de l'unité
+        return
+    with verrou_donnees():
+        _ajouter_lignes(fichier, _taille_fichier(fichier), lignes)
+
+# --- Journal des transactions financières (ajout seul, format JSON Lines) ---
+# Chaque ligne porte 'n', le nombre de transactions après l'opération, ce qui permet
+# d'ignorer les lignes déjà intégrées à FINANCE_FILE (par exemple après un arrêt pendant une compaction).
+def _variation_solde(transaction):
+    return {'recette': 1, 'depense': -1}.get(transaction['type'], 0) * transaction['montant']
+
+def _appliquer_transaction(finance_data, transaction):
+    finance_data['transactions'].append(transaction)
+    finance_data['solde'] += _variation_solde(transaction)
+
+def _entrees_journal_finance(nombre):
+    # Entrées du journal à appliquer, dans l'ordre, à un historique de 'nombre' transactions
+    if not os.path.exists(FINANCE_JOURNAL_FILE):
+        return
+    with open(FINANCE_JOURNAL_FILE, 'r', encoding='utf-8') as f:
+        for ligne in f:
+            try:
+                entree = json.loads(ligne)
+            except ValueError:
+                continue # Dernière ligne incomplète (écriture interrompue)
+            if 'transaction' in entree and entree['n'] == nombre + 1:
+                nombre += 1
+                yield entree
+            elif 'solde' in entree and entree['n'] == nombre:
+                yield entree
+
+def _rejouer_journal_finance(finance_data):
+    for entree in _entrees_journal_finance(len(finance_data['transactions'])):
+        if 'transaction' in entree:
+            _appliquer_transaction(finance_data, entree['transaction'])
+        else:
+            finance_data['solde'] = entree['solde'] # Point de contrôle : corrige les écarts d'arrondi
+
+def _journaliser_transaction(finance_data, transaction):
+    if BACKEND_STOCKAGE == 'sqlite':
+        sauvegarder_donnees(finance_data, FINANCE_FILE) # SQLite n'insère déjà que la nouvelle ligne
+        return
+
+    nombre = len(finance_data['transactions'])
+    lignes = [json.dumps({'n': nombre, 'transaction': transaction})]
+    if nombre % INTERVALLE_POINT_CONTROLE_SOLDE == 0:
+        lignes.append(json.dumps({'n': nombre, 'solde': finance_data['solde']}))
+    if _unite_de_travail is not None:
+        _unite_de_travail['journal'].extend(lignes)
+        _unite_de_travail['finance'] = finance_data
+        return
+    with verrou_donnees():
+        _verifier_versions({FINANCE_FILE: finance_data})
+        signature_finance = _signature_persistante_finance()
+        with open(FINANCE_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lignes) + '\n')
+        # Mis en cache avec la signature qui suit l'ajout : la compaction ne voit pas sa propre écriture comme un conflit
+        _mettre_en_cache(FINANCE_FILE, _signature_stockage(FINANCE_FILE), finance_data)
+        _apres_ecriture_finance(finance_data, signature_finance)
+        _compacter_si_necessaire(finance_data)
+
+def _compacter_si_necessaire(finance_data):
+    # Après un ajout au journal, sous le verrou exclusif et avec finance_data en cache
+    if os.path.getsize(FINANCE_JOURNAL_FILE) > TAILLE_MAX_JOURNAL_FINANCE:
+        sauvegarder_donnees(finance_data, FINANCE_FILE) # Compaction : réécrit FINANCE_FILE et supprime le journal
+
+@_operation_exclusive
+def compacter_journal_finance():
+    # Intègre le journal dans FINANCE_FILE (sauvegarder_donnees supprime ensuite le journal)
+    if BACKEND_STOCKAGE == 'sqlite':
+        return
+    sauvegarder_donnees(charger_donnees(FINANCE_FILE), FINANCE_FILE)
+
+# --- Lecture en continu des fichiers de données ---
+# Pour les parcours en lecture seule (listes, rapports) : les enregistrements sont décodés un par un,
+# par blocs de TAILLE_BLOC_LECTURE caractères, au lieu de charger tout le fichier avec json.load.
+_decodeur_json = json.JSONDecoder()
+_ESPACES_JSON = re.compile(r'[ \t\n\r]*')
+_SUITE_NOMBRE_JSON = re.compile(r'[0-9.eE+-]*')
+
+def _ouvrir_lecteur_json(f):
+    return {'fichier': f, 'tampon': '', 'pos': 0, 'fin': False}
+
+def _lire_bloc(lecteur):
+    # Garde la partie non décodée du tampon et y ajoute le bloc suivant
+    bloc = lecteur['fichier'].read(TAILLE_BLOC_LECTURE)
+    lecteur['tampon'] = lecteur['tampon'][lecteur['pos']:] + bloc
+    lecteur['pos'] = 0
+    lecteur['fin'] = not bloc
+    return bool(bloc)
+
+def _caractere_suivant(lecteur):
+    # Premier caractère après les espaces, sans le consommer ; '' en fin de fichier
+    while True:
+        lecteur['pos'] = _ESPACES_JSON.match(lecteur['tampon'], lecteur['pos']).end()
+        if lecteur['pos'] < len(lecteur['tampon']):
+            return lecteur['tampon'][lecteur['pos']]
+        if not _lire_bloc(lecteur):
+            return ''
+
+def _attendre(lecteur, attendus):
+    caractere = _caractere_suivant(lecteur)
+    if not caractere or caractere not in attendus:
+        raise ValueError(f"JSON invalide : l'un de '{attendus}' attendu, '{caractere}' trouvé.")
+    lecteur['pos'] += 1
+    return caractere
+
+def _valeur_json(lecteur):
+    _caractere_suivant(lecteur)
+    while True:
+        try:
+            valeur, fin = _decodeur_json.raw_decode(lecteur['tampon'], lecteur['pos'])
+        except ValueError:
+            if lecteur['fin']:
+                raise
+            _lire_bloc(lecteur) # Valeur coupée par la fin du tampon
+            continue
+        if not lecteur['fin'] and _SUITE_NOMBRE_JSON.match(lecteur['tampon'], fin).end() == len(lecteur['tampon']):
+            # Un nombre coupé par la fin du tampon ('98765.' puis '5') est décodé trop court :
+            # il n'est accepté que suivi d'un caractère qui ne peut pas le prolonger
+            _lire_bloc(lecteur)
+            continue
+        lecteur['pos'] = fin
+        return valeur
+
+def _elements_tableau(lecteur):
+    _attendre(lecteur, '[')
+    if _caractere_suivant(lecteur) == ']':
+        lecteur['pos'] += 1
+        return
+    while True:
+        yield _valeur_json(lecteur)
+        if _attendre(lecteur, ',]') == ']':
+            return
+
+def _membres_objet(lecteur):
+    # Produit chaque clé ; l'appelant doit lire la valeur (_valeur_json ou _elements_tableau) avant de continuer
+    _attendre(lecteur, '{')
+    if _caractere_suivant(lecteur) == '}':
+        lecteur['pos'] += 1
+        return
+    while True:
+        cle = _valeur_json(lecteur)
+        _attendre(lecteur, ':')
+        yield cle
+        if _attendre(lecteur, ',}') == '}':
+            return
+
+def _donnees_en_memoire(fichier):
+    # Données déjà chargées et toujours à jour, ou None : dans ce cas, il faut relire le stockage
+    if _unite_de_travail is not None and fichier in _unite_de_travail['fichiers']:
+        return _unite_de_travail['fichiers'][fichier]
+    _terminer_unite_interrompue()
+    entree = _cache_donnees.get(fichier)
+    if entree is not None and entree[0] == _signature_stockage(fichier):
+        return entree[1]
+    return None
+
+def iterer_transactions(infos=None):
+    # Transactions une par une, dans l'ordre d'enregistrement, sans charger tout l'historique.
+    # Si 'infos' est un dict, il reçoit le solde ('solde') à la fin du parcours.
+    finance_data = _donnees_en_memoire(FINANCE_FILE)
+    if finance_data is not None:
+        yield from finance_data['transactions']
+        solde = finance_data['solde']
+    elif BACKEND_STOCKAGE == 'sqlite':
+        connexion = _connexion_sqlite()
+        for (texte,) in connexion.execute(f"SELECT donnees FROM {SCHEMA_SQLITE[FINANCE_FILE][0]} ORDER BY rowid"):
+            yield json.loads(texte)
+        ligne = connexion.execute("SELECT valeur FROM meta WHERE cle = 'solde'").fetchone()
+        solde = float(ligne[0]) if ligne else 0.0
+    else:
+        nombre = 0
+        solde = 0.0
+        if os.path.exists(FINANCE_FILE) and os.path.getsize(FINANCE_FILE) > 0:
+            with open(FINANCE_FILE, 'r', encoding='utf-8') as f:
+                lecteur = _ouvrir_lecteur_json(f)
+                for cle in _membres_objet(lecteur):
+                    if cle == 'transactions':
+                        for transaction in _elements_tableau(lecteur):
+                            nombre += 1
+                            yield transaction
+                    else:
+                        valeur = _valeur_json(lecteur)
+                        if cle == 'solde':
+                            solde = valeur
+        for entree in _entrees_journal_finance(nombre):
+            if 'transaction' in entree:
+                solde += _variation_solde(entree['transaction'])
+                yield entree['transaction']
+            else:
+                solde = entree['solde']
+    if infos is not None:
+        infos['solde'] = solde
+
+def iterer_enregistrements(fichier):
+    # Enregistrements d'une collection un par un (liste de premier niveau du fichier)
+    if fichier == FINANCE_FILE:
+        yield from iterer_transactions()
+        return
+    donnees = _donnees_en_memoire(fichier)
+    if donnees is not None:
+        yield from donnees
+    elif BACKEND_STOCKAGE == 'sqlite':
+        for (texte,) in _connexion_sqlite().execute(f"SELECT donnees FROM {SCHEMA_SQLITE[fichier][0]} ORDER BY rowid"):
+            yield json.loads(texte)
+    elif os.path.exists(fichier) and os.path.getsize(fichier) > 0:
+        with open(fichier, 'r', encoding='utf-8') as f:
+            yield from _elements_tableau(_ouvrir_lecteur_json(f))
+
+# --- Copie en colonnes des transactions (fichiers binaires projetés en mémoire) ---
+# Une colonne par champ : horodatage (secondes depuis 1970), code du type, montant, et positions
+# de la description dans descriptions.txt et de la transaction complète dans transactions.jsonl.
+# transactions_entre y cherche la période par dichotomie puis lit seulement ses lignes ; l'analyse
+# des dépenses par catégorie lit les dates, types, montants et descriptions, sans décoder l'historique JSON.
+CODES_TYPE_TRANSACTION = {'recette': 1, 'depense': 2} # 0 : autre type
+COLONNES_FINANCE = {'dates': 'q', 'types': 'B', 'montants': 'd', 'positions_descriptions': 'q', 'positions_transactions': 'q'}
+# Fichier d'une ligne JSON par transaction -> (colonne de la position des lignes, valeur écrite)
+LIGNES_FINANCE = {
+    'descriptions.txt': ('positions_descriptions', lambda t: t.get('description', '')),
+    'transactions.jsonl': ('positions_transactions', lambda t: t),
+}
+VERSION_COLONNES_FINANCE = 2 # À changer avec les colonnes : celles d'une autre version sont reconstruites
+_DATE_INVALIDE = -2 ** 63
+_EPOCH = datetime(1970, 1, 1)
+
+def _chemin_colonne_finance(nom):
+    return os.path.join(FINANCE_COLONNES_DIR, nom)
+
+def _horodatage_transaction(date_str):
+    # 'AAAA-MM-JJ HH:MM:SS' exactement ; fromisoformat est bien plus rapide que strptime
+    if not isinstance(date_str, str) or len(date_str) != 19 or date_str[10] != ' ':
+        return _DATE_INVALIDE
+    try:
+        return int((datetime.fromisoformat(date_str) - _EPOCH).total_seconds())
+    except ValueError:
+        return _DATE_INVALIDE
+
+def _signature_persistante_finance():
+    # Comme _signature_stockage, mais comparable d'un lancement du programme à l'autre
+    if BACKEND_STOCKAGE == 'sqlite':
+        # Transactions jamais supprimées : le dernier rowid suffit, sans count(*) qui parcourt la table
+        return ['sqlite', _connexion_sqlite().execute("SELECT max(rowid) FROM transactions").fetchone()[0]]
+    return [list(s) if s else None for s in (_signature_fichier(FINANCE_FILE), _signature_fichier(FINANCE_JOURNAL_FILE))]
+
+def _lire_meta_colonnes_finance():
+    try:
+        with open(_chemin_colonne_finance('meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == VERSION_COLONNES_FINANCE else None
+
+def _synchroniser_colonnes_finance(finance_data, signature_precedente):
+    # Ajoute les nouvelles transactions si les colonnes correspondaient à signature_precedente, sinon reconstruit tout.
+    # Sans finance_data, la reconstruction lit les transactions en continu (iterer_transactions).
+    signature = _signature_persistante_finance()
+    meta = None
+    if finance_data is not None:
+        meta = _lire_meta_colonnes_finance()
+        if meta is not None and (meta['signature'] != signature_precedente or meta['nombre'] > len(finance_data['transactions'])):
+            meta = None
+    if meta is None:
+        os.makedirs(FINANCE_COLONNES_DIR, exist_ok=True)
+        meta = {'version': VERSION_COLONNES_FINANCE, 'nombre': 0, 'triees': True, 'derniere_date': _DATE_INVALIDE, 'invalides': 0}
+        mode = 'wb'
+        nouvelles = iterer_transactions() if finance_data is None else finance_data['transactions']
+    else:
+        mode = 'ab'
+        nouvelles = finance_data['transactions'][meta['nombre']:]
+
+    noms = list(COLONNES_FINANCE) + list(LIGNES_FINANCE)
+    chemins = [_chemin_colonne_finance(nom + '.bin') for nom in COLONNES_FINANCE] + [_chemin_colonne_finance(nom) for nom in LIGNES_FINANCE]
+    # Une reconstruction écrit des fichiers temporaires mis en place par os.replace : un autre programme
+    # qui a projeté les anciens en mémoire continue de les lire en entier (un ajout ne les tronque pas)
+    suffixe = '' if mode == 'ab' else '.tmp'
+    positions = {nom: os.path.getsize(_chemin_colonne_finance(nom)) if mode == 'ab' else 0 for nom in LIGNES_FINANCE}
+    with ExitStack() as fichiers:
+        sorties = {nom: fichiers.enter_context(open(chemin + suffixe, mode)) for nom, chemin in zip(noms, chemins)}
+        colonnes = {nom: array(code) for nom, code in COLONNES_FINANCE.items()}
+        lignes = {nom: [] for nom in LIGNES_FINANCE}
+
+        def ecrire_lot():
+            for nom, valeurs in colonnes.items():
+                valeurs.tofile(sorties[nom])
+                del valeurs[:]
+            for nom, textes in lignes.items():
+                sorties[nom].write(b''.join(textes))
+                textes.clear()
+
+        for t in nouvelles:
+            date = _horodatage_transaction(t.get('date'))
+            if date == _DATE_INVALIDE:
+                meta['invalides'] += 1
+                meta['triees'] = False
+            elif date < meta['derniere_date']:
+                meta['triees'] = False
+            meta['derniere_date'] = max(meta['derniere_date'], date)
+            colonnes['dates'].append(date)
+            colonnes['types'].append(CODES_TYPE_TRANSACTION.get(t.get('type'), 0))
+            colonnes['montants'].append(float(t.get('montant', 0.0)))
+            for nom, (colonne, valeur) in LIGNES_FINANCE.items():
+                texte = (json.dumps(valeur(t)) + '\n').encode('utf-8')
+                colonnes[colonne].append(positions[nom])
+                positions[nom] += len(texte)
+                lignes[nom].append(texte)
+            meta['nombre'] += 1
+            if len(colonnes['dates']) >= TAILLE_LOT_COLONNES:
+                ecrire_lot()
+        ecrire_lot()
+    for chemin in chemins if suffixe else ():
+        os.replace(chemin + suffixe, chemin)
+
+    # Écrit en dernier : si le programme s'arrête avant, les colonnes seront reconstruites au prochain rapport
+    meta['signature'] = signature
+    chemin_meta = _chemin_colonne_finance('meta.json')
+    os.replace(_ecrire_json_atomique(meta, chemin_meta), chemin_meta)
+    return meta
+
+def _transactions_aux_rangs(colonnes, rangs):
+    # Transactions de ces rangs (ordre d'enregistrement), lues à leur position dans transactions.jsonl :
+    # un seul positionnement pour des rangs qui se suivent
+    positions = colonnes['positions_transactions']
+    with open(_chemin_colonne_finance('transactions.jsonl'), 'rb') as f:
+        suivant = None
+        for rang in rangs:
+            if rang != suivant:
+                f.seek(positions[rang])
+            suivant = rang + 1
+            yield json.loads(f.readline())
+
+def _apres_ecriture_finance(finance_data, signature_precedente):
+    # Point unique de mise à jour des structures dérivées des transactions
+    _synchroniser_colonnes_finance(finance_data, signature_precedente)
+    _synchroniser_agregats_finance(finance_data, signature_precedente)
+    _synchroniser_index_texte_finance(finance_data, signature_precedente)
+
+def reconstruire_colonnes_finance():
+    with verrou_donnees(): # Deux programmes ne reconstruisent pas les colonnes en même temps
+        return _synchroniser_colonnes_finance(None, None)
+
+def _meta_colonnes_finance():
+    # Méta des colonnes, reconstruites d'abord si elles ne correspondent plus aux transactions
+    meta = _lire_meta_colonnes_finance()
+    if meta is None or meta['signature'] != _signature_persistante_finance():
+        meta = reconstruire_colonnes_finance()
+    return meta
+
+@contextmanager
+def _colonnes_finance():
+    # with _colonnes_finance() as (meta, {colonne: memoryview typée}) : les fichiers sont projetés en
+    # lecture seule, et les projections fermées à la sortie (les vues ne doivent pas être gardées au-delà)
+    import mmap # Seulement pour les rapports financiers
+    meta = _meta_colonnes_finance()
+    with ExitStack() as projections:
+        vues = {}
+        for nom, code in COLONNES_FINANCE.items():
+            taille = meta['nombre'] * array(code).itemsize
+            if taille == 0:
+                vues[nom] = memoryview(array(code))
+                continue
+            with open(_chemin_colonne_finance(nom + '.bin'), 'rb') as f:
+                projection = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            projections.callback(projection.close)
+            vues[nom] = memoryview(projection)[:taille].cast(code)
+            projections.callback(vues[nom].release) # Avant close : une vue encore ouverte l'empêcherait
+        yield meta, vues
+
+def _depenses_entre(date_debut, date_fin):
+    # (montant, description) de chaque dépense de la période, dates invalides exclues
+    if _donnees_en_memoire(FINANCE_FILE) is not None:
+        for t in transactions_entre(date_debut, date_fin):
+            if t['type'] == 'depense':
+                yield t['montant'], t['description']
+        return
+    with _colonnes_finance() as (meta, colonnes):
+        if meta['nombre'] == 0:
+            return
+        debut = _horodatage_borne(date_debut, False)
+        fin = _horodatage_borne(date_fin, True)
+        dates, types, montants = colonnes['dates'], colonnes['types'], colonnes['montants']
+        positions_descriptions = colonnes['positions_descriptions']
+        if meta['triees']:
+            rangs = range(bisect_left(dates, debut), bisect_right(dates, fin))
+        else:
+            rangs = (i for i in range(meta['nombre']) if debut <= dates[i] <= fin)
+        import mmap
+        code_depense = CODES_TYPE_TRANSACTION['depense']
+        with open(_chemin_colonne_finance('descriptions.txt'), 'rb') as f:
+            descriptions = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with descriptions:
+            for i in rangs:
+                if types[i] == code_depense:
+                    position = positions_descriptions[i]
+                    yield montants[i], json.loads(descriptions[position:descriptions.find(b'\n', position)])
+
+# --- Agrégats journaliers et mensuels des recettes et dépenses ---
+# {'jours': {'AAAA-MM-JJ': [recettes, depenses]}, 'mois': {'AAAA-MM': [recettes, depenses]}, ...}
+# Mis à jour à chaque écriture financière, avec la même signature que les colonnes.
+# Chaque écriture ajoute seulement ses totaux du jour à FINANCE_AGREGATS_JOURNAL_FILE
+# ({'depuis': signature précédente, 'signature', 'nombre', 'invalides', 'jours'}) ; ils sont repliés
+# à la lecture, et dans FINANCE_AGREGATS_FILE (écrit de façon atomique) tous les LIMITE_JOURNAL_AGREGATS ajouts.
+LIMITE_JOURNAL_AGREGATS = 1000
+_agregats_finance = None # Dernière version lue ou écrite des agrégats, journal replié
+
+def _fusionner_agregats(agregats, ajout):
+    agregats['nombre'] += ajout['nombre']
+    agregats['invalides'] += ajout['invalides']
+    for jour, (recettes, depenses) in ajout['jours'].items():
+        for periode, cle in (('jours', jour), ('mois', jour[:7])):
+            totaux = agregats[periode].setdefault(cle, [0.0, 0.0])
+            totaux[0] += recettes
+            totaux[1] += depenses
+
+def _lire_agregats_finance():
+    # Agrégats de FINANCE_AGREGATS_FILE, avec les ajouts du journal qui suivent sa signature
+    try:
+        with open(FINANCE_AGREGATS_FILE, 'r', encoding='utf-8') as f:
+            agregats = json.load(f)
+    except (OSError, ValueError):
+        return None
+    agregats['ajouts'] = 0
+    try:
+        with open(FINANCE_AGREGATS_JOURNAL_FILE, 'r', encoding='utf-8') as f:
+            for texte in f:
+                try:
+                    ajout = json.loads(texte)
+                except ValueError:
+                    break # Ligne incomplète (arrêt pendant un ajout)
+                if ajout['depuis'] != agregats['signature']:
+                    break # Journal d'une version précédente de FINANCE_AGREGATS_FILE
+                _fusionner_agregats(agregats, ajout)
+                agregats['signature'] = ajout['signature']
+                agregats['ajouts'] += 1
+    except FileNotFoundError:
+        pass
+    return agregats
+
+def _agregats_correspondant(signature):
+    # Sans verrou : FINANCE_AGREGATS_FILE est remplacé d'un coup et le journal ne fait que grandir
+    global _agregats_finance
+    if _agregats_finance is not None and _agregats_finance['signature'] == signature:
+        return _agregats_finance
+    agregats = _lire_agregats_finance()
+    if agregats is None or agregats['signature'] != signature:
+        return None
+    _agregats_finance = agregats
+    return agregats
+
+def _ajouter_aux_agregats(agregats, transactions):
+    for t in transactions:
+        agregats['nombre'] += 1
+        if _horodatage_transaction(t.get('date')) == _DATE_INVALIDE:
+            agregats['invalides'] += 1
+            continue
+        colonne = {'recette': 0, 'depense': 1}.get(t.get('type'))
+        if colonne is None:
+            continue
+        for periode, cle in (('jours', t['date'][:10]), ('mois', t['date'][:7])):
+            totaux = agregats[periode].setdefault(cle, [0.0, 0.0])
+            totaux[colonne] += t['montant']
+
+def _synchroniser_agregats_finance(finance_data, signature_precedente):
+    global _agregats_finance
+    signature = _signature_persistante_finance()
+    agregats = None
+    if finance_data is not None:
+        agregats = _agregats_correspondant(signature_precedente)
+        if agregats is not None and agregats['nombre'] > len(finance_data['transactions']):
+            agregats = None
+    os.makedirs(FINANCE_COLONNES_DIR, exist_ok=True)
+    if agregats is not None and agregats['ajouts'] < LIMITE_JOURNAL_AGREGATS:
+        ajout = {'nombre': 0, 'invalides': 0, 'jours': {}, 'mois': {}}
+        _ajouter_aux_agregats(ajout, finance_data['transactions'][agregats['nombre']:])
+        del ajout['mois']
+        ajout['depuis'], ajout['signature'] = agregats['signature'], signature
+        with open(FINANCE_AGREGATS_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(ajout) + '\n')
+        _fusionner_agregats(agregats, ajout)
+        agregats['signature'] = signature
+        agregats['ajouts'] += 1
+        _agregats_finance = agregats
+        return agregats
+    if agregats is None:
+        agregats = {'nombre': 0, 'invalides': 0, 'jours': {}, 'mois': {}}
+        _ajouter_aux_agregats(agregats, iterer_transactions() if finance_data is None else finance_data['transactions'])
+    else:
+        _ajouter_aux_agregats(agregats, finance_data['transactions'][agregats['nombre']:])
+        del agregats['ajouts']
+    agregats['signature'] = signature
+    # Le journal replié n'est retiré qu'après le remplacement : ses lignes ne suivent plus la nouvelle signature
+    os.replace(_ecrire_json_atomique(agregats, FINANCE_AGREGATS_FILE), FINANCE_AGREGATS_FILE)
+    try:
+        os.remove(FINANCE_AGREGATS_JOURNAL_FILE)
+    except FileNotFoundError:
+        pass
+    agregats['ajouts'] = 0
+    _agregats_finance = agregats
+    return agregats
+
+def reconstruire_agregats_finance():
+    with verrou_donnees():
+        return _synchroniser_agregats_finance(None, None)
+
+def _dernier_jour_du_mois(annee, mois):
+    # Par (année, mois) : le premier du mois + 32 jours dépasserait date.max en décembre 9999
+    if mois == 12:
+        return date(annee, 12, 31)
+    return date(annee, mois + 1, 1) - timedelta(days=1)
+
+def _totaux_finance_entre(date_debut, date_fin):
+    # Recettes et dépenses du date_debut au date_fin inclus : un total par mois complet,
+    # et un total par jour pour les mois coupés par les bornes
+    agregats = _agregats_correspondant(_signature_persistante_finance()) or reconstruire_agregats_finance()
+    recettes = 0.0
+    depenses = 0.0
+    if not agregats['mois']:
+        return recettes, depenses, agregats['invalides']
+    # Période ouverte (ex : jusqu'à DATE_MAX) : seuls les mois qui ont des transactions sont parcourus
+    premier, dernier = min(agregats['mois']), max(agregats['mois'])
+    date_debut = max(date_debut, date(int(premier[:4]), int(premier[5:]), 1))
+    date_fin = min(date_fin, _dernier_jour_du_mois(int(dernier[:4]), int(dernier[5:])))
+    mois = date(date_debut.year, date_debut.month, 1)
+    while mois <= date_fin:
+        dernier_jour = _dernier_jour_du_mois(mois.year, mois.month)
+        if date_debut <= mois and dernier_jour <= date_fin:
+            totaux = [agregats['mois'].get(f"{mois.year:04d}-{mois.month:02d}")]
+        else:
+            jour = max(mois, date_debut)
+            fin = min(dernier_jour, date_fin)
+            totaux = [agregats['jours'].get((jour + timedelta(days=i)).isoformat()) for i in range((fin - jour).days + 1)]
+        for total in totaux:
+            if total:
+                recettes += total[0]
+                depenses += total[1]
+        if dernier_jour >= date_fin:
+            break
+        mois = dernier_jour + timedelta(days=1)
+    return recettes, depenses, agregats['invalides']
+
+# --- Index trié des transactions par date ---
+# Dates (horodatages) triées et positions correspondantes dans la liste des transactions :
+# une période se trouve par recherche dichotomique au lieu d'un parcours complet.
+_index_dates_finance = None
+
+def _index_dates(transactions):
+    global _index_dates_finance
+    index = _index_dates_finance
+    if index is None or index['transactions'] is not transactions or index['nombre'] > len(transactions):
+        # Construction à partir de la colonne des dates : pas de strptime sur l'historique
+        with _colonnes_finance() as (meta, colonnes):
+            nombre = min(meta['nombre'], len(transactions))
+            dates = array('q')
+            dates.frombytes(colonnes['dates'][:nombre].cast('B'))
+        dates.extend(_horodatage_transaction(t.get('date')) for t in transactions[nombre:])
+        if meta['triees'] and all(dates[i - 1] <= dates[i] for i in range(max(nombre, 1), len(dates))):
+            positions = array('q', range(len(dates)))
+        else:
+            ordre = sorted(range(len(dates)), key=dates.__getitem__)
+            positions = array('q', ordre)
+            dates = array('q', (dates[i] for i in ordre))
+        index = {'transactions': transactions, 'nombre': len(transactions), 'dates': dates, 'positions': positions}
+        _index_dates_finance = index
+
+    # Transactions ajoutées depuis la construction : insertion à leur place
+    for position in range(index['nombre'], len(transactions)):
+        date_transaction = _horodatage_transaction(transactions[position].get('date'))
+        if not index['dates'] or date_transaction >= index['dates'][-1]:
+            index['dates'].append(date_transaction)
+            index['positions'].append(position)
+        else:
+            rang = bisect_right(index['dates'], date_transaction)
+            index['dates'].insert(rang, date_transaction)
+            index['positions'].insert(rang, position)
+    index['nombre'] = len(transactions)
+    return index
+
+def _horodatage_borne(valeur, fin_de_journee):
+    # Accepte 'AAAA-MM-JJ', un objet date (journée entière) ou un datetime (instant exact)
+    if isinstance(valeur, str):
+        jour = _analyser_date(valeur)
+        if jour is None:
+            raise ValueError(f"Date invalide : '{valeur}'. Format attendu : AAAA-MM-JJ.")
+        valeur = jour
+    if not isinstance(valeur, datetime):
+        valeur = datetime.combine(valeur, datetime.max.time() if fin_de_journee else datetime.min.time())
+    return int((valeur - _EPOCH).total_seconds())
+
+def transactions_entre(date_debut, date_fin):
+    # Transactions du date_debut au date_fin inclus, par date croissante (dates invalides exclues)
+    debut = _horodatage_borne(date_debut, False)
+    fin = _horodatage_borne(date_fin, True)
+    finance_data = _donnees_en_memoire(FINANCE_FILE)
+    if finance_data is None:
+        with _colonnes_finance() as (meta, colonnes):
+            if meta['triees']:
+                # Historique pas en mémoire et déjà dans l'ordre des dates : la période est cherchée par
+                # dichotomie dans la colonne des dates, puis seules ses lignes de transactions.jsonl sont lues
+                dates = colonnes['dates']
+                yield from _transactions_aux_rangs(colonnes, range(bisect_left(dates, debut), bisect_right(dates, fin)))
+                return
+        finance_data = charger_donnees(FINANCE_FILE)
+    transactions = finance_data['transactions']
+    index = _index_dates(transactions)
+    dates = index['dates']
+    positions = index['positions']
+    for rang in range(bisect_left(dates, debut), bisect_right(dates, fin)):
+        yield transactions[positions[rang]]
+
+# --- Index des collections par clé naturelle et par id ---
+# Les recherches insensibles à la casse se font en O(1) au lieu de parcourir la liste.
+# Un tuple de champs désigne une clé composée.
+CHAMPS_INDEXES = {
+    STOCK_FILE: ['nom'],
+    ANIMAUX_FILE: ['nom_id'],
+    CULTURES_FILE: ['nom_parcelle'],
+    OUVRIERS_FILE: ['id', 'nom'],
+    TACHES_FILE: ['id'],
+    EQUIPEMENTS_FILE: ['id', 'nom'],
+    FOURNISSEURS_CLIENTS_FILE: ['id', ('nom_entreprise', 'type_contact')],
+}
+# (fichier, champ) -> {'collection', 'index', 'taille', 'doublons'}
+_index_collections = {}
+
+def _valeur_index(valeur):
+    if isinstance(valeur, tuple):
+        return tuple(_valeur_index(v) for v in valeur)
+    return valeur.lower() if isinstance(valeur, str) else valeur
+
+def _cle_index(enregistrement, champ):
+    if isinstance(champ, tuple):
+        return tuple(_cle_index(enregistrement, c) for c in champ)
+    return _valeur_index(enregistrement.get(champ))
+
+def _index(fichier, collection, champ):
+    # L'index est reconstruit si la collection a été rechargée ou modifiée sans passer par _indexer/_desindexer
+    entree = _index_collections.get((fichier, champ))
+    if entree is None or entree['collection'] is not collection or entree['taille'] != len(collection):
+        index = {}
+        for enregistrement in collection:
+            index.setdefault(_cle_index(enregistrement, champ), enregistrement) # Le premier trouvé, comme un parcours
+        entree = {'collection': collection, 'index': index, 'taille': len(collection), 'doublons': len(index) != len(collection)}
+        _index_collections[(fichier, champ)] = entree
+    return entree['index']
+
+def _rechercher(fichier, collection, champ, valeur):
+    return _index(fichier, collection, champ).get(_valeur_index(valeur))
+
+def _cle_en_double(fichier, collection, champ):
+    # Plusieurs enregistrements ont la même valeur de 'champ' (anciennes données, fichier modifié à la main)
+    _index(fichier, collection, champ)
+    return _index_collections[(fichier, champ)]['doublons']
+
+# Index de regroupement : valeur d'un champ -> clés des enregistrements qui ont cette valeur
+# (ex : ouvrier -> ses tâches, type -> ses animaux), pour ne toucher que les enregistrements concernés.
+CHAMPS_GROUPES = {
+    ANIMAUX_FILE: ['type', 'sexe'],
+    CULTURES_FILE: ['statut'],
+    TACHES_FILE: ['ouvrier_assigne_id', 'statut'],
+    EQUIPEMENTS_FILE: ['etat'],
+    FOURNISSEURS_CLIENTS_FILE: ['type_contact'],
+}
+# Clé qui désigne un enregistrement dans les groupes ('id' pour les autres collections)
+CLES_PRIMAIRES = {
+    STOCK_FILE: 'nom',
+    ANIMAUX_FILE: 'nom_id',
+    CULTURES_FILE: 'nom_parcelle',
+}
+# (fichier, champ) -> {'collection', 'groupes', 'taille'}
+_groupes_collections = {}
+
+def _cle_primaire(fichier):
+    return CLES_PRIMAIRES.get(fichier, 'id')
+
+def _cle_tri(valeur):
+    # Valeurs absentes en dernier, textes sans tenir compte de la casse
+    return (valeur is None, valeur.lower() if isinstance(valeur, str) else valeur)
+
+def _groupes(fichier, collection, champ):
+    # Reconstruit dans les mêmes cas que _index. None si des enregistrements partagent leur clé :
+    # un groupe les confondrait, l'appelant parcourt alors la collection
+    if _cle_en_double(fichier, collection, _cle_primaire(fichier)):
+        _groupes_collections.pop((fichier, champ), None)
+        return None
+    entree = _groupes_collections.get((fichier, champ))
+    if entree is None or entree['collection'] is not collection or entree['taille'] != len(collection):
+        cle = _cle_primaire(fichier)
+        groupes = {}
+        for enregistrement in collection:
+            groupes.setdefault(_cle_index(enregistrement, champ), set()).add(_cle_index(enregistrement, cle))
+        entree = {'collection': collection, 'groupes': groupes, 'taille': len(collection)}
+        _groupes_collections[(fichier, champ)] = entree
+    return entree['groupes']
+
+def _rechercher_groupe(fichier, collection, champ, valeur):
+    # Enregistrements dont 'champ' vaut 'valeur', par clé croissante
+    groupes = _groupes(fichier, collection, champ)
+    valeur = _valeur_index(valeur)
+    cle = _cle_primaire(fichier)
+    if groupes is None:
+        return sorted((e for e in collection if _cle_index(e, champ) == valeur), key=lambda e: _cle_tri(e.get(cle)))
+    return [_rechercher(fichier, collection, cle, c) for c in sorted(groupes.get(valeur, ()), key=_cle_tri)]
+
+def _indexer(fichier, collection, enregistrement):
+    # À appeler juste après l'ajout de l'enregistrement dans la collection
+    for (f, champ), entree in _index_collections.items():
+        if f == fichier and entree['collection'] is collection:
+            cle = _cle_index(enregistrement, champ)
+            if cle in entree['index']:
+                entree['doublons'] = True
+                if champ == _cle_primaire(fichier): # Les groupes confondraient les deux : _groupes les refusera
+                    for groupe in [g for g in _groupes_collections if g[0] == fichier]:
+                        del _groupes_collections[groupe]
+            else:
+                entree['index'][cle] = enregistrement
+            entree['taille'] += 1
+    for (f, champ), entree in _groupes_collections.items():
+        if f == fichier and entree['collection'] is collection:
+            entree['groupes'].setdefault(_cle_index(enregistrement, champ), set()).add(_cle_index(enregistrement, _cle_primaire(fichier)))
+            entree['taille'] += 1
+    _maj_index_texte(fichier, collection, enregistrement, True)
+    _maj_alertes(fichier, collection, enregistrement, True)
+    _compter(fichier, enregistrement, 1)
+    _noter_modification_sqlite(fichier, collection, enregistrement, True)
+
+def _desindexer(fichier, collection, enregistrement):
+    # À appeler juste après le retrait de l'enregistrement de la collection
+    for (f, champ), entree in _index_collections.items():
+        if f == fichier and entree['collection'] is collection:
+            cle = _cle_index(enregistrement, champ)
+            if entree['index'].get(cle) is enregistrement:
+                del entree['index'][cle]
+            # Avec des doublons, un autre enregistrement de même clé doit reprendre la place : on reconstruira
+            entree['taille'] = -1 if entree['doublons'] else entree['taille'] - 1
+    for (f, champ), entree in _groupes_collections.items():
+        if f == fichier and entree['collection'] is collection:
+            cle = _cle_index(enregistrement, champ)
+            cles = entree['groupes'].get(cle)
+            if cles is not None:
+                cles.discard(_cle_index(enregistrement, _cle_primaire(fichier)))
+                if not cles:
+                    del entree['groupes'][cle]
+            entree['taille'] -= 1
+    _maj_index_texte(fichier, collection, enregistrement, False)
+    _maj_alertes(fichier, collection, enregistrement, False)
+    _compter(fichier, enregistrement, -1)
+    _noter_modification_sqlite(fichier, collection, enregistrement, False)
+
+@contextmanager
+def _modification_enregistrement(fichier, collection, enregistrement):
+    # Encadre toute modification d'un enregistrement (clé, date d'échéance, statut, quantité...) :
+    # ses entrées d'index et ses alertes sont retirées puis recalculées, et le stockage SQLite
+    # sait quelle ligne réécrire
+    _desindexer(fichier, collection, enregistrement)
+    try:
+        yield
+    finally:
+        _indexer(fichier, collection, enregistrement)
+
+def _retirer(fichier, collection, champ, valeur):
+    # Retire tous les enregistrements de clé 'valeur' (doublons compris) ; renvoie leur nombre
+    retires = 0
+    enregistrement = _rechercher(fichier, collection, champ, valeur)
+    while enregistrement is not None:
+        collection.remove(enregistrement)
+        _desindexer(fichier, collection, enregistrement)
+        retires += 1
+        enregistrement = _rechercher(fichier, collection, champ, valeur)
+    return retires
+
+# --- Séquences d'identifiants ---
+# Les ids des ouvriers, tâches, équipements et contacts viennent d'une séquence par collection,
+# écrite avec la collection dans la même unité de travail : un id supprimé n'est jamais réattribué.
+# La recherche par id passe par l'index 'id' de CHAMPS_INDEXES.
+# Les anciennes versions numérotaient avec len(collection) + 1 : après une suppression, deux
+# enregistrements pouvaient avoir le même id. Au lancement (migrer_ids_en_double, depuis le menu, la
+# ligne de commande et le serveur) et avant chaque attribution, chaque doublon reçoit un nouvel id
+# (le premier garde le sien) et les tâches de l'ouvrier renuméroté le suivent. Les renumérotations
+# sont renvoyées, jamais affichées ici : c'est le point d'entrée qui les signale.
+FICHIERS_A_ID = [OUVRIERS_FILE, TACHES_FILE, EQUIPEMENTS_FILE, FOURNISSEURS_CLIENTS_FILE]
+
+def _attribuer_id(fichier, collection, sequences):
+    dernier = sequences.get(fichier)
+    if dernier is None: # Première utilisation : on part du plus grand id existant
+        dernier = max((e['id'] for e in collection if isinstance(e.get('id'), int)), default=0)
+    dernier += 1
+    while _rechercher(fichier, collection, 'id', dernier) is not None: # Ids ajoutés hors de l'application
+        dernier += 1
+    sequences[fichier] = dernier
+    return dernier
+
+def _renumeroter_ids_en_double(fichier, collection, sequences):
+    # Dans une unité de travail ; la collection et les séquences sont à sauvegarder par l'appelant.
+    # Renvoie [(fichier, ancien id, nouvel id)]
+    vus = set()
+    renumerotes = []
+    for enregistrement in collection:
+        cle = _cle_index(enregistrement, 'id')
+        if cle is not None and cle not in vus:
+            vus.add(cle)
+            continue
+        ancien = enregistrement.get('id')
+        with _modification_enregistrement(fichier, collection, enregistrement):
+            enregistrement['id'] = _attribuer_id(fichier, collection, sequences)
+        renumerotes.append((enregistrement, ancien))
+    # Groupes et index texte désignent les enregistrements par id : ceux d'avant confondaient les doublons
+    for cle in [cle for cle in _groupes_collections if cle[0] == fichier]:
+        del _groupes_collections[cle]
+    _index_texte_collections.pop(fichier, None)
+
+    if fichier == OUVRIERS_FILE and renumerotes:
+        # Une tâche suit l'ouvrier renuméroté si elle porte aussi son nom ; sinon elle reste au premier
+        taches = charger_donnees(TACHES_FILE)
+        suivis = {(ancien, _valeur_index(ouvrier.get('nom'))): ouvrier['id'] for ouvrier, ancien in renumerotes}
+        modifiees = 0
+        for tache in taches:
+            nouvel_id = suivis.get((tache.get('ouvrier_assigne_id'), _valeur_index(tache.get('ouvrier_assigne'))))
+            if nouvel_id is not None:
+                with _modification_enregistrement(TACHES_FILE, taches, tache):
+                    tache['ouvrier_assigne_id'] = nouvel_id
+                modifiees += 1
+        if modifiees:
+            sauvegarder_donnees(taches, TACHES_FILE)
+    return [(fichier, ancien, enregistrement['id']) for enregistrement, ancien in renumerotes]
+
+def _prochain_id(fichier, collection):
+    # À appeler dans une unité de travail, juste avant l'ajout du nouvel enregistrement
+    sequences = charger_donnees(SEQUENCES_FILE) or {}
+    if _cle_en_double(fichier, collection, 'id'): # Fichier modifié hors de l'application depuis le lancement
+        _renumeroter_ids_en_double(fichier, collection, sequences)
+    nouvel_id = _attribuer_id(fichier, collection, sequences)
+    sauvegarder_donnees(sequences, SEQUENCES_FILE)
+    return nouvel_id
+
+@_operation_exclusive
+def migrer_ids_en_double():
+    # Renvoie [(fichier, ancien id, nouvel id)] des enregistrements renumérotés
+    renumerotes = []
+    with unite_de_travail():
+        sequences = charger_donnees(SEQUENCES_FILE) or {}
+        for fichier in FICHIERS_A_ID:
+            collection = charger_donnees(fichier)
+            if _cle_en_double(fichier, collection, 'id'):
+                renumerotes_fichier = _renumeroter_ids_en_double(fichier, collection, sequences)
+                if renumerotes_fichier:
+                    sauvegarder_donnees(collection, fichier)
+                    renumerotes.extend(renumerotes_fichier)
+        if renumerotes:
+            sauvegarder_donnees(sequences, SEQUENCES_FILE)
+    return renumerotes
+
+def afficher_ids_renumerotes(renumerotes):
+    for fichier, ancien, nouveau in renumerotes:
+        print(f"Identifiant en double dans '{fichier}' : l'ID {ancien} devient l'ID {nouveau}.")
+
+# --- Compteurs des collections ---
+# {fichier: {'total': n, champ: {valeur en minuscules: n}}}, tenus à jour par _indexer/_desindexer
+# (donc aussi par _modification_enregistrement) et écrits avec la sauvegarde suivante des données.
+CHAMPS_COMPTES = {
+    STOCK_FILE: [],
+    ANIMAUX_FILE: ['type'],
+    CULTURES_FILE: ['statut'],
+    OUVRIERS_FILE: [],
+    TACHES_FILE: ['statut'],
+    EQUIPEMENTS_FILE: [],
+    FOURNISSEURS_CLIENTS_FILE: ['type_contact'],
+}
+_compteurs_en_attente = None # Compteurs modifiés, pas encore écrits
+
+def _ajouter_au_compte(compte, champs, enregistrement, sens):
+    compte['total'] += sens
+    for champ in champs:
+        valeur = enregistrement.get(champ)
+        cle = '' if valeur is None else str(valeur).lower()
+        compte[champ][cle] = compte[champ].get(cle, 0) + sens
+        if compte[champ][cle] == 0:
+            del compte[champ][cle]
+
+def _compter(fichier, enregistrement, sens):
+    global _compteurs_en_attente
+    champs = CHAMPS_COMPTES.get(fichier)
+    if champs is None:
+        return
+    compteurs = charger_donnees(COMPTEURS_FILE)
+    if not compteurs or fichier not in compteurs:
+        return # Pas encore de compteurs : ils seront recomptés à la première lecture
+    _ajouter_au_compte(compteurs[fichier], champs, enregistrement, sens)
+    _compteurs_en_attente = compteurs
+
+@_operation_exclusive
+def recompter_statistiques():
+    # Reconstruit les compteurs à partir des collections (si un fichier a été modifié hors de l'application)
+    compteurs = {}
+    for fichier, champs in CHAMPS_COMPTES.items():
+        compteurs[fichier] = {'total': 0, **{champ: {} for champ in champs}}
+        for enregistrement in iterer_enregistrements(fichier):
+            _ajouter_au_compte(compteurs[fichier], champs, enregistrement, 1)
+    sauvegarder_donnees(compteurs, COMPTEURS_FILE)
+    return compteurs
+
+def _compteurs():
+    compteurs = charger_donnees(COMPTEURS_FILE)
+    if not compteurs or any(set(compteurs.get(f, {})) != {'total', *champs} for f, champs in CHAMPS_COMPTES.items()):
+        compteurs = recompter_statistiques()
+    return compteurs
+
+# --- Listes paginées, triées et filtrées ---
+# Une page est calculée à partir des index quand un filtre en a un (groupes ou clés), sinon par un
+# parcours de la collection en cache ; l'affichage écrit chaque page d'un seul coup sur la console.
+TAILLE_PAGE = 50 # Lignes affichées avant de demander la suite
+DATE_MIN = '1900-01-01' # Bornes des périodes ouvertes
+DATE_MAX = '9999-12-31'
+
+def _dans_periode(enregistrement, periode):
+    champ, debut, fin = periode
+    jour = _analyser_date(enregistrement.get(champ))
+    return jour is not None and (debut is None or jour >= debut) and (fin is None or jour <= fin)
+
+def _correspond(valeur_enregistrement, valeur):
+    # Les filtres venant de la ligne de commande ou d'une URL sont du texte : '3' désigne aussi l'id 3
+    return _valeur_index(valeur_enregistrement) == valeur or (isinstance(valeur, str) and str(valeur_enregistrement).lower() == valeur)
+
+def _valeur_indexee(valeur, present):
+    # Valeur à chercher dans un index : le texte '3' est pris comme l'entier 3 si c'est lui qui existe
+    if isinstance(valeur, str) and valeur.isdigit() and not present(valeur) and present(int(valeur)):
+        return int(valeur)
+    return valeur
+
+def _page(retenus, offset, limite, total):
+    fin = total if limite is None else offset + limite
+    return {'enregistrements': retenus[offset:fin] if offset or limite is not None else retenus,
+            'total': total, 'offset': offset, 'suivant': fin if fin < total else None}
+
+def _selection(fichier, filtres=None, periode=None, tri=None, decroissant=False, nombre=None):
+    # (enregistrements retenus dans l'ordre demandé, total) ; avec 'nombre', seuls les premiers sont triés
+    collection = charger_donnees(fichier)
+    filtres = dict(filtres or {})
+    candidats = collection
+    for champ in list(filtres): # Un filtre indexé remplace le parcours de toute la collection
+        if champ in CHAMPS_GROUPES.get(fichier, ()):
+            groupes = _groupes(fichier, collection, champ)
+            if groupes is None:
+                break # Clés en double : le filtre est appliqué par le parcours ci-dessous
+            valeur = _valeur_indexee(filtres.pop(champ), lambda v: _valeur_index(v) in groupes)
+            candidats = _rechercher_groupe(fichier, collection, champ, valeur)
+            break
+        if champ in CHAMPS_INDEXES.get(fichier, ()):
+            if _cle_en_double(fichier, collection, champ):
+                break # L'index ne garde que le premier enregistrement de chaque valeur
+            valeur = _valeur_indexee(filtres.pop(champ), lambda v: _rechercher(fichier, collection, champ, v) is not None)
+            trouve = _rechercher(fichier, collection, champ, valeur)
+            candidats = [trouve] if trouve is not None else []
+            break
+
+    criteres = [(champ, _valeur_index(valeur)) for champ, valeur in filtres.items()]
+    if periode is not None:
+        champ_date, debut, fin = periode
+        periode = (champ_date, _analyser_date(debut) if debut else None, _analyser_date(fin) if fin else None)
+    if criteres or periode is not None:
+        candidats = [e for e in candidats
+                     if all(_correspond(e.get(champ), valeur) for champ, valeur in criteres) and (periode is None or _dans_periode(e, periode))]
+
+    total = len(candidats)
+    if tri is not None:
+        cle = lambda e: _cle_tri(e.get(tri))
+        if nombre is not None:
+            choisir = heapq.nlargest if decroissant else heapq.nsmallest
+            candidats = choisir(nombre, candidats, key=cle)
+        else:
+            candidats = sorted(candidats, key=cle, reverse=decroissant)
+    elif decroissant:
+        candidats = candidats[::-1]
+    return candidats, total
+
+def lister_enregistrements(fichier, filtres=None, periode=None, tri=None, decroissant=False, offset=0, limite=None):
+    # filtres : {champ: valeur}, égalité insensible à la casse (ex : {'type': 'Poule', 'sexe': 'F'}) ;
+    # periode : (champ de date, début, fin) en AAAA-MM-JJ, bornes incluses, None = pas de borne ;
+    # tri : champ (None : ordre du fichier, ou de la clé si un index a servi).
+    # Renvoie {'enregistrements', 'total', 'offset', 'suivant'} ('suivant' : offset de la page suivante ou None).
+    # Pour une seule page ; un parcours de toutes les pages passe par _selection (voir _afficher_liste).
+    candidats, total = _selection(fichier, filtres, periode, tri, decroissant, None if limite is None else offset + limite)
+    return _page(candidats, offset, limite, total)
+
+def _transactions_selectionnees(type_transaction=None, date_debut=None, date_fin=None, infos=None):
+    # Lecture en continu, par date croissante pour une période. ValueError si une date est invalide.
+    # Sans période, 'infos' reçoit le solde si l'historique est parcouru jusqu'au bout (voir iterer_transactions).
+    if date_debut is None and date_fin is None:
+        source = iterer_transactions(infos)
+    else:
+        source = transactions_entre(date_debut or DATE_MIN, date_fin or DATE_MAX)
+    if type_transaction:
+        source = (t for t in source if t['type'] == type_transaction.lower())
+    return source
+
+def lister_transactions(type_transaction=None, date_debut=None, date_fin=None, decroissant=False, offset=0, limite=None, infos=None):
+    # Une page lue en continu (index des dates pour une période) : seule la page est gardée en mémoire.
+    # 'total' n'est pas connu sans tout parcourir : il vaut None. ValueError si une date est invalide.
+    source = _transactions_selectionnees(type_transaction, date_debut, date_fin, infos)
+    if decroissant:
+        # Les plus récentes d'abord : seules les offset + limite (+1) dernières sont gardées pendant le parcours
+        dernieres = list(source) if limite is None else list(deque(source, maxlen=offset + limite + 1))
+        dernieres.reverse()
+        page = dernieres[offset:] if limite is None else dernieres[offset:offset + limite + 1]
+    else:
+        page = list(islice(source, offset, None if limite is None else offset + limite + 1))
+    suivant = None
+    if limite is not None and len(page) > limite:
+        page = page[:limite]
+        suivant = offset + limite
+    return {'enregistrements': page, 'total': None, 'offset': offset, 'suivant': suivant}
+
+def _ecrire_tableau(lignes):
+    # Une seule écriture par page au lieu d'un print() par ligne
+    sys.stdout.write('\n'.join(lignes) + '\n')
+
+def _afficher_pages(titre, entete, largeur, enregistrements, formater, message_vide, total=None):
+    # Parcourt 'enregistrements' une seule fois, TAILLE_PAGE lignes à la fois ; en mode interactif,
+    # la suite est demandée entre les pages
+    enregistrements = iter(enregistrements)
+    page = list(islice(enregistrements, TAILLE_PAGE))
+    if not page:
+        print(message_vide)
+        return
+    lignes = [f"\n--- {titre} ---", entete, "-" * largeur]
+    affichees = 0
+    while True:
+        lignes.extend(formater(e) for e in page)
+        affichees += len(page)
+        page = list(islice(enregistrements, TAILLE_PAGE))
+        if not page:
+            break
+        _ecrire_tableau(lignes)
+        lignes = []
+        if sys.stdin.isatty():
+            sur = f" sur {total}" if total is not None else ""
+            if input(f"-- {affichees} ligne(s) affichée(s){sur} : Entrée pour la suite, 'q' pour arrêter : ").strip().lower() == 'q':
+                break
+    lignes.append("-" * largeur)
+    _ecrire_tableau(lignes)
+
+def _afficher_liste(fichier, titre, entete, largeur, formater, message_vide, filtres=None, periode=None, tri=None, decroissant=False):
+    # Sélection et tri une seule fois pour toutes les pages
+    enregistrements, total = _selection(fichier, filtres, periode, tri, decroissant)
+    _afficher_pages(titre, entete, largeur, enregistrements, formater, message_vide, total)
+
+# --- Recherche plein texte ---
+# Index inversé mot -> enregistrements, sans accents ni majuscules ('Maïs' se trouve avec 'mais').
+# Une requête est une suite de mots qui doivent tous être présents ; un mot terminé par '*' est un
+# préfixe ('engr*' trouve 'engrais'). Les collections sont indexées par clé (CLES_PRIMAIRES), tenues
+# à jour par _indexer/_desindexer ; les transactions par position dans l'historique, complétées à
+# chaque écriture financière (_apres_ecriture_finance) et construites à partir de la colonne des descriptions.
+CHAMPS_TEXTE = {
+    FOURNISSEURS_CLIENTS_FILE: ['nom_entreprise', 'notes', 'adresse'],
+    TACHES_FILE: ['nom', 'description'],
+    CULTURES_FILE: ['type_culture'],
+}
+# Domaine de recherche -> fichier
+DOMAINES_RECHERCHE = {
+    'contacts': FOURNISSEURS_CLIENTS_FILE,
+    'transactions': FINANCE_FILE,
+    'taches': TACHES_FILE,
+    'cultures': CULTURES_FILE,
+}
+# fichier -> {'collection', 'termes': {mot: set de clés}, 'vocabulaire': mots triés, 'taille'}
+_index_texte_collections = {}
+# {'signature', 'nombre', 'termes': {mot: array de positions}, 'vocabulaire'} ; None tant qu'aucune recherche
+_index_texte_finance = None
+
+_MOT = re.compile(r'\w+')
+
+def _mots(texte):
+    if not isinstance(texte, str):
+        return set()
+    texte = texte.lower()
+    if not texte.isascii():
+        import unicodedata # Seulement pour les textes accentués
+        texte = unicodedata.normalize('NFKD', texte.replace('œ', 'oe').replace('æ', 'ae'))
+        texte = ''.join(c for c in texte if not unicodedata.combining(c))
+    return set(_MOT.findall(texte))
+
+def _mots_enregistrement(fichier, enregistrement):
+    mots = set()
+    for champ in CHAMPS_TEXTE[fichier]:
+        mots |= _mots(enregistrement.get(champ))
+    return mots
+
+def _ajouter_mot(index, mot, valeur, nouvelle_liste):
+    postes = index['termes'].get(mot)
+    if postes is None:
+        postes = index['termes'][mot] = nouvelle_liste()
+        if index['vocabulaire'] is not None: # None pendant une construction : trié une seule fois à la fin
+            insort(index['vocabulaire'], mot)
+    if isinstance(postes, set):
+        postes.add(valeur)
+    else:
+        postes.append(valeur)
+
+def _index_texte(fichier, collection):
+    # Reconstruit dans les mêmes cas que _index
+    entree = _index_texte_collections.get(fichier)
+    if entree is None or entree['collection'] is not collection or entree['taille'] != len(collection):
+        cle = _cle_primaire(fichier)
+        entree = {'collection': collection, 'termes': {}, 'vocabulaire': [], 'taille': len(collection)}
+        for enregistrement in collection:
+            for mot in _mots_enregistrement(fichier, enregistrement):
+                entree['termes'].setdefault(mot, set()).add(_cle_index(enregistrement, cle))
+        entree['vocabulaire'] = sorted(entree['termes'])
+        _index_texte_collections[fichier] = entree
+    return entree
+
+def _maj_index_texte(fichier, collection, enregistrement, present):
+    entree = _index_texte_collections.get(fichier)
+    if entree is None or entree['collection'] is not collection:
+        return
+    cle = _cle_index(enregistrement, _cle_primaire(fichier))
+    for mot in _mots_enregistrement(fichier, enregistrement):
+        if present:
+            _ajouter_mot(entree, mot, cle, set)
+            continue
+        postes = entree['termes'].get(mot)
+        if postes is not None:
+            postes.discard(cle)
+            if not postes:
+                del entree['termes'][mot]
+                del entree['vocabulaire'][bisect_left(entree['vocabulaire'], mot)]
+    entree['taille'] += 1 if present else -1
+
+def _ajouter_a_l_index_finance(index, descriptions):
+    for description in descriptions:
+        for mot in _mots(description):
+            _ajouter_mot(index, mot, index['nombre'], lambda: array('q'))
+        index['nombre'] += 1
+
+def _index_finance():
+    global _index_texte_finance
+    index = _index_texte_finance
+    if index is None or index['signature'] != _signature_persistante_finance():
+        # Construction à partir de la colonne des descriptions (une ligne JSON par transaction) :
+        # pas de lecture de tout l'historique
+        meta = _meta_colonnes_finance()
+        index = {'signature': meta['signature'], 'nombre': 0, 'termes': {}, 'vocabulaire': None}
+        with open(_chemin_colonne_finance('descriptions.txt'), 'r', encoding='utf-8') as f:
+            _ajouter_a_l_index_finance(index, (json.loads(ligne) for ligne in islice(f, meta['nombre'])))
+        index['vocabulaire'] = sorted(index['termes'])
+        _index_texte_finance = index
+    return index
+
+def _synchroniser_index_texte_finance(finance_data, signature_precedente):
+    global _index_texte_finance
+    index = _index_texte_finance
+    if index is None:
+        return # Construit à la première recherche
+    if finance_data is None or index['signature'] != signature_precedente or index['nombre'] > len(finance_data['transactions']):
+        _index_texte_finance = None
+        return
+    _ajouter_a_l_index_finance(index, (t.get('description') for t in finance_data['transactions'][index['nombre']:]))
+    index['signature'] = _signature_persistante_finance()
+
+def _analyser_requete(requete):
+    # [(mot, est_un_prefixe)] ; les accents et majuscules de la requête sont ignorés comme ceux des données
+    termes = []
+    for morceau in (requete or '').split():
+        prefixe = morceau.endswith('*')
+        termes.extend((mot, prefixe) for mot in sorted(_mots(morceau)))
+    return termes
+
+def _correspondances(index, termes):
+    # Clés ou positions qui contiennent tous les termes, en commençant par le plus rare
+    ensembles = []
+    for mot, prefixe in termes:
+        if prefixe:
+            vocabulaire = index['vocabulaire']
+            debut = bisect_left(vocabulaire, mot)
+            fin = bisect_left(vocabulaire, mot + '\U0010ffff')
+            ensembles.append([index['termes'][v] for v in vocabulaire[debut:fin]])
+        else:
+            ensembles.append([index['termes'][mot]] if mot in index['termes'] else [])
+    ensembles.sort(key=lambda postes: sum(len(p) for p in postes))
+    resultat = set().union(*ensembles[0])
+    for postes in ensembles[1:]:
+        if not resultat:
+            break
+        resultat = resultat.intersection(chain.from_iterable(postes))
+    return resultat
+
+def _transactions_aux_positions(positions):
+    if not positions:
+        return []
+    finance_data = _donnees_en_memoire(FINANCE_FILE)
+    if finance_data is not None:
+        transactions = finance_data['transactions']
+        return [transactions[p] for p in positions]
+    # Historique pas en mémoire : seules les transactions trouvées sont lues dans transactions.jsonl
+    with _colonnes_finance() as (_, colonnes):
+        return list(_transactions_aux_rangs(colonnes, positions))
+
+def rechercher_texte(requete, domaines=None, limite=None):
+    # Renvoie {domaine: [enregistrements]} pour les domaines de DOMAINES_RECHERCHE (tous par défaut) :
+    # contacts, tâches et cultures par clé croissante, transactions de la plus récente à la plus ancienne.
+    termes = _analyser_requete(requete)
+    if not termes:
+        print("Veuillez saisir au moins un mot à rechercher.")
+        return False
+    domaines = list(DOMAINES_RECHERCHE) if not domaines else domaines
+    inconnus = [d for d in domaines if d not in DOMAINES_RECHERCHE]
+    if inconnus:
+        print(f"Domaine de recherche inconnu : '{inconnus[0]}'. Domaines possibles : {', '.join(DOMAINES_RECHERCHE)}.")
+        return False
+
+    resultats = {}
+    for domaine in domaines:
+        fichier = DOMAINES_RECHERCHE[domaine]
+        if fichier == FINANCE_FILE:
+            positions = sorted(_correspondances(_index_finance(), termes), reverse=True)[:limite]
+            resultats[domaine] = _transactions_aux_positions(positions)
+            continue
+        collection = charger_donnees(fichier)
+        cles = sorted(_correspondances(_index_texte(fichier, collection), termes), key=_cle_tri)[:limite]
+        resultats[domaine] = [_rechercher(fichier, collection, _cle_primaire(fichier), c) for c in cles]
+    return resultats
+
+def afficher_resultats_recherche(requete, domaines=None, limite=None):
+    # Au plus TAILLE_PAGE résultats par domaine, sauf limite explicite
+    resultats = rechercher_texte(requete, domaines, TAILLE_PAGE if limite is None else limite)
+    if resultats is False:
+        return False
+    if not any(resultats.values()):
+        print(f"Aucun résultat pour '{requete}'.")
+        return resultats
+    lignes = []
+    for domaine, enregistrements in resultats.items():
+        if not enregistrements:
+            continue
+        lignes.append(f"\n--- {domaine.capitalize()} ({len(enregistrements)}) ---")
+        for e in enregistrements:
+            if domaine == 'contacts':
+                lignes.append(_ligne_contact(e))
+            elif domaine == 'transactions':
+                lignes.append(f"{e['date']:<20} {e['type'].capitalize():<10} {e['montant']:<15,.2f} {e.get('description', ''):<35}")
+            elif domaine == 'taches':
+                lignes.append(f"{e.get('id', 'N/A'):<5} {e.get('nom', 'N/A'):<25} {e.get('date_limite', 'N/A'):<12} {e.get('statut', 'N/A'):<12} {e.get('description') or '':<35}")
+            else:
+                lignes.append(_ligne_culture(e))
+    _ecrire_tableau(lignes)
+    return resultats
 
 # --- Initialisation des fichiers (Assure que les fichiers existent au démarrage) ---
 def initialiser_fichiers_donnees():
+    if not os.path.exists(CATEGORIES_DEPENSES_FILE):
+        with open(CATEGORIES_DEPENSES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(CATEGORIES_DEPENSES_PAR_DEFAUT, f, indent=4, ensure_ascii=False)
+
+    if BACKEND_STOCKAGE == 'sqlite':
+        _connexion_sqlite() # Crée les tables et index si besoin
+        afficher_ids_renumerotes(migrer_ids_en_double())
+        migrer_historiques_maintenance()
+        print(f"Base de données '{SQLITE_FILE}' vérifiée/initialisée.")
+        return
+
     files_to_check = [STOCK_FILE, ANIMAUX_FILE, CULTURES_FILE, OUVRIERS_FILE, TACHES_FILE, EQUIPEMENTS_FILE, FOURNISSEURS_CLIENTS_FILE]
     for file_path in files_to_check:
         if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
@@ -38,147 +1819,243 @@ def initialiser_fichiers_donnees():
     if not os.path.exists(FINANCE_FILE) or os.path.getsize(FINANCE_FILE) == 0:
         with open(FINANCE_FILE, 'w', encoding='utf-8') as f:
             json.dump({'transactions': [], 'solde': 0.0}, f, indent=4)
+    afficher_ids_renumerotes(migrer_ids_en_double()) # Avant les historiques : leurs opérations reprennent l'id de l'équipement
+    migrer_historiques_maintenance() # Anciens historiques imbriqués dans equipements.json
     print("Fichiers de données vérifiés/initialisés.")
 
 
 # --- Fonctions de gestion de stock ---
+@_operation_exclusive
 def ajouter_modifier_article(nom_article, quantite, seuil_alerte):
     stocks = charger_donnees(STOCK_FILE)
-    trouve = False
-    for article in stocks:
-        if article['nom'].lower() == nom_article.lower():
+    article = _rechercher(STOCK_FILE, stocks, 'nom', nom_article)
+    if article is not None:
+        with _modification_enregistrement(STOCK_FILE, stocks, article):
             article['quantite'] = quantite
             article['seuil_alerte'] = seuil_alerte
-            trouve = True
-            break
-    if not trouve:
-        stocks.append({"nom": nom_article, "quantite": quantite, "seuil_alerte": seuil_alerte})
+    else:
+        article = {"nom": nom_article, "quantite": quantite, "seuil_alerte": seuil_alerte}
+        stocks.append(article)
+        _indexer(STOCK_FILE, stocks, article)
     sauvegarder_donnees(stocks, STOCK_FILE)
     print(f"Article '{nom_article}' mis à jour ou ajouté.")
 
 def get_stock_quantite(nom_article):
     stocks = charger_donnees(STOCK_FILE)
-    for article in stocks:
-        if article['nom'].lower() == nom_article.lower():
-            return article['quantite']
-    return None
+    article = _rechercher(STOCK_FILE, stocks, 'nom', nom_article)
+    return article['quantite'] if article is not None else None
 
-def afficher_stocks():
-    stocks = charger_donnees(STOCK_FILE)
-    if not stocks:
-        print("Aucun article en stock pour le moment.")
-        return
-    print("\n--- État Actuel du Stock ---")
-    print(f"{'Nom de l\'article':<25} {'Quantité':<10} {'Seuil Alerte':<15}")
-    print("-" * 50)
-    for article in stocks:
-        print(f"{article['nom']:<25} {article['quantite']:<10} {article['seuil_alerte']:<15}")
-    print("-" * 50)
+def afficher_stocks(filtres=None, tri=None, decroissant=False):
+    _afficher_liste(STOCK_FILE, "État Actuel du Stock", f"""{"Nom de l'article":<25} {'Quantité':<10} {'Seuil Alerte':<15}""", 50,
+                    lambda article: f"{article['nom']:<25} {article['quantite']:<10} {article['seuil_alerte']:<15}",
+                    "Aucun article en stock pour le moment.", filtres, None, tri, decroissant)
 
 def afficher_alertes_stock():
+    # Seuls les articles sous leur seuil sont consultés (voir _etat_alertes)
     stocks = charger_donnees(STOCK_FILE)
     alertes = []
-    for article in stocks:
-        if article['quantite'] <= article['seuil_alerte']:
+    for cle in _etat_alertes()['stock']:
+        article = _rechercher(STOCK_FILE, stocks, 'nom', cle)
+        if article is not None and _article_en_alerte(article):
             alertes.append(f"ALERTE STOCK : Le stock de '{article['nom']}' est de {article['quantite']} (seuil: {article['seuil_alerte']}).")
     return alertes
 
 # --- Fonctions de gestion financière ---
-def enregistrer_transaction(type_transaction, montant, description):
-    finance_data = charger_donnees(FINANCE_FILE)
-    date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    transaction = {
-        'date': date_str,
+def _nouvelle_transaction(type_transaction, montant, description):
+    return {
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         'type': type_transaction, # 'recette' ou 'depense'
         'montant': montant,
         'description': description
     }
-    finance_data['transactions'].append(transaction)
-    if type_transaction == 'recette':
-        finance_data['solde'] += montant
-    elif type_transaction == 'depense':
-        finance_data['solde'] -= montant
-    sauvegarder_donnees(finance_data, FINANCE_FILE)
+
+@_operation_exclusive
+def enregistrer_transaction(type_transaction, montant, description):
+    finance_data = charger_donnees(FINANCE_FILE)
+    transaction = _nouvelle_transaction(type_transaction, montant, description)
+    _appliquer_transaction(finance_data, transaction)
+    _journaliser_transaction(finance_data, transaction)
     print(f"Transaction '{type_transaction}' de {montant:,.2f} XOF enregistrée. Nouveau solde : {finance_data['solde']:,.2f} XOF.")
 
 def get_solde_actuel():
     finance_data = charger_donnees(FINANCE_FILE)
     return finance_data['solde']
 
-def afficher_transactions_financieres():
-    finance_data = charger_donnees(FINANCE_FILE)
-    transactions = finance_data['transactions']
-    if not transactions:
-        print("Aucune transaction enregistrée pour le moment.")
-        return
-    
-    print("\n--- Historique des Transactions Financières ---")
-    print(f"{'Date':<20} {'Type':<10} {'Montant (XOF)':<15} {'Description':<35}")
-    print("-" * 80)
-    for t in transactions:
-        print(f"{t['date']:<20} {t['type'].capitalize():<10} {t['montant']:<15,.2f} {t['description']:<35}")
-    print("-" * 80)
-    print(f"Solde Actuel : {finance_data['solde']:,.2f} XOF")
+def _solde_en_continu(infos=None):
+    # Solde relevé par un parcours complet déjà fait ('infos'), sinon celui des données en cache ;
+    # à défaut, lu au fil de l'historique sans le garder en cache (voir iterer_transactions)
+    if infos is not None and 'solde' in infos:
+        return infos['solde']
+    if _donnees_en_memoire(FINANCE_FILE) is not None:
+        return get_solde_actuel()
+    infos = {}
+    deque(iterer_transactions(infos), maxlen=0)
+    return infos['solde']
+
+def afficher_transactions_financieres(type_transaction=None, date_debut=None, date_fin=None, decroissant=False):
+    # Affichage page par page au fil d'une seule lecture : dans l'ordre chronologique, l'historique
+    # n'est jamais chargé en entier (l'ordre décroissant doit d'abord tout lire)
+    infos = {}
+    try:
+        transactions = _transactions_selectionnees(type_transaction, date_debut, date_fin, infos)
+        if decroissant:
+            transactions = reversed(list(transactions))
+        _afficher_pages("Historique des Transactions Financières", f"{'Date':<20} {'Type':<10} {'Montant (XOF)':<15} {'Description':<35}", 80,
+                        transactions, lambda t: f"{t['date']:<20} {t['type'].capitalize():<10} {t['montant']:<15,.2f} {t['description']:<35}",
+                        "Aucune transaction enregistrée pour le moment.")
+    except ValueError as e:
+        print(f"Erreur : {e}")
+        return False
+    print(f"Solde Actuel : {_solde_en_continu(infos):,.2f} XOF")
 
 # --- Fonctions d'intégration Ventes/Achats ---
+@_operation_exclusive
 def enregistrer_vente(nom_article, quantite_vendue, prix_unitaire, client_nom=None):
     stocks = charger_donnees(STOCK_FILE)
-    article_trouve = False
     montant_total = quantite_vendue * prix_unitaire
 
-    for article in stocks:
-        if article['nom'].lower() == nom_article.lower():
-            article_trouve = True
-            if article['quantite'] >= quantite_vendue:
-                article['quantite'] -= quantite_vendue
-                sauvegarder_donnees(stocks, STOCK_FILE)
-                description = f"Vente de {quantite_vendue} '{nom_article}'"
-                if client_nom:
-                    description += f" à {client_nom}"
-                enregistrer_transaction('recette', montant_total, description)
-                return True
-            else:
-                print(f"Erreur : Quantité insuffisante en stock pour '{nom_article}'. Stock actuel: {article['quantite']}.")
-                return False
-    
-    if not article_trouve:
+    article = _rechercher(STOCK_FILE, stocks, 'nom', nom_article)
+    if article is None:
         print(f"Erreur : Article '{nom_article}' non trouvé dans le stock. Veuillez l'ajouter d'abord si c'est un nouvel article.")
         return False
-    return False
+    if article['quantite'] < quantite_vendue:
+        print(f"Erreur : Quantité insuffisante en stock pour '{nom_article}'. Stock actuel: {article['quantite']}.")
+        return False
 
-def enregistrer_achat(nom_article, quantite_achetee, prix_unitaire, est_nouvel_article=False, seuil_alerte=5, fournisseur_nom=None):
-    stocks = charger_donnees(STOCK_FILE)
-    article_trouve = False
-    montant_total = quantite_achetee * prix_unitaire
+    with unite_de_travail(): # stock.json et la recette sont écrits ensemble
+        with _modification_enregistrement(STOCK_FILE, stocks, article):
+            article['quantite'] -= quantite_vendue
+        sauvegarder_donnees(stocks, STOCK_FILE)
+        enregistrer_transaction('recette', montant_total, _description_mouvement(True, nom_article, quantite_vendue, client_nom))
+    return True
 
-    for article in stocks:
-        if article['nom'].lower() == nom_article.lower():
-            article['quantite'] += quantite_achetee
+@_operation_exclusive
+def enregistrer_achat(nom_article, quantite_achetee, prix_unitaire, est_nouvel_article=False, seuil_alerte=5, fournisseur_nom=None):
+    with unite_de_travail(): # stock.json et la dépense sont écrits ensemble
+        stocks = charger_donnees(STOCK_FILE)
+        montant_total = quantite_achetee * prix_unitaire
+
+        article = _rechercher(STOCK_FILE, stocks, 'nom', nom_article)
+        article_trouve = article is not None
+        if article_trouve:
+            with _modification_enregistrement(STOCK_FILE, stocks, article):
+                article['quantite'] += quantite_achetee
+        
+        if not article_trouve and est_nouvel_article:
+            article = {"nom": nom_article, "quantite": quantite_achetee, "seuil_alerte": seuil_alerte}
+            stocks.append(article)
+            _indexer(STOCK_FILE, stocks, article)
+            print(f"Nouvel article '{nom_article}' ajouté au stock avec {quantite_achetee} unités.")
             article_trouve = True
-            break
-    
-    if not article_trouve and est_nouvel_article:
-        stocks.append({"nom": nom_article, "quantite": quantite_achetee, "seuil_alerte": seuil_alerte})
-        print(f"Nouvel article '{nom_article}' ajouté au stock avec {quantite_achetee} unités.")
-        article_trouve = True
-    elif not article_trouve and not est_nouvel_article:
-        print(f"Avertissement : Article '{nom_article}' non trouvé dans le stock existant. Pour l'ajouter, utilisez l'option 'Nouvel article'. L'achat sera quand même enregistré financièrement.")
-    
-    sauvegarder_donnees(stocks, STOCK_FILE)
-    description = f"Achat de {quantite_achetee} '{nom_article}'"
-    if fournisseur_nom:
-        description += f" de {fournisseur_nom}"
-    enregistrer_transaction('depense', montant_total, description)
+        elif not article_trouve and not est_nouvel_article:
+            print(f"Avertissement : Article '{nom_article}' non trouvé dans le stock existant. Pour l'ajouter, utilisez l'option 'Nouvel article'. L'achat sera quand même enregistré financièrement.")
+        
+        sauvegarder_donnees(stocks, STOCK_FILE)
+        enregistrer_transaction('depense', montant_total, _description_mouvement(False, nom_article, quantite_achetee, fournisseur_nom))
     return True
 
+def _description_mouvement(vente, nom_article, quantite, tiers):
+    if vente:
+        return f"Vente de {quantite} '{nom_article}'" + (f" à {tiers}" if tiers else "")
+    return f"Achat de {quantite} '{nom_article}'" + (f" de {tiers}" if tiers else "")
+
+# --- Ventes et achats par lots (jours de marché) ---
+# Toutes les lignes sont vérifiées avant la moindre écriture, puis stock.json et les transactions
+# sont écrits une seule fois. Rien n'est affiché : chaque ligne reçoit un résultat
+# {'ligne', 'article', 'quantite', 'prix_unitaire', 'tiers', 'montant', 'ok', 'message'}.
+def _est_nombre(valeur):
+    return isinstance(valeur, (int, float)) and not isinstance(valeur, bool)
+
+def _verifier_lot(stocks, lignes, vente):
+    # Renvoie (résultats, {id(article): [article, quantité après le lot]})
+    resultats = []
+    quantites = {}
+    for numero, ligne in enumerate(lignes, 1):
+        try:
+            nom_article, quantite, prix_unitaire, tiers = (list(ligne) + [None])[:4]
+        except (TypeError, ValueError):
+            resultats.append({'ligne': numero, 'article': None, 'quantite': None, 'prix_unitaire': None, 'tiers': None, 'montant': 0.0, 'ok': False,
+                              'message': "Ligne invalide : (article, quantité, prix unitaire, client/fournisseur) attendu."})
+            continue
+        resultat = {'ligne': numero, 'article': nom_article, 'quantite': quantite, 'prix_unitaire': prix_unitaire, 'tiers': tiers, 'montant': 0.0, 'ok': False, 'message': None}
+        resultats.append(resultat)
+        if not _est_nombre(quantite) or quantite <= 0:
+            resultat['message'] = f"Quantité invalide : {quantite!r}."
+            continue
+        if not _est_nombre(prix_unitaire) or prix_unitaire < 0:
+            resultat['message'] = f"Prix unitaire invalide : {prix_unitaire!r}."
+            continue
+
+        article = _rechercher(STOCK_FILE, stocks, 'nom', nom_article)
+        if article is not None:
+            disponible = quantites.setdefault(id(article), [article, article['quantite']])
+            if vente and disponible[1] < quantite:
+                resultat['message'] = f"Quantité insuffisante en stock pour '{nom_article}'. Stock disponible : {disponible[1]}."
+                continue
+            disponible[1] += -quantite if vente else quantite
+        elif vente:
+            resultat['message'] = f"Article '{nom_article}' non trouvé dans le stock."
+            continue
+        else:
+            resultat['message'] = f"Article '{nom_article}' non trouvé dans le stock : l'achat est enregistré financièrement seulement."
+        resultat['ok'] = True
+        resultat['montant'] = quantite * prix_unitaire
+    return resultats, quantites
+
+def _enregistrer_lot(lignes, vente):
+    with unite_de_travail():
+        stocks = charger_donnees(STOCK_FILE)
+        resultats, quantites = _verifier_lot(stocks, lignes, vente)
+
+        stock_modifie = False
+        for article, quantite in quantites.values():
+            if article['quantite'] != quantite:
+                with _modification_enregistrement(STOCK_FILE, stocks, article):
+                    article['quantite'] = quantite
+                stock_modifie = True
+        if stock_modifie:
+            sauvegarder_donnees(stocks, STOCK_FILE)
+
+        acceptes = [r for r in resultats if r['ok']]
+        if acceptes:
+            finance_data = charger_donnees(FINANCE_FILE)
+            for r in acceptes:
+                transaction = _nouvelle_transaction('recette' if vente else 'depense', r['montant'], _description_mouvement(vente, r['article'], r['quantite'], r['tiers']))
+                _appliquer_transaction(finance_data, transaction)
+                _journaliser_transaction(finance_data, transaction) # Journal écrit une fois, à la fin de l'unité
+    return resultats
+
+@_operation_exclusive
+def enregistrer_ventes_lot(ventes):
+    # ventes : [(article, quantité, prix unitaire, client ou None), ...]
+    return _enregistrer_lot(ventes, True)
+
+@_operation_exclusive
+def enregistrer_achats_lot(achats):
+    # achats : [(article, quantité, prix unitaire, fournisseur ou None), ...] ; les articles absents ne sont pas créés
+    return _enregistrer_lot(achats, False)
+
 # --- Fonctions de GESTION DES ANIMAUX ---
+@_operation_exclusive
 def ajouter_animal(nom_id, type_animal, date_naissance, sexe, etat_sante="Bon", date_prochain_vaccin=None, date_prochain_vermifuge=None):
+    dates = _valider_dates(('date_naissance',), date_naissance=date_naissance, date_prochain_vaccin=date_prochain_vaccin, date_prochain_vermifuge=date_prochain_vermifuge)
+    if dates is None:
+        return False
+    date_naissance, date_prochain_vaccin, date_prochain_vermifuge = dates.values()
     animaux = charger_donnees(ANIMAUX_FILE)
-    if any(animal['nom_id'].lower() == nom_id.lower() for animal in animaux):
+    if _rechercher(ANIMAUX_FILE, animaux, 'nom_id', nom_id) is not None:
         print(f"Erreur : Un animal avec l'ID '{nom_id}' existe déjà.")
         return False
     
-    animal = {
+    animal = _nouvel_animal(nom_id, type_animal, date_naissance, sexe, etat_sante, date_prochain_vaccin, date_prochain_vermifuge)
+    animaux.append(animal)
+    _indexer(ANIMAUX_FILE, animaux, animal)
+    sauvegarder_donnees(animaux, ANIMAUX_FILE)
+    print(f"Animal '{nom_id}' ({type_animal}) ajouté avec succès.")
+    return True
+
+def _nouvel_animal(nom_id, type_animal, date_naissance, sexe, etat_sante, date_prochain_vaccin, date_prochain_vermifuge):
+    return {
         'nom_id': nom_id,
         'type': type_animal,
         'date_naissance': date_naissance, # Format AAAA-MM-JJ
@@ -188,55 +2065,50 @@ def ajouter_animal(nom_id, type_animal, date_naissance, sexe, etat_sante="Bon",
         'date_prochain_vermifuge': date_prochain_vermifuge, # Ajouté pour les alertes
         'date_ajout': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
-    animaux.append(animal)
-    sauvegarder_donnees(animaux, ANIMAUX_FILE)
-    print(f"Animal '{nom_id}' ({type_animal}) ajouté avec succès.")
-    return True
 
-def afficher_animaux():
-    animaux = charger_donnees(ANIMAUX_FILE)
-    if not animaux:
-        print("Aucun animal enregistré pour le moment.")
-        return
-    
-    print("\n--- Liste des Animaux ---")
-    print(f"{'ID':<15} {'Type':<15} {'Naissance':<12} {'Sexe':<8} {'Santé':<15} {'Prochain Vaccin':<18} {'Prochain Vermifuge':<20}")
-    print("-" * 110)
-    for animal in animaux:
-        vaccin_date = animal.get('date_prochain_vaccin', 'N/A')
-        vermifuge_date = animal.get('date_prochain_vermifuge', 'N/A')
-        print(f"{animal.get('nom_id', 'N/A'):<15} {animal.get('type', 'N/A'):<15} {animal.get('date_naissance', 'N/A'):<12} {animal.get('sexe', 'N/A'):<8} {animal.get('etat_sante', 'N/A'):<15} {vaccin_date:<18} {vermifuge_date:<20}")
-    print("-" * 110)
+def _ligne_animal(animal):
+    vaccin_date = animal.get('date_prochain_vaccin') or 'N/A'
+    vermifuge_date = animal.get('date_prochain_vermifuge') or 'N/A'
+    return f"{animal.get('nom_id', 'N/A'):<15} {animal.get('type', 'N/A'):<15} {animal.get('date_naissance', 'N/A'):<12} {animal.get('sexe', 'N/A'):<8} {animal.get('etat_sante', 'N/A'):<15} {vaccin_date:<18} {vermifuge_date:<20}"
+
+def afficher_animaux(filtres=None, periode=None, tri=None, decroissant=False):
+    # Ex : afficher_animaux({'type': 'Poule', 'sexe': 'F'}, ('date_naissance', '2024-01-01', None), tri='nom_id')
+    _afficher_liste(ANIMAUX_FILE, "Liste des Animaux",
+                    f"{'ID':<15} {'Type':<15} {'Naissance':<12} {'Sexe':<8} {'Santé':<15} {'Prochain Vaccin':<18} {'Prochain Vermifuge':<20}", 110,
+                    _ligne_animal, "Aucun animal enregistré pour le moment.", filtres, periode, tri, decroissant)
 
 
+@_operation_exclusive
 def modifier_animal(nom_id, nouveau_type=None, nouvelle_date_naissance=None, nouveau_sexe=None, nouvel_etat_sante=None, nouvelle_date_prochain_vaccin=None, nouvelle_date_prochain_vermifuge=None):
+    dates = _valider_dates(date_naissance=nouvelle_date_naissance, date_prochain_vaccin=nouvelle_date_prochain_vaccin, date_prochain_vermifuge=nouvelle_date_prochain_vermifuge)
+    if dates is None:
+        return False
+    nouvelle_date_naissance, nouvelle_date_prochain_vaccin, nouvelle_date_prochain_vermifuge = dates.values()
     animaux = charger_donnees(ANIMAUX_FILE)
-    trouve = False
-    for animal in animaux:
-        if animal['nom_id'].lower() == nom_id.lower():
-            if nouveau_type: animal['type'] = nouveau_type
-            if nouvelle_date_naissance: animal['date_naissance'] = nouvelle_date_naissance
-            if nouveau_sexe: animal['sexe'] = nouveau_sexe
-            if nouvel_etat_sante: animal['etat_sante'] = nouvel_etat_sante
-            if nouvelle_date_prochain_vaccin is not None: animal['date_prochain_vaccin'] = nouvelle_date_prochain_vaccin
-            if nouvelle_date_prochain_vermifuge is not None: animal['date_prochain_vermifuge'] = nouvelle_date_prochain_vermifuge
-            trouve = True
-            break
-    
-    if trouve:
-        sauvegarder_donnees(animaux, ANIMAUX_FILE)
-        print(f"Animal '{nom_id}' mis à jour avec succès.")
-        return True
-    else:
+    animal = _rechercher(ANIMAUX_FILE, animaux, 'nom_id', nom_id)
+    if animal is None:
         print(f"Erreur : Animal avec l'ID '{nom_id}' non trouvé.")
         return False
 
+    with _modification_enregistrement(ANIMAUX_FILE, animaux, animal):
+        if nouveau_type: animal['type'] = nouveau_type
+        if nouvelle_date_naissance: animal['date_naissance'] = nouvelle_date_naissance
+        if nouveau_sexe: animal['sexe'] = nouveau_sexe
+        if nouvel_etat_sante: animal['etat_sante'] = nouvel_etat_sante
+        if nouvelle_date_prochain_vaccin is not None: animal['date_prochain_vaccin'] = nouvelle_date_prochain_vaccin
+        if nouvelle_date_prochain_vermifuge is not None: animal['date_prochain_vermifuge'] = nouvelle_date_prochain_vermifuge
+    sauvegarder_donnees(animaux, ANIMAUX_FILE)
+    print(f"Animal '{nom_id}' mis à jour avec succès.")
+    return True
+
+@_operation_exclusive
 def supprimer_animal(nom_id):
     animaux = charger_donnees(ANIMAUX_FILE)
-    animaux_avant = len(animaux)
-    animaux = [animal for animal in animaux if animal['nom_id'].lower() != nom_id.lower()]
+    animal = _rechercher(ANIMAUX_FILE, animaux, 'nom_id', nom_id)
     
-    if len(animaux) < animaux_avant:
+    if animal is not None:
+        animaux.remove(animal)
+        _desindexer(ANIMAUX_FILE, animaux, animal)
         sauvegarder_donnees(animaux, ANIMAUX_FILE)
         print(f"Animal '{nom_id}' supprimé avec succès.")
         return True
@@ -245,13 +2117,26 @@ def supprimer_animal(nom_id):
         return False
 
 # --- Fonctions de GESTION DES CULTURES ---
+@_operation_exclusive
 def ajouter_culture(nom_parcelle, type_culture, date_semis, date_recolte_estimee=None, statut="En croissance", surface_ou_quantite=None, unite="m²"):
+    dates = _valider_dates(('date_semis',), date_semis=date_semis, date_recolte_estimee=date_recolte_estimee)
+    if dates is None:
+        return False
+    date_semis, date_recolte_estimee = dates.values()
     cultures = charger_donnees(CULTURES_FILE)
-    if any(culture['nom_parcelle'].lower() == nom_parcelle.lower() for culture in cultures):
+    if _rechercher(CULTURES_FILE, cultures, 'nom_parcelle', nom_parcelle) is not None:
         print(f"Erreur : Une culture avec le nom de parcelle '{nom_parcelle}' existe déjà.")
         return False
     
-    culture = {
+    culture = _nouvelle_culture(nom_parcelle, type_culture, date_semis, date_recolte_estimee, statut, surface_ou_quantite, unite)
+    cultures.append(culture)
+    _indexer(CULTURES_FILE, cultures, culture)
+    sauvegarder_donnees(cultures, CULTURES_FILE)
+    print(f"Culture '{nom_parcelle}' ({type_culture}) ajoutée avec succès.")
+    return True
+
+def _nouvelle_culture(nom_parcelle, type_culture, date_semis, date_recolte_estimee, statut, surface_ou_quantite, unite):
+    return {
         'nom_parcelle': nom_parcelle,
         'type_culture': type_culture,
         'date_semis': date_semis, # Format AAAA-MM-JJ
@@ -261,53 +2146,47 @@ def ajouter_culture(nom_parcelle, type_culture, date_semis, date_recolte_estimee
         'unite': unite, # Ex: "m²", "hectares", "plants"
         'date_ajout': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
-    cultures.append(culture)
-    sauvegarder_donnees(cultures, CULTURES_FILE)
-    print(f"Culture '{nom_parcelle}' ({type_culture}) ajoutée avec succès.")
-    return True
 
-def afficher_cultures():
-    cultures = charger_donnees(CULTURES_FILE)
-    if not cultures:
-        print("Aucune culture enregistrée pour le moment.")
-        return
-    
-    print("\n--- Liste des Cultures ---")
-    print(f"{'Parcelle':<20} {'Type':<15} {'Semis':<12} {'Récolte Est.':<15} {'Statut':<15} {'Quantité/Surface':<20}")
-    print("-" * 100)
-    for culture in cultures:
-        q_s = f"{culture.get('surface_ou_quantite', 'N/A')} {culture.get('unite', '')}" if culture.get('surface_ou_quantite') is not None else "N/A"
-        print(f"{culture.get('nom_parcelle', 'N/A'):<20} {culture.get('type_culture', 'N/A'):<15} {culture.get('date_semis', 'N/A'):<12} {culture.get('date_recolte_estimee', 'N/A'):<15} {culture.get('statut', 'N/A'):<15} {q_s:<20}")
-    print("-" * 100)
+def _ligne_culture(culture):
+    q_s = f"{culture.get('surface_ou_quantite', 'N/A')} {culture.get('unite', '')}" if culture.get('surface_ou_quantite') is not None else "N/A"
+    return f"{culture.get('nom_parcelle', 'N/A'):<20} {culture.get('type_culture', 'N/A'):<15} {culture.get('date_semis', 'N/A'):<12} {culture.get('date_recolte_estimee') or 'N/A':<15} {culture.get('statut', 'N/A'):<15} {q_s:<20}"
+
+def afficher_cultures(filtres=None, periode=None, tri=None, decroissant=False):
+    _afficher_liste(CULTURES_FILE, "Liste des Cultures",
+                    f"{'Parcelle':<20} {'Type':<15} {'Semis':<12} {'Récolte Est.':<15} {'Statut':<15} {'Quantité/Surface':<20}", 100,
+                    _ligne_culture, "Aucune culture enregistrée pour le moment.", filtres, periode, tri, decroissant)
 
+@_operation_exclusive
 def modifier_culture(nom_parcelle, nouveau_type=None, nouvelle_date_semis=None, nouvelle_date_recolte_estimee=None, nouveau_statut=None, nouvelle_surface_ou_quantite=None, nouvelle_unite=None):
+    dates = _valider_dates(date_semis=nouvelle_date_semis, date_recolte_estimee=nouvelle_date_recolte_estimee)
+    if dates is None:
+        return False
+    nouvelle_date_semis, nouvelle_date_recolte_estimee = dates.values()
     cultures = charger_donnees(CULTURES_FILE)
-    trouve = False
-    for culture in cultures:
-        if culture['nom_parcelle'].lower() == nom_parcelle.lower():
-            if nouveau_type: culture['type_culture'] = nouveau_type
-            if nouvelle_date_semis: culture['date_semis'] = nouvelle_date_semis
-            if nouvelle_date_recolte_estimee: culture['date_recolte_estimee'] = nouvelle_date_recolte_estimee
-            if nouveau_statut: culture['statut'] = nouveau_statut
-            if nouvelle_surface_ou_quantite is not None: culture['surface_ou_quantite'] = nouvelle_surface_ou_quantite
-            if nouvelle_unite: culture['unite'] = nouvelle_unite
-            trouve = True
-            break
-    
-    if trouve:
-        sauvegarder_donnees(cultures, CULTURES_FILE)
-        print(f"Culture '{nom_parcelle}' mise à jour avec succès.")
-        return True
-    else:
+    culture = _rechercher(CULTURES_FILE, cultures, 'nom_parcelle', nom_parcelle)
+    if culture is None:
         print(f"Erreur : Culture avec le nom de parcelle '{nom_parcelle}' non trouvée.")
         return False
 
+    with _modification_enregistrement(CULTURES_FILE, cultures, culture):
+        if nouveau_type: culture['type_culture'] = nouveau_type
+        if nouvelle_date_semis: culture['date_semis'] = nouvelle_date_semis
+        if nouvelle_date_recolte_estimee: culture['date_recolte_estimee'] = nouvelle_date_recolte_estimee
+        if nouveau_statut: culture['statut'] = nouveau_statut
+        if nouvelle_surface_ou_quantite is not None: culture['surface_ou_quantite'] = nouvelle_surface_ou_quantite
+        if nouvelle_unite: culture['unite'] = nouvelle_unite
+    sauvegarder_donnees(cultures, CULTURES_FILE)
+    print(f"Culture '{nom_parcelle}' mise à jour avec succès.")
+    return True
+
+@_operation_exclusive
 def supprimer_culture(nom_parcelle):
     cultures = charger_donnees(CULTURES_FILE)
-    cultures_avant = len(cultures)
-    cultures = [culture for culture in cultures if culture['nom_parcelle'].lower() != nom_parcelle.lower()]
+    culture = _rechercher(CULTURES_FILE, cultures, 'nom_parcelle', nom_parcelle)
     
-    if len(cultures) < cultures_avant:
+    if culture is not None:
+        cultures.remove(culture)
+        _desindexer(CULTURES_FILE, cultures, culture)
         sauvegarder_donnees(cultures, CULTURES_FILE)
         print(f"Culture '{nom_parcelle}' supprimée avec succès.")
         return True
@@ -316,121 +2195,131 @@ def supprimer_culture(nom_parcelle):
         return False
 
 # --- Fonctions de GESTION DES OUVRIERS ET TACHES ---
+@_operation_exclusive
 def ajouter_ouvrier(nom, contact, role):
     ouvriers = charger_donnees(OUVRIERS_FILE)
-    if any(o['nom'].lower() == nom.lower() for o in ouvriers):
+    if _rechercher(OUVRIERS_FILE, ouvriers, 'nom', nom) is not None:
         print(f"Erreur : Un ouvrier avec le nom '{nom}' existe déjà.")
         return False
     
-    ouvrier = {
-        'id': len(ouvriers) + 1, # Simple ID auto-incrémenté
-        'nom': nom,
-        'contact': contact,
-        'role': role,
-        'date_embauche': datetime.now().strftime("%Y-%m-%d")
-    }
-    ouvriers.append(ouvrier)
-    sauvegarder_donnees(ouvriers, OUVRIERS_FILE)
+    with unite_de_travail(): # L'ouvrier et la séquence des ids sont écrits ensemble
+        ouvrier = {
+            'id': _prochain_id(OUVRIERS_FILE, ouvriers),
+            'nom': nom,
+            'contact': contact,
+            'role': role,
+            'date_embauche': datetime.now().strftime("%Y-%m-%d")
+        }
+        ouvriers.append(ouvrier)
+        _indexer(OUVRIERS_FILE, ouvriers, ouvrier)
+        sauvegarder_donnees(ouvriers, OUVRIERS_FILE)
     print(f"Ouvrier '{nom}' ajouté avec succès (ID: {ouvrier['id']}).")
     return True
 
-def afficher_ouvriers():
-    ouvriers = charger_donnees(OUVRIERS_FILE)
-    if not ouvriers:
-        print("Aucun ouvrier enregistré pour le moment.")
-        return
-    
-    print("\n--- Liste des Ouvriers ---")
-    print(f"{'ID':<5} {'Nom':<20} {'Contact':<20} {'Rôle':<15} {'Embauche':<12}")
-    print("-" * 75)
-    for ouvrier in ouvriers:
-        print(f"{ouvrier.get('id', 'N/A'):<5} {ouvrier.get('nom', 'N/A'):<20} {ouvrier.get('contact', 'N/A'):<20} {ouvrier.get('role', 'N/A'):<15} {ouvrier.get('date_embauche', 'N/A'):<12}")
-    print("-" * 75)
+def afficher_ouvriers(filtres=None, tri=None, decroissant=False):
+    _afficher_liste(OUVRIERS_FILE, "Liste des Ouvriers", f"{'ID':<5} {'Nom':<20} {'Contact':<20} {'Rôle':<15} {'Embauche':<12}", 75,
+                    lambda ouvrier: f"{ouvrier.get('id', 'N/A'):<5} {ouvrier.get('nom', 'N/A'):<20} {ouvrier.get('contact', 'N/A'):<20} {ouvrier.get('role', 'N/A'):<15} {ouvrier.get('date_embauche', 'N/A'):<12}",
+                    "Aucun ouvrier enregistré pour le moment.", filtres, None, tri, decroissant)
 
+@_operation_exclusive
 def supprimer_ouvrier(ouvrier_id):
     ouvriers = charger_donnees(OUVRIERS_FILE)
-    ouvriers_avant = len(ouvriers)
-    ouvriers = [o for o in ouvriers if o['id'] != ouvrier_id]
-    
-    if len(ouvriers) < ouvriers_avant:
-        sauvegarder_donnees(ouvriers, OUVRIERS_FILE)
-        # Gérer les tâches de l'ouvrier supprimé (les désassigner ou les supprimer)
-        taches = charger_donnees(TACHES_FILE)
-        for tache in taches:
-            if tache.get('ouvrier_assigne_id') == ouvrier_id:
-                tache['ouvrier_assigne'] = 'Non assigné' # Désassigner la tâche
-                tache['ouvrier_assigne_id'] = None
-        sauvegarder_donnees(taches, TACHES_FILE)
+    if _retirer(OUVRIERS_FILE, ouvriers, 'id', ouvrier_id):
+        with unite_de_travail(): # L'ouvrier et ses tâches sont écrits ensemble
+            sauvegarder_donnees(ouvriers, OUVRIERS_FILE)
+            # Désassigner les tâches de l'ouvrier supprimé : seules les siennes sont parcourues
+            taches = charger_donnees(TACHES_FILE)
+            taches_ouvrier = _rechercher_groupe(TACHES_FILE, taches, 'ouvrier_assigne_id', ouvrier_id)
+            for tache in taches_ouvrier:
+                with _modification_enregistrement(TACHES_FILE, taches, tache):
+                    tache['ouvrier_assigne'] = 'Non assigné'
+                    tache['ouvrier_assigne_id'] = None
+            if taches_ouvrier:
+                sauvegarder_donnees(taches, TACHES_FILE)
         print(f"Ouvrier avec l'ID '{ouvrier_id}' supprimé avec succès. Les tâches lui étant assignées ont été désassignées.")
         return True
     else:
         print(f"Erreur : Ouvrier avec l'ID '{ouvrier_id}' non trouvé.")
         return False
 
+@_operation_exclusive
 def ajouter_tache(nom_tache, description, date_limite, ouvrier_assigne_id=None):
+    dates = _valider_dates(('date_limite',), date_limite=date_limite)
+    if dates is None:
+        return False
+    date_limite = dates['date_limite']
     taches = charger_donnees(TACHES_FILE)
     ouvriers = charger_donnees(OUVRIERS_FILE)
     
     ouvrier_nom = "Non assigné"
     if ouvrier_assigne_id:
-        ouvrier_trouve = next((o for o in ouvriers if o['id'] == ouvrier_assigne_id), None)
+        ouvrier_trouve = _rechercher(OUVRIERS_FILE, ouvriers, 'id', ouvrier_assigne_id)
         if ouvrier_trouve:
             ouvrier_nom = ouvrier_trouve['nom']
         else:
             print(f"Avertissement : Ouvrier avec l'ID {ouvrier_assigne_id} non trouvé. La tâche sera ajoutée sans ouvrier assigné.")
             ouvrier_assigne_id = None # Ne pas assigner si l'ID est invalide
 
-    tache = {
-        'id': len(taches) + 1, # ID auto-incrémenté
-        'nom': nom_tache,
-        'description': description,
-        'date_limite': date_limite, # Format AAAA-MM-JJ
-        'statut': 'En cours', # 'En cours', 'Terminée', 'Annulée'
-        'ouvrier_assigne': ouvrier_nom,
-        'ouvrier_assigne_id': ouvrier_assigne_id,
-        'date_creation': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    taches.append(tache)
-    sauvegarder_donnees(taches, TACHES_FILE)
+    with unite_de_travail():
+        tache = {
+            'id': _prochain_id(TACHES_FILE, taches),
+            'nom': nom_tache,
+            'description': description,
+            'date_limite': date_limite, # Format AAAA-MM-JJ
+            'statut': 'En cours', # 'En cours', 'Terminée', 'Annulée'
+            'ouvrier_assigne': ouvrier_nom,
+            'ouvrier_assigne_id': ouvrier_assigne_id,
+            'date_creation': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        taches.append(tache)
+        _indexer(TACHES_FILE, taches, tache)
+        sauvegarder_donnees(taches, TACHES_FILE)
     print(f"Tâche '{nom_tache}' ajoutée avec succès (ID: {tache['id']}).")
     return True
 
-def afficher_taches():
+def afficher_taches(filtres=None, periode=None, tri=None, decroissant=False):
+    _afficher_liste(TACHES_FILE, "Liste des Tâches", f"{'ID':<5} {'Nom Tâche':<25} {'Date Limite':<12} {'Statut':<12} {'Assigné à':<20}", 80,
+                    lambda tache: f"{tache.get('id', 'N/A'):<5} {tache.get('nom', 'N/A'):<25} {tache.get('date_limite', 'N/A'):<12} {tache.get('statut', 'N/A'):<12} {tache.get('ouvrier_assigne', 'N/A'):<20}",
+                    "Aucune tâche enregistrée pour le moment.", filtres, periode, tri, decroissant)
+
+def lister_taches_ouvrier(ouvrier_id, statut=None):
+    # Tâches assignées à l'ouvrier (éventuellement d'un seul statut), lues dans les index de regroupement
     taches = charger_donnees(TACHES_FILE)
-    if not taches:
-        print("Aucune tâche enregistrée pour le moment.")
-        return
-    
-    print("\n--- Liste des Tâches ---")
-    print(f"{'ID':<5} {'Nom Tâche':<25} {'Date Limite':<12} {'Statut':<12} {'Assigné à':<20}")
-    print("-" * 80)
-    for tache in taches:
-        print(f"{tache.get('id', 'N/A'):<5} {tache.get('nom', 'N/A'):<25} {tache.get('date_limite', 'N/A'):<12} {tache.get('statut', 'N/A'):<12} {tache.get('ouvrier_assigne', 'N/A'):<20}")
-    print("-" * 80)
+    resultat = _rechercher_groupe(TACHES_FILE, taches, 'ouvrier_assigne_id', ouvrier_id)
+    if statut is not None:
+        # Statut lu sur chaque tâche de l'ouvrier (pas par leurs ids, qui peuvent être en double)
+        resultat = [tache for tache in resultat if _valeur_index(tache.get('statut')) == _valeur_index(statut)]
+    return resultat
+
+def afficher_taches_ouvrier(ouvrier_id, statut=None):
+    ouvrier = _rechercher(OUVRIERS_FILE, charger_donnees(OUVRIERS_FILE), 'id', ouvrier_id)
+    if ouvrier is None:
+        print(f"Erreur : Ouvrier avec l'ID '{ouvrier_id}' non trouvé.")
+        return False
+    taches = lister_taches_ouvrier(ouvrier_id, statut)
+    _afficher_pages(f"Tâches de {ouvrier['nom']}", f"{'ID':<5} {'Nom Tâche':<25} {'Date Limite':<12} {'Statut':<12}", 60, taches,
+                    lambda tache: f"{tache.get('id', 'N/A'):<5} {tache.get('nom', 'N/A'):<25} {tache.get('date_limite', 'N/A'):<12} {tache.get('statut', 'N/A'):<12}",
+                    f"Aucune tâche assignée à '{ouvrier['nom']}'" + (f" avec le statut '{statut}'." if statut else "."), len(taches))
+    return True
 
+@_operation_exclusive
 def modifier_statut_tache(tache_id, nouveau_statut):
     taches = charger_donnees(TACHES_FILE)
-    trouve = False
-    for tache in taches:
-        if tache['id'] == tache_id:
-            tache['statut'] = nouveau_statut
-            trouve = True
-            break
-    
-    if trouve:
-        sauvegarder_donnees(taches, TACHES_FILE)
-        print(f"Statut de la tâche '{tache_id}' mis à jour à '{nouveau_statut}'.")
-        return True
-    else:
+    tache = _rechercher(TACHES_FILE, taches, 'id', tache_id)
+    if tache is None:
         print(f"Erreur : Tâche avec l'ID '{tache_id}' non trouvée.")
         return False
 
+    with _modification_enregistrement(TACHES_FILE, taches, tache):
+        tache['statut'] = nouveau_statut
+    sauvegarder_donnees(taches, TACHES_FILE)
+    print(f"Statut de la tâche '{tache_id}' mis à jour à '{nouveau_statut}'.")
+    return True
+
+@_operation_exclusive
 def supprimer_tache(tache_id):
     taches = charger_donnees(TACHES_FILE)
-    taches_avant = len(taches)
-    taches = [t for t in taches if t['id'] != tache_id]
-    
-    if len(taches) < taches_avant:
+    if _retirer(TACHES_FILE, taches, 'id', tache_id):
         sauvegarder_donnees(taches, TACHES_FILE)
         print(f"Tâche avec l'ID '{tache_id}' supprimée avec succès.")
         return True
@@ -438,81 +2327,252 @@ def supprimer_tache(tache_id):
         print(f"Erreur : Tâche avec l'ID '{tache_id}' non trouvée.")
         return False
 
-# --- Fonctions de RAPPORTS ET ANALYSES ---
-def generer_rapport_profits_pertes(date_debut_str, date_fin_str):
-    finance_data = charger_donnees(FINANCE_FILE)
-    transactions = finance_data['transactions']
-
+# --- Import en masse (fichiers CSV ou JSON Lines) ---
+# Le fichier est lu ligne à ligne ; chaque ligne est validée puis ajoutée en mémoire, et le fichier de
+# données n'est écrit qu'une fois à la fin (une seule unité de travail). Les doublons sont détectés
+# par l'index des clés (ou, pour les transactions, un ensemble des transactions déjà connues).
+def _lignes_import(chemin):
+    # (numéro de ligne, {colonne: valeur}) ; None à la place du dict si la ligne JSON est illisible
+    with open(chemin, 'r', encoding='utf-8-sig', newline='') as f:
+        if chemin.lower().endswith('.csv'):
+            import csv
+            echantillon = f.read(4096)
+            f.seek(0)
+            try:
+                dialecte = csv.Sniffer().sniff(echantillon, delimiters=',;\t') # ';' pour les tableurs en français
+            except csv.Error:
+                dialecte = csv.excel
+            lecteur = csv.DictReader(f, dialect=dialecte)
+            for ligne in lecteur:
+                yield lecteur.line_num, {cle.strip(): (valeur or '').strip() for cle, valeur in ligne.items() if isinstance(cle, str)}
+        else:
+            for numero, texte in enumerate(f, 1):
+                if not texte.strip():
+                    continue
+                try:
+                    yield numero, json.loads(texte)
+                except ValueError:
+                    yield numero, None
+
+def _texte_importe(ligne, champ, defaut=None):
+    valeur = ligne.get(champ)
+    if valeur is None or valeur == '':
+        return defaut
+    return str(valeur).strip()
+
+def _champ_obligatoire(ligne, champ):
+    valeur = _texte_importe(ligne, champ)
+    if valeur is None:
+        raise ValueError(f"Champ '{champ}' manquant.")
+    return valeur
+
+def _nombre_importe(ligne, champ, convertir, defaut=None, obligatoire=False):
+    valeur = _champ_obligatoire(ligne, champ) if obligatoire else _texte_importe(ligne, champ)
+    if valeur is None:
+        return defaut
     try:
-        date_debut = datetime.strptime(date_debut_str, "%Y-%m-%d")
-        date_fin = datetime.strptime(date_fin_str, "%Y-%m-%d").replace(hour=23, minute=59, second=59) # Inclure toute la journée de fin
+        return convertir(valeur.replace(',', '.') if convertir is float else valeur) # Virgule décimale acceptée
     except ValueError:
-        print("Format de date invalide. Veuillez utiliser AAAA-MM-JJ.")
+        raise ValueError(f"Nombre invalide pour '{champ}' : '{valeur}'.")
+
+def _animal_importe(ligne):
+    dates = _normaliser_dates(('date_naissance',), {champ: _texte_importe(ligne, champ) for champ in ('date_naissance', 'date_prochain_vaccin', 'date_prochain_vermifuge')})
+    return _nouvel_animal(_champ_obligatoire(ligne, 'nom_id'), _champ_obligatoire(ligne, 'type'), dates['date_naissance'], _texte_importe(ligne, 'sexe'),
+                          _texte_importe(ligne, 'etat_sante', "Bon"), dates['date_prochain_vaccin'], dates['date_prochain_vermifuge'])
+
+def _culture_importee(ligne):
+    dates = _normaliser_dates(('date_semis',), {champ: _texte_importe(ligne, champ) for champ in ('date_semis', 'date_recolte_estimee')})
+    return _nouvelle_culture(_champ_obligatoire(ligne, 'nom_parcelle'), _champ_obligatoire(ligne, 'type_culture'), dates['date_semis'], dates['date_recolte_estimee'],
+                             _texte_importe(ligne, 'statut', "En croissance"), _nombre_importe(ligne, 'surface_ou_quantite', float), _texte_importe(ligne, 'unite', "m²"))
+
+def _article_importe(ligne):
+    return {"nom": _champ_obligatoire(ligne, 'nom'), "quantite": _nombre_importe(ligne, 'quantite', int, obligatoire=True), "seuil_alerte": _nombre_importe(ligne, 'seuil_alerte', int, 5)}
+
+def _transaction_importee(ligne):
+    type_transaction = _champ_obligatoire(ligne, 'type').lower().replace('é', 'e')
+    if type_transaction not in CODES_TYPE_TRANSACTION:
+        raise ValueError(f"Type '{type_transaction}' inconnu : 'recette' ou 'depense' attendu.")
+    montant = _nombre_importe(ligne, 'montant', float, obligatoire=True)
+    if montant <= 0:
+        raise ValueError(f"Montant invalide : {montant} (un montant positif est attendu).")
+    date_str = _champ_obligatoire(ligne, 'date')
+    if len(date_str) == 10:
+        date_str += " 00:00:00" # Relevé bancaire : jour seulement
+    if _horodatage_transaction(date_str) == _DATE_INVALIDE:
+        raise ValueError(f"Date invalide : '{date_str}'. Utilisez AAAA-MM-JJ ou AAAA-MM-JJ HH:MM:SS.")
+    return {'date': date_str, 'type': type_transaction, 'montant': montant, 'description': _texte_importe(ligne, 'description', '')}
+
+def _cle_transaction(transaction):
+    return (transaction.get('date'), transaction.get('type'), transaction.get('montant'), transaction.get('description'))
+
+# genre -> (fichier, champ clé (None : transactions), conversion d'une ligne en enregistrement)
+IMPORTS = {
+    'animaux': (ANIMAUX_FILE, 'nom_id', _animal_importe),
+    'cultures': (CULTURES_FILE, 'nom_parcelle', _culture_importee),
+    'stock': (STOCK_FILE, 'nom', _article_importe),
+    'transactions': (FINANCE_FILE, None, _transaction_importee),
+}
+
+@_operation_exclusive
+def importer_donnees(genre, chemin):
+    # Renvoie {'importes': nombre, 'rejets': [(numéro de ligne, raison)]}, ou None si le fichier est illisible.
+    # Une transaction est rejetée si elle est déjà enregistrée (autant de fois que dans les données : deux frais
+    # identiques le même jour restent deux lignes) ; un article déjà en stock reçoit la quantité importée en plus ;
+    # un animal ou une culture déjà connu est rejeté.
+    import csv # Seulement pour l'import (csv.Error est attrapé aussi pour les fichiers JSON Lines)
+    fichier, champ_cle, convertir = IMPORTS[genre]
+    resultat = {'importes': 0, 'rejets': []}
+    try:
+        with unite_de_travail():
+            donnees = charger_donnees(fichier)
+            if champ_cle is None:
+                connues = Counter(_cle_transaction(t) for t in donnees['transactions'])
+            for numero, ligne in _lignes_import(chemin):
+                try:
+                    if not isinstance(ligne, dict):
+                        raise ValueError("Ligne illisible : un objet JSON est attendu.")
+                    enregistrement = convertir(ligne)
+                    existant = None
+                    if champ_cle is None:
+                        cle = _cle_transaction(enregistrement)
+                        if connues[cle] > 0:
+                            connues[cle] -= 1 # Chaque transaction enregistrée n'écarte qu'une seule ligne
+                            raise ValueError("Transaction déjà enregistrée.")
+                    else:
+                        existant = _rechercher(fichier, donnees, champ_cle, enregistrement[champ_cle])
+                        if existant is not None and fichier != STOCK_FILE:
+                            raise ValueError(f"'{enregistrement[champ_cle]}' existe déjà.")
+                except ValueError as e:
+                    resultat['rejets'].append((numero, str(e)))
+                    continue
+
+                if champ_cle is None:
+                    _appliquer_transaction(donnees, enregistrement)
+                    _journaliser_transaction(donnees, enregistrement) # Lignes de journal écrites à la fin de l'unité
+                elif existant is not None:
+                    with _modification_enregistrement(fichier, donnees, existant):
+                        existant['quantite'] += enregistrement['quantite'] # Le seuil de l'article est conservé
+                else:
+                    donnees.append(enregistrement)
+                    _indexer(fichier, donnees, enregistrement) # Les lignes suivantes voient cette clé
+                resultat['importes'] += 1
+            if resultat['importes'] and champ_cle is not None:
+                sauvegarder_donnees(donnees, fichier)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        print(f"Erreur : Impossible de lire le fichier '{chemin}' : {e}")
+        return None
+    return resultat
+
+def _afficher_resultat_import(resultat):
+    if resultat is None:
         return
+    print(f"{resultat['importes']} ligne(s) importée(s), {len(resultat['rejets'])} ligne(s) rejetée(s).")
+    for numero, raison in resultat['rejets']:
+        print(f"   - Ligne {numero} : {raison}")
+
+def _importer_depuis_menu(genre, colonnes):
+    chemin = input(f"Chemin du fichier CSV ou JSONL (colonnes : {colonnes}) : ").strip()
+    _afficher_resultat_import(importer_donnees(genre, chemin))
+
+# --- Catégorisation des dépenses ---
+# Règles de CATEGORIES_DEPENSES_FILE : {catégorie: [mots-clés]}, la première catégorie qui correspond l'emporte.
+# Elles sont compilées en une seule expression régulière ; le résultat est mémorisé par description.
+CATEGORIE_DEPENSE_PAR_DEFAUT = "Autres Dépenses"
+CATEGORIES_DEPENSES_PAR_DEFAUT = {
+    "Achats / Intrants": ["achat", "intrant", "nourriture", "semence"],
+    "Salaires": ["salaire", "main d'oeuvre"],
+    "Maintenance / Réparations": ["reparation", "entretien", "maintenance"],
+    "Santé Animale": ["veterinaire", "medicament", "vaccin"],
+    "Carburant": ["carburant", "essence"],
+}
+_categoriseur = None
+
+def _charger_categoriseur():
+    # Recompile les règles seulement si le fichier a changé
+    global _categoriseur
+    signature = _signature_fichier(CATEGORIES_DEPENSES_FILE)
+    if _categoriseur is not None and _categoriseur['signature'] == signature:
+        return _categoriseur
+    if signature is None:
+        regles = CATEGORIES_DEPENSES_PAR_DEFAUT
+    else:
+        with open(CATEGORIES_DEPENSES_FILE, 'r', encoding='utf-8') as f:
+            regles = json.load(f)
+    categories = list(regles)
+    alternatives = [f"(?P<c{rang}>{'|'.join(re.escape(mot.lower()) for mot in regles[categorie])})"
+                    for rang, categorie in enumerate(categories) if regles[categorie]]
+    # Lookahead : chaque position du texte est testée, même si des mots-clés se chevauchent
+    motif = re.compile(f"(?=(?:{'|'.join(alternatives)}))") if alternatives else None
+    _categoriseur = {'signature': signature, 'categories': categories, 'motif': motif}
+    _categorie_de.cache_clear()
+    return _categoriseur
+
+@lru_cache(maxsize=8192)
+def _categorie_de(description):
+    motif = _categoriseur['motif']
+    rang_retenu = None
+    if motif is not None:
+        for correspondance in motif.finditer(description.lower()):
+            rang = int(correspondance.lastgroup[1:])
+            if rang_retenu is None or rang < rang_retenu:
+                rang_retenu = rang
+                if rang == 0:
+                    break
+    return _categoriseur['categories'][rang_retenu] if rang_retenu is not None else CATEGORIE_DEPENSE_PAR_DEFAUT
+
+def categoriser_depense(description):
+    _charger_categoriseur()
+    return _categorie_de(description)
 
-    recettes_periode = 0.0
-    depenses_periode = 0.0
-    
-    transactions_filtrees = []
-
-    for t in transactions:
-        try:
-            transaction_date = datetime.strptime(t['date'], "%Y-%m-%d %H:%M:%S")
-            if date_debut <= transaction_date <= date_fin:
-                transactions_filtrees.append(t)
-                if t['type'] == 'recette':
-                    recettes_periode += t['montant']
-                elif t['type'] == 'depense':
-                    depenses_periode += t['montant']
-        except ValueError:
-            print(f"Avertissement : Date de transaction invalide trouvée dans les données : {t['date']}. Ignorée.")
-            continue
+# --- Fonctions de RAPPORTS ET ANALYSES ---
+def _periode_rapport(date_debut_str, date_fin_str):
+    date_debut = _analyser_date(date_debut_str)
+    date_fin = _analyser_date(date_fin_str) # Journée de fin incluse
+    if date_debut is None or date_fin is None:
+        print("Format de date invalide. Veuillez utiliser AAAA-MM-JJ.")
+        return None
+    return date_debut, date_fin
+
+def calculer_profits_pertes(date_debut_str, date_fin_str):
+    periode = _periode_rapport(date_debut_str, date_fin_str)
+    if periode is None:
+        return None
+    # Mois complets et jours des mois partiels, lus dans les agrégats
+    recettes_periode, depenses_periode, dates_invalides = _totaux_finance_entre(*periode)
+    return {'debut': date_debut_str, 'fin': date_fin_str, 'recettes': recettes_periode, 'depenses': depenses_periode,
+            'profit_net': recettes_periode - depenses_periode, 'dates_invalides': dates_invalides}
 
-    profit_net = recettes_periode - depenses_periode
+def generer_rapport_profits_pertes(date_debut_str, date_fin_str):
+    rapport = calculer_profits_pertes(date_debut_str, date_fin_str)
+    if rapport is None:
+        return
+    if rapport['dates_invalides']:
+        print(f"Avertissement : {rapport['dates_invalides']} transaction(s) avec une date invalide ignorée(s).")
 
     print(f"\n--- Rapport de Profits et Pertes ({date_debut_str} au {date_fin_str}) ---")
-    print(f"Recettes Totales : {recettes_periode:,.2f} XOF")
-    print(f"Dépenses Totales : {depenses_periode:,.2f} XOF")
+    print(f"Recettes Totales : {rapport['recettes']:,.2f} XOF")
+    print(f"Dépenses Totales : {rapport['depenses']:,.2f} XOF")
     print("-" * 40)
-    print(f"Profit Net        : {profit_net:,.2f} XOF")
+    print(f"Profit Net        : {rapport['profit_net']:,.2f} XOF")
     print("-" * 40)
 
-def analyser_depenses_par_categorie(date_debut_str, date_fin_str):
-    finance_data = charger_donnees(FINANCE_FILE)
-    transactions = finance_data['transactions']
-    
-    try:
-        date_debut = datetime.strptime(date_debut_str, "%Y-%m-%d")
-        date_fin = datetime.strptime(date_fin_str, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
-    except ValueError:
-        print("Format de date invalide. Veuillez utiliser AAAA-MM-JJ.")
-        return
+def calculer_depenses_par_categorie(date_debut_str, date_fin_str):
+    periode = _periode_rapport(date_debut_str, date_fin_str)
+    if periode is None:
+        return None
 
     categories_depenses = {}
+    _charger_categoriseur() # Une seule vérification des règles pour tout le rapport
 
-    for t in transactions:
-        try:
-            transaction_date = datetime.strptime(t['date'], "%Y-%m-%d %H:%M:%S")
-            if date_debut <= transaction_date <= date_fin and t['type'] == 'depense':
-                description_lower = t['description'].lower()
-                
-                # Simple logique de catégorisation. Peut être améliorée avec une liste de mots-clés.
-                if "achat" in description_lower or "intrant" in description_lower or "nourriture" in description_lower or "semence" in description_lower:
-                    categorie = "Achats / Intrants"
-                elif "salaire" in description_lower or "main d'oeuvre" in description_lower:
-                    categorie = "Salaires"
-                elif "reparation" in description_lower or "entretien" in description_lower or "maintenance" in description_lower:
-                    categorie = "Maintenance / Réparations"
-                elif "veterinaire" in description_lower or "medicament" in description_lower or "vaccin" in description_lower:
-                    categorie = "Santé Animale"
-                elif "carburant" in description_lower or "essence" in description_lower:
-                    categorie = "Carburant"
-                else:
-                    categorie = "Autres Dépenses"
-                
-                categories_depenses[categorie] = categories_depenses.get(categorie, 0.0) + t['montant']
-        except ValueError:
-            continue # Ignorer les transactions avec des dates invalides
+    for montant, description in _depenses_entre(*periode):
+        categorie = _categorie_de(description)
+        categories_depenses[categorie] = categories_depenses.get(categorie, 0.0) + montant
+    return categories_depenses
+
+def analyser_depenses_par_categorie(date_debut_str, date_fin_str):
+    categories_depenses = calculer_depenses_par_categorie(date_debut_str, date_fin_str)
+    if categories_depenses is None:
+        return
 
     if not categories_depenses:
         print(f"\nAucune dépense enregistrée pour la période du {date_debut_str} au {date_fin_str}.")
@@ -534,125 +2594,169 @@ def analyser_depenses_par_categorie(date_debut_str, date_fin_str):
 
 
 # --- Fonctions d'ALERTES ET NOTIFICATIONS ---
-def generer_alertes_sante_animale(jours_avant=7):
-    animaux = charger_donnees(ANIMAUX_FILE)
+# Toutes les échéances de la ferme (vaccins, vermifuges, semis, récoltes, tâches, maintenances) sont
+# dans une seule liste triée de (date, genre, clé de l'enregistrement) : "en retard" et "à venir dans
+# N jours" sont deux recherches dichotomiques au lieu d'un parcours de chaque collection.
+# Cette liste et les articles sous leur seuil forment l'état des alertes, construit une fois puis tenu
+# à jour par _indexer/_desindexer/_modification_enregistrement pour les seuls enregistrements modifiés.
+# Le passage au jour suivant ne demande aucun recalcul : la frontière entre "en retard" et "à venir"
+# est la recherche de la date du jour dans la liste triée.
+# genre -> (fichier, champ de la date, statut requis ou None)
+GENRES_ECHEANCES = {
+    'vaccin': (ANIMAUX_FILE, 'date_prochain_vaccin', None),
+    'vermifuge': (ANIMAUX_FILE, 'date_prochain_vermifuge', None),
+    'semis': (CULTURES_FILE, 'date_semis', "en préparation"), # Supposons ce statut pour les cultures à semer
+    'recolte': (CULTURES_FILE, 'date_recolte_estimee', "en croissance"), # Seulement si la culture est encore en croissance
+    'tache': (TACHES_FILE, 'date_limite', 'en cours'),
+    'maintenance': (EQUIPEMENTS_FILE, 'prochaine_maintenance', None),
+}
+# genre -> (message si en retard, message si à venir)
+MESSAGES_ECHEANCES = {
+    'vaccin': ("🔴 URGENCE SANTÉ : Vaccin en retard pour '{nom_id}' ({type}) ! Date prévue: {echeance}",
+               "🟠 ALERTE SANTÉ : Vaccin à prévoir pour '{nom_id}' ({type}) avant le {echeance} (dans {jours_restants} jours)."),
+    'vermifuge': ("🔴 URGENCE SANTÉ : Vermifuge en retard pour '{nom_id}' ({type}) ! Date prévue: {echeance}",
+                  "🟠 ALERTE SANTÉ : Vermifuge à prévoir pour '{nom_id}' ({type}) avant le {echeance} (dans {jours_restants} jours)."),
+    'semis': ("🔴 URGENCE CULTURE : Semis en retard pour la parcelle '{nom_parcelle}' ({type_culture}). Date de semis prévue: {echeance}",
+              "🟠 ALERTE CULTURE : Semis imminent pour la parcelle '{nom_parcelle}' ({type_culture}) le {echeance} (dans {jours_restants} jours)."),
+    'recolte': ("🔴 URGENCE CULTURE : Récolte en retard pour la parcelle '{nom_parcelle}' ({type_culture}). Date estimée: {echeance}",
+                "🟠 ALERTE CULTURE : Récolte imminente pour la parcelle '{nom_parcelle}' ({type_culture}) avant le {echeance} (dans {jours_restants} jours)."),
+    'tache': ("🔴 URGENCE TÂCHE : Tâche '{nom}' est en retard ! Assignée à '{ouvrier_assigne}'. Date limite: {echeance}",
+              "🟠 ALERTE TÂCHE : Tâche '{nom}' arrive à échéance le {echeance} (dans {jours_restants} jours). Assignée à '{ouvrier_assigne}'."),
+    'maintenance': ("🔴 URGENCE ÉQUIPEMENT : Maintenance en retard pour '{nom}' ! Date prévue: {echeance}",
+                    "🟠 ALERTE ÉQUIPEMENT : Maintenance à prévoir pour '{nom}' avant le {echeance} (dans {jours_restants} jours)."),
+}
+# Délai d'alerte par défaut (en jours) avant chaque échéance
+JOURS_AVANT_ECHEANCES = {'vaccin': 7, 'vermifuge': 7, 'semis': 7, 'recolte': 14, 'tache': 3, 'maintenance': 30}
+_VALEURS_MESSAGE_PAR_DEFAUT = {'nom_id': 'N/A', 'type': 'N/A', 'nom_parcelle': 'N/A', 'type_culture': 'N/A', 'nom': 'N/A', 'ouvrier_assigne': 'Non assigné'}
+FICHIERS_ALERTES = [STOCK_FILE, ANIMAUX_FILE, CULTURES_FILE, TACHES_FILE, EQUIPEMENTS_FILE]
+# {'sources': {fichier: collection}, 'echeances': [(ordinal, genre, clé, id de l'enregistrement)], 'dates': [ordinal],
+#  'enregistrements': {id: enregistrement}, 'stock': {clé: nombre}}
+# Une échéance désigne son enregistrement par identité : la clé, qui peut être en double dans les
+# anciennes données, ne sert qu'à ordonner les alertes d'un même jour.
+_etat_alertes_ferme = None
+
+def _date_echeance(valeur):
+    if not isinstance(valeur, str):
+        return None # Date absente : pas d'alerte
+    return _analyser_date(valeur) # Les dates invalides sont refusées à la saisie (anciennes données : ignorées)
+
+def _echeances_de(fichier, enregistrement):
+    # (ordinal de la date, genre, clé, id) de chaque échéance suivie pour cet enregistrement
+    cle = _cle_index(enregistrement, CHAMPS_INDEXES[fichier][0])
+    echeances = []
+    for genre, (f, champ, statut) in GENRES_ECHEANCES.items():
+        if f != fichier or cle is None:
+            continue
+        if statut is not None and (enregistrement.get('statut') or '').lower() != statut:
+            continue
+        jour = _date_echeance(enregistrement.get(champ))
+        if jour is not None:
+            echeances.append((jour.toordinal(), genre, cle, id(enregistrement)))
+    return echeances
+
+def _article_en_alerte(article):
+    return article['quantite'] <= article['seuil_alerte']
+
+def _etat_alertes():
+    # Reconstruit en un seul passage seulement si une collection a été rechargée depuis le stockage
+    global _etat_alertes_ferme
+    sources = {f: charger_donnees(f) for f in FICHIERS_ALERTES}
+    etat = _etat_alertes_ferme
+    if etat is None or any(etat['sources'][f] is not collection for f, collection in sources.items()):
+        echeances = []
+        enregistrements = {}
+        for f in FICHIERS_ALERTES[1:]:
+            for enregistrement in sources[f]:
+                echeances_enregistrement = _echeances_de(f, enregistrement)
+                if echeances_enregistrement:
+                    echeances.extend(echeances_enregistrement)
+                    enregistrements[id(enregistrement)] = enregistrement
+        echeances.sort()
+        stock = {}
+        for article in sources[STOCK_FILE]:
+            if _article_en_alerte(article):
+                cle = _cle_index(article, 'nom')
+                stock[cle] = stock.get(cle, 0) + 1
+        etat = {'sources': sources, 'echeances': echeances, 'dates': [e[0] for e in echeances], 'enregistrements': enregistrements, 'stock': stock}
+        _etat_alertes_ferme = etat
+    return etat
+
+def _maj_alertes(fichier, collection, enregistrement, ajout):
+    # Ajoute (ou retire) les alertes d'un seul enregistrement dans l'état stocké
+    etat = _etat_alertes_ferme
+    if etat is None or etat['sources'].get(fichier) is not collection:
+        return # État absent ou construit sur une autre version : il sera reconstruit à la prochaine lecture
+    if fichier == STOCK_FILE:
+        if _article_en_alerte(enregistrement):
+            cle = _cle_index(enregistrement, 'nom')
+            etat['stock'][cle] = etat['stock'].get(cle, 0) + (1 if ajout else -1)
+            if etat['stock'][cle] <= 0:
+                del etat['stock'][cle]
+        return
+    echeances = _echeances_de(fichier, enregistrement)
+    if ajout and echeances:
+        etat['enregistrements'][id(enregistrement)] = enregistrement
+    elif not ajout:
+        etat['enregistrements'].pop(id(enregistrement), None)
+    for echeance in echeances:
+        if ajout:
+            rang = bisect_right(etat['echeances'], echeance)
+            etat['echeances'].insert(rang, echeance)
+            etat['dates'].insert(rang, echeance[0])
+        else:
+            rang = bisect_left(etat['echeances'], echeance)
+            if rang < len(etat['echeances']) and etat['echeances'][rang] == echeance:
+                del etat['echeances'][rang]
+                del etat['dates'][rang]
+
+def _echeances_entre(genres, debut, fin):
+    # Échéances des genres donnés dont l'ordinal de date est dans [debut, fin] (None : sans borne)
+    etat = _etat_alertes()
+    gauche = 0 if debut is None else bisect_left(etat['dates'], debut)
+    droite = len(etat['dates']) if fin is None else bisect_right(etat['dates'], fin)
+    return [e for e in etat['echeances'][gauche:droite] if e[1] in genres]
+
+def _message_echeance(genre, enregistrement, en_retard, maintenant):
+    champ = GENRES_ECHEANCES[genre][1]
+    jour = datetime.combine(_analyser_date(enregistrement[champ]), datetime.min.time())
+    valeurs = {**_VALEURS_MESSAGE_PAR_DEFAUT, **enregistrement, 'echeance': enregistrement[champ], 'jours_restants': int((jour - maintenant).days)}
+    return MESSAGES_ECHEANCES[genre][0 if en_retard else 1].format(**valeurs)
+
+def _alertes_echeances(jours_avant):
+    # jours_avant : {genre: délai d'alerte en jours} ; les échéances en retard d'abord, puis celles à venir
+    maintenant = datetime.now()
+    aujourd_hui = maintenant.date().toordinal()
+    enregistrements = _etat_alertes()['enregistrements']
     alertes = []
-    aujourd_hui = datetime.now()
-
-    for animal in animaux:
-        nom_id = animal.get('nom_id', 'N/A')
-        type_animal = animal.get('type', 'N/A')
-
-        # Alerte vaccination
-        date_vaccin_str = animal.get('date_prochain_vaccin')
-        if date_vaccin_str:
-            try:
-                date_vaccin = datetime.strptime(date_vaccin_str, "%Y-%m-%d")
-                if date_vaccin < aujourd_hui:
-                    alertes.append(f"🔴 URGENCE SANTÉ : Vaccin en retard pour '{nom_id}' ({type_animal}) ! Date prévue: {date_vaccin_str}")
-                elif aujourd_hui <= date_vaccin <= (aujourd_hui + timedelta(days=jours_avant)):
-                    alertes.append(f"🟠 ALERTE SANTÉ : Vaccin à prévoir pour '{nom_id}' ({type_animal}) avant le {date_vaccin_str} (dans {int((date_vaccin - aujourd_hui).days)} jours).")
-            except ValueError:
-                pass # Ignorer si la date est invalide
-
-        # Alerte vermifugation
-        date_vermifuge_str = animal.get('date_prochain_vermifuge')
-        if date_vermifuge_str:
-            try:
-                date_vermifuge = datetime.strptime(date_vermifuge_str, "%Y-%m-%d")
-                if date_vermifuge < aujourd_hui:
-                    alertes.append(f"🔴 URGENCE SANTÉ : Vermifuge en retard pour '{nom_id}' ({type_animal}) ! Date prévue: {date_vermifuge_str}")
-                elif aujourd_hui <= date_vermifuge <= (aujourd_hui + timedelta(days=jours_avant)):
-                    alertes.append(f"🟠 ALERTE SANTÉ : Vermifuge à prévoir pour '{nom_id}' ({type_animal}) avant le {date_vermifuge_str} (dans {int((date_vermifuge - aujourd_hui).days)} jours).")
-            except ValueError:
-                pass # Ignorer si la date est invalide
+    for _, genre, _, identite in _echeances_entre(jours_avant, None, aujourd_hui):
+        alertes.append(_message_echeance(genre, enregistrements[identite], True, maintenant))
+    for ordinal, genre, _, identite in _echeances_entre(jours_avant, aujourd_hui + 1, aujourd_hui + max(jours_avant.values())):
+        if ordinal <= aujourd_hui + jours_avant[genre]:
+            alertes.append(_message_echeance(genre, enregistrements[identite], False, maintenant))
     return alertes
 
-def generer_alertes_cultures(jours_avant_recolte=14, jours_avant_semis=7):
-    cultures = charger_donnees(CULTURES_FILE)
-    alertes = []
-    aujourd_hui = datetime.now()
-
-    for culture in cultures:
-        nom_parcelle = culture.get('nom_parcelle', 'N/A')
-        type_culture = culture.get('type_culture', 'N/A')
-        statut = culture.get('statut', '').lower()
-
-        # Alerte date de semis dépassée (si la culture est toujours en attente de semis)
-        date_semis_str = culture.get('date_semis')
-        if date_semis_str and statut == "en préparation": # Supposons ce statut pour les cultures à semer
-            try:
-                date_semis = datetime.strptime(date_semis_str, "%Y-%m-%d")
-                if date_semis < aujourd_hui:
-                    alertes.append(f"🔴 URGENCE CULTURE : Semis en retard pour la parcelle '{nom_parcelle}' ({type_culture}). Date de semis prévue: {date_semis_str}")
-                elif aujourd_hui <= date_semis <= (aujourd_hui + timedelta(days=jours_avant_semis)):
-                     alertes.append(f"🟠 ALERTE CULTURE : Semis imminent pour la parcelle '{nom_parcelle}' ({type_culture}) le {date_semis_str} (dans {int((date_semis - aujourd_hui).days)} jours).")
-            except ValueError:
-                pass
+def generer_alertes_sante_animale(jours_avant=7):
+    return _alertes_echeances({'vaccin': jours_avant, 'vermifuge': jours_avant})
 
-        # Alerte date de récolte estimée
-        date_recolte_estimee_str = culture.get('date_recolte_estimee')
-        if date_recolte_estimee_str and statut == "en croissance": # Seulement si la culture est encore en croissance
-            try:
-                date_recolte = datetime.strptime(date_recolte_estimee_str, "%Y-%m-%d")
-                if date_recolte < aujourd_hui:
-                    alertes.append(f"🔴 URGENCE CULTURE : Récolte en retard pour la parcelle '{nom_parcelle}' ({type_culture}). Date estimée: {date_recolte_estimee_str}")
-                elif aujourd_hui <= date_recolte <= (aujourd_hui + timedelta(days=jours_avant_recolte)):
-                    alertes.append(f"🟠 ALERTE CULTURE : Récolte imminente pour la parcelle '{nom_parcelle}' ({type_culture}) avant le {date_recolte_estimee_str} (dans {int((date_recolte - aujourd_hui).days)} jours).")
-            except ValueError:
-                pass
-    return alertes
+def generer_alertes_cultures(jours_avant_recolte=14, jours_avant_semis=7):
+    return _alertes_echeances({'semis': jours_avant_semis, 'recolte': jours_avant_recolte})
 
 def generer_alertes_taches(jours_avant_limite=3):
-    taches = charger_donnees(TACHES_FILE)
-    alertes = []
-    aujourd_hui = datetime.now()
-
-    for tache in taches:
-        if tache.get('statut', '').lower() == 'en cours':
-            nom_tache = tache.get('nom', 'N/A')
-            date_limite_str = tache.get('date_limite')
-            ouvrier_assigne = tache.get('ouvrier_assigne', 'Non assigné')
-
-            if date_limite_str:
-                try:
-                    date_limite = datetime.strptime(date_limite_str, "%Y-%m-%d")
-                    if date_limite < aujourd_hui:
-                        alertes.append(f"🔴 URGENCE TÂCHE : Tâche '{nom_tache}' est en retard ! Assignée à '{ouvrier_assigne}'. Date limite: {date_limite_str}")
-                    elif aujourd_hui <= date_limite <= (aujourd_hui + timedelta(days=jours_avant_limite)):
-                        alertes.append(f"🟠 ALERTE TÂCHE : Tâche '{nom_tache}' arrive à échéance le {date_limite_str} (dans {int((date_limite - aujourd_hui).days)} jours). Assignée à '{ouvrier_assigne}'.")
-                except ValueError:
-                    pass
-    return alertes
+    return _alertes_echeances({'tache': jours_avant_limite})
 
 def generer_alertes_equipements(jours_avant_maintenance=30):
-    equipements = charger_donnees(EQUIPEMENTS_FILE)
-    alertes = []
-    aujourd_hui = datetime.now()
-
-    for equipement in equipements:
-        nom_equipement = equipement.get('nom', 'N/A')
-        prochaine_maintenance_str = equipement.get('prochaine_maintenance')
-
-        if prochaine_maintenance_str:
-            try:
-                prochaine_maintenance = datetime.strptime(prochaine_maintenance_str, "%Y-%m-%d")
-                if prochaine_maintenance < aujourd_hui:
-                    alertes.append(f"🔴 URGENCE ÉQUIPEMENT : Maintenance en retard pour '{nom_equipement}' ! Date prévue: {prochaine_maintenance_str}")
-                elif aujourd_hui <= prochaine_maintenance <= (aujourd_hui + timedelta(days=jours_avant_maintenance)):
-                    alertes.append(f"🟠 ALERTE ÉQUIPEMENT : Maintenance à prévoir pour '{nom_equipement}' avant le {prochaine_maintenance_str} (dans {int((prochaine_maintenance - aujourd_hui).days)} jours).")
-            except ValueError:
-                pass # Ignorer si la date est invalide
-    return alertes
+    return _alertes_echeances({'maintenance': jours_avant_maintenance})
 
 
-def afficher_toutes_les_alertes():
+def lister_toutes_les_alertes():
     toutes_alertes = []
     toutes_alertes.extend(afficher_alertes_stock())
-    toutes_alertes.extend(generer_alertes_sante_animale())
-    toutes_alertes.extend(generer_alertes_cultures())
-    toutes_alertes.extend(generer_alertes_taches())
-    toutes_alertes.extend(generer_alertes_equipements())
+    toutes_alertes.extend(_alertes_echeances(JOURS_AVANT_ECHEANCES)) # Toutes les échéances en un seul passage
+    return toutes_alertes
+
+def afficher_toutes_les_alertes(toutes_alertes=None):
+    if toutes_alertes is None:
+        toutes_alertes = lister_toutes_les_alertes()
 
     if not toutes_alertes:
         print("\n🎉 Aucune alerte en cours. Tout est sous contrôle !")
@@ -666,165 +2770,188 @@ def afficher_toutes_les_alertes():
 
 # --- Fonctions pour le Tableau de Bord ---
 def get_statistiques_rapides_ferme():
-    animaux_data = charger_donnees(ANIMAUX_FILE)
-    total_animaux = len(animaux_data)
-    
-    cultures_data = charger_donnees(CULTURES_FILE)
-    total_cultures = len(cultures_data) 
-    
-    ouvriers_data = charger_donnees(OUVRIERS_FILE)
-    total_ouvriers = len(ouvriers_data)
-
-    taches_data = charger_donnees(TACHES_FILE)
-    taches_en_cours = [t for t in taches_data if t.get('statut', '').lower() == 'en cours']
-    
-    equipements_data = charger_donnees(EQUIPEMENTS_FILE)
-    total_equipements = len(equipements_data)
-
-    fournisseurs_clients_data = charger_donnees(FOURNISSEURS_CLIENTS_FILE)
-    total_fournisseurs = len([fc for fc in fournisseurs_clients_data if fc['type_contact'].lower() == 'fournisseur'])
-    total_clients = len([fc for fc in fournisseurs_clients_data if fc['type_contact'].lower() == 'client'])
-
+    compteurs = _compteurs() # Aucun fichier de données n'est lu
 
     return {
-        "Total Animaux": total_animaux,
-        "Cultures Enregistrées": total_cultures,
-        "Ouvriers Enregistrés": total_ouvriers,
-        "Tâches En Cours": len(taches_en_cours),
-        "Équipements Enregistrés": total_equipements,
-        "Fournisseurs Enregistrés": total_fournisseurs,
-        "Clients Enregistrés": total_clients
+        "Total Animaux": compteurs[ANIMAUX_FILE]['total'],
+        "Cultures Enregistrées": compteurs[CULTURES_FILE]['total'],
+        "Ouvriers Enregistrés": compteurs[OUVRIERS_FILE]['total'],
+        "Tâches En Cours": compteurs[TACHES_FILE]['statut'].get('en cours', 0),
+        "Équipements Enregistrés": compteurs[EQUIPEMENTS_FILE]['total'],
+        "Fournisseurs Enregistrés": compteurs[FOURNISSEURS_CLIENTS_FILE]['type_contact'].get('fournisseur', 0),
+        "Clients Enregistrés": compteurs[FOURNISSEURS_CLIENTS_FILE]['type_contact'].get('client', 0)
     }
 
+# --- Instantané du tableau de bord ---
+# Chaque partie est gardée avec les versions des fichiers dont elle dépend et n'est recalculée que si
+# l'une d'elles a changé. Version d'un fichier : signature du stockage (modification par un autre
+# programme) et génération en cache (modification par ce programme).
+# partie -> (fichiers dont elle dépend, dépend aussi de la date du jour, fonction de calcul)
+PARTIES_TABLEAU_DE_BORD = {
+    'solde': ([FINANCE_FILE], False, get_solde_actuel),
+    'alertes': (FICHIERS_ALERTES, True, lister_toutes_les_alertes), # "dans N jours" change chaque jour
+    'statistiques': ([COMPTEURS_FILE], False, get_statistiques_rapides_ferme),
+}
+_instantane_tableau_de_bord = {} # partie -> {'versions', 'valeur'}
+
+def _versions_dependances(fichiers, depend_du_jour):
+    versions = [(_signature_stockage(f), generation_donnees(f)) for f in fichiers]
+    return versions, date.today() if depend_du_jour else None
+
+def _partie_tableau_de_bord(partie):
+    fichiers, depend_du_jour, calculer = PARTIES_TABLEAU_DE_BORD[partie]
+    entree = _instantane_tableau_de_bord.get(partie)
+    if entree is None or entree['versions'] != _versions_dependances(fichiers, depend_du_jour):
+        valeur = calculer()
+        # Versions relevées après le calcul : le chargement des fichiers incrémente leur génération
+        entree = {'versions': _versions_dependances(fichiers, depend_du_jour), 'valeur': valeur}
+        _instantane_tableau_de_bord[partie] = entree
+    return entree['valeur']
+
+def instantane_tableau_de_bord():
+    # Valeurs partagées avec le cache : à ne pas modifier
+    return {partie: _partie_tableau_de_bord(partie) for partie in PARTIES_TABLEAU_DE_BORD}
+
 def afficher_tableau_de_bord():
+    instantane = instantane_tableau_de_bord()
     print("\n" + "="*60)
     print(" " * 15 + "TABLEAU DE BORD DE LA FERME D'ABIDJAN")
     print("="*60)
 
     # 1. Solde Financier
-    solde = get_solde_actuel()
+    solde = instantane['solde']
     print(f"\n💰 Solde Financier Actuel : {solde:,.2f} XOF")
 
     # 2. Alertes Générales (maintenant centralisées)
     print("\n--- ⚠️ Alertes du Système ---")
-    if not afficher_toutes_les_alertes(): # Cette fonction affiche les alertes et renvoie False si aucune
+    if not afficher_toutes_les_alertes(instantane['alertes']): # Cette fonction affiche les alertes et renvoie False si aucune
         pass # Message déjà affiché par la fonction
 
     # 3. Statistiques Rapides de la Ferme
     print("\n--- 📊 Statistiques Rapides ---")
-    stats = get_statistiques_rapides_ferme()
+    stats = instantane['statistiques']
     for key, value in stats.items():
         print(f"   - {key} : {value}")
 
     print("\n" + "="*60 + "\n")
 
 # --- Fonctions de GESTION DES ÉQUIPEMENTS ---
+@_operation_exclusive
 def ajouter_equipement(nom, type_equipement, date_achat, cout_achat, etat="Fonctionnel", prochaine_maintenance=None):
+    dates = _valider_dates(('date_achat',), date_achat=date_achat, prochaine_maintenance=prochaine_maintenance)
+    if dates is None:
+        return False
+    date_achat, prochaine_maintenance = dates.values()
     equipements = charger_donnees(EQUIPEMENTS_FILE)
-    if any(eq['nom'].lower() == nom.lower() for eq in equipements):
+    if _rechercher(EQUIPEMENTS_FILE, equipements, 'nom', nom) is not None:
         print(f"Erreur : Un équipement avec le nom '{nom}' existe déjà.")
         return False
     
-    equipement = {
-        'id': len(equipements) + 1,
-        'nom': nom,
-        'type': type_equipement,
-        'date_achat': date_achat, # AAAA-MM-JJ
-        'cout_achat': cout_achat,
-        'etat': etat, # Fonctionnel, En panne, En réparation, Mis au rebut
-        'prochaine_maintenance': prochaine_maintenance, # AAAA-MM-JJ ou None
-        'historique_maintenance': [], # Liste des entrées de maintenance
-        'date_ajout': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    equipements.append(equipement)
-    sauvegarder_donnees(equipements, EQUIPEMENTS_FILE)
+    with unite_de_travail():
+        equipement = {
+            'id': _prochain_id(EQUIPEMENTS_FILE, equipements),
+            'nom': nom,
+            'type': type_equipement,
+            'date_achat': date_achat, # AAAA-MM-JJ
+            'cout_achat': cout_achat,
+            'etat': etat, # Fonctionnel, En panne, En réparation, Mis au rebut
+            'prochaine_maintenance': prochaine_maintenance, # AAAA-MM-JJ ou None
+            'nombre_maintenances': 0, # Cumuls des opérations de MAINTENANCE_JOURNAL_FILE
+            'cout_maintenance_total': 0.0,
+            'derniere_maintenance': None,
+            'date_ajout': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        equipements.append(equipement)
+        _indexer(EQUIPEMENTS_FILE, equipements, equipement)
+        sauvegarder_donnees(equipements, EQUIPEMENTS_FILE)
     print(f"Équipement '{nom}' ({type_equipement}) ajouté avec succès (ID: {equipement['id']}).")
     return True
 
-def afficher_equipements():
-    equipements = charger_donnees(EQUIPEMENTS_FILE)
-    if not equipements:
-        print("Aucun équipement enregistré pour le moment.")
-        return
-    
-    print("\n--- Liste des Équipements ---")
-    print(f"{'ID':<5} {'Nom':<20} {'Type':<15} {'Date Achat':<12} {'Coût':<10} {'État':<15} {'Proch. Maint.':<15}")
-    print("-" * 95)
-    for eq in equipements:
-        print(f"{eq.get('id', 'N/A'):<5} {eq.get('nom', 'N/A'):<20} {eq.get('type', 'N/A'):<15} {eq.get('date_achat', 'N/A'):<12} {eq.get('cout_achat', 0):<10,.0f} {eq.get('etat', 'N/A'):<15} {eq.get('prochaine_maintenance', 'N/A'):<15}")
-    print("-" * 95)
+def afficher_equipements(filtres=None, periode=None, tri=None, decroissant=False):
+    _afficher_liste(EQUIPEMENTS_FILE, "Liste des Équipements",
+                    f"{'ID':<5} {'Nom':<20} {'Type':<15} {'Date Achat':<12} {'Coût':<10} {'État':<15} {'Proch. Maint.':<15}", 95,
+                    lambda eq: f"{eq.get('id', 'N/A'):<5} {eq.get('nom', 'N/A'):<20} {eq.get('type', 'N/A'):<15} {eq.get('date_achat', 'N/A'):<12} {eq.get('cout_achat', 0):<10,.0f} {eq.get('etat', 'N/A'):<15} {eq.get('prochaine_maintenance') or 'N/A':<15}",
+                    "Aucun équipement enregistré pour le moment.", filtres, periode, tri, decroissant)
 
+@_operation_exclusive
 def modifier_equipement(equipement_id, nouveau_nom=None, nouveau_type=None, nouvelle_date_achat=None, nouveau_cout_achat=None, nouvel_etat=None, nouvelle_prochaine_maintenance=None):
+    dates = _valider_dates(date_achat=nouvelle_date_achat, prochaine_maintenance=nouvelle_prochaine_maintenance)
+    if dates is None:
+        return False
+    nouvelle_date_achat, nouvelle_prochaine_maintenance = dates.values()
     equipements = charger_donnees(EQUIPEMENTS_FILE)
-    trouve = False
-    for eq in equipements:
-        if eq['id'] == equipement_id:
-            if nouveau_nom: eq['nom'] = nouveau_nom
-            if nouveau_type: eq['type'] = nouveau_type
-            if nouvelle_date_achat: eq['date_achat'] = nouvelle_date_achat
-            if nouveau_cout_achat is not None: eq['cout_achat'] = nouveau_cout_achat
-            if nouvel_etat: eq['etat'] = nouvel_etat
-            if nouvelle_prochaine_maintenance is not None: eq['prochaine_maintenance'] = nouvelle_prochaine_maintenance
-            trouve = True
-            break
-    
-    if trouve:
-        sauvegarder_donnees(equipements, EQUIPEMENTS_FILE)
-        print(f"Équipement avec l'ID '{equipement_id}' mis à jour avec succès.")
-        return True
-    else:
+    eq = _rechercher(EQUIPEMENTS_FILE, equipements, 'id', equipement_id)
+    if eq is None:
         print(f"Erreur : Équipement avec l'ID '{equipement_id}' non trouvé.")
         return False
 
+    with _modification_enregistrement(EQUIPEMENTS_FILE, equipements, eq):
+        if nouveau_nom: eq['nom'] = nouveau_nom
+        if nouvelle_prochaine_maintenance is not None: eq['prochaine_maintenance'] = nouvelle_prochaine_maintenance
+        if nouveau_type: eq['type'] = nouveau_type
+        if nouvelle_date_achat: eq['date_achat'] = nouvelle_date_achat
+        if nouveau_cout_achat is not None: eq['cout_achat'] = nouveau_cout_achat
+        if nouvel_etat: eq['etat'] = nouvel_etat
+    sauvegarder_donnees(equipements, EQUIPEMENTS_FILE)
+    print(f"Équipement avec l'ID '{equipement_id}' mis à jour avec succès.")
+    return True
+
+@_operation_exclusive
 def enregistrer_maintenance_reparation(equipement_id, date_operation, description, cout=0.0):
+    dates = _valider_dates(('date_operation',), date_operation=date_operation)
+    if dates is None:
+        return False
+    date_operation = dates['date_operation']
     equipements = charger_donnees(EQUIPEMENTS_FILE)
-    trouve = False
-    for eq in equipements:
-        if eq['id'] == equipement_id:
-            operation = {
-                'date': date_operation, # AAAA-MM-JJ
-                'description': description,
-                'cout': cout
-            }
-            eq['historique_maintenance'].append(operation)
-            # Optionnel: mettre à jour la prochaine_maintenance si c'est une maintenance préventive
-            # Ou enregistrer une dépense pour la réparation
-            if cout > 0:
-                enregistrer_transaction('depense', cout, f"Maintenance/Réparation '{eq['nom']}' ({description})")
-            trouve = True
-            break
-    
-    if trouve:
-        sauvegarder_donnees(equipements, EQUIPEMENTS_FILE)
-        print(f"Historique de maintenance/réparation pour '{eq['nom']}' mis à jour.")
-        return True
-    else:
+    eq = _rechercher(EQUIPEMENTS_FILE, equipements, 'id', equipement_id)
+    if eq is None:
         print(f"Erreur : Équipement avec l'ID '{equipement_id}' non trouvé.")
+        return False
+
+    with unite_de_travail(): # Le journal, les cumuls de l'équipement et la dépense sont écrits ensemble
+        _migrer_historique_maintenance(equipements, eq)
+        operation = {
+            'equipement_id': eq['id'],
+            'date': date_operation, # AAAA-MM-JJ
+            'description': description,
+            'cout': cout
+        }
+        _ajouter_au_journal(MAINTENANCE_JOURNAL_FILE, [json.dumps(operation)])
+        with _modification_enregistrement(EQUIPEMENTS_FILE, equipements, eq):
+            _cumuler_maintenance(eq, operation)
+        # Optionnel: mettre à jour la prochaine_maintenance si c'est une maintenance préventive
+        # Ou enregistrer une dépense pour la réparation
+        if cout > 0:
+            enregistrer_transaction('depense', cout, f"Maintenance/Réparation '{eq['nom']}' ({description})")
+        sauvegarder_donnees(equipements, EQUIPEMENTS_FILE)
+    print(f"Historique de maintenance/réparation pour '{eq['nom']}' mis à jour.")
+    return True
 
 def afficher_historique_maintenance(equipement_id):
     equipements = charger_donnees(EQUIPEMENTS_FILE)
-    equipement = next((eq for eq in equipements if eq['id'] == equipement_id), None)
+    equipement = _rechercher(EQUIPEMENTS_FILE, equipements, 'id', equipement_id)
 
     if equipement:
         print(f"\n--- Historique de Maintenance pour '{equipement['nom']}' (ID: {equipement_id}) ---")
-        if not equipement.get('historique_maintenance'):
+        # Historique pas encore migré (anciennes données), puis les seules lignes du journal de cet équipement
+        historique = equipement.get('historique_maintenance', []) + operations_maintenance(equipement_id)
+        if not historique:
             print("Aucun historique de maintenance pour cet équipement.")
             return
         
         print(f"{'Date':<12} {'Coût (XOF)':<15} {'Description':<50}")
         print("-" * 80)
-        for op in equipement['historique_maintenance']:
+        for op in historique:
             print(f"{op.get('date', 'N/A'):<12} {op.get('cout', 0):<15,.2f} {op.get('description', 'N/A'):<50}")
         print("-" * 80)
+        print(f"{equipement.get('nombre_maintenances', 0)} opération(s), coût total : {equipement.get('cout_maintenance_total', 0.0):,.2f} XOF, dernière le {equipement.get('derniere_maintenance') or 'N/A'}")
     else:
         print(f"Erreur : Équipement avec l'ID '{equipement_id}' non trouvé.")
 
+@_operation_exclusive
 def supprimer_equipement(equipement_id):
     equipements = charger_donnees(EQUIPEMENTS_FILE)
-    equipements_avant = len(equipements)
-    equipements = [eq for eq in equipements if eq['id'] != equipement_id]
-    
-    if len(equipements) < equipements_avant:
+    if _retirer(EQUIPEMENTS_FILE, equipements, 'id', equipement_id):
         sauvegarder_donnees(equipements, EQUIPEMENTS_FILE)
         print(f"Équipement avec l'ID '{equipement_id}' supprimé avec succès.")
         return True
@@ -832,78 +2959,148 @@ def supprimer_equipement(equipement_id):
         print(f"Erreur : Équipement avec l'ID '{equipement_id}' non trouvé.")
         return False
 
+# --- Journal de maintenance des équipements ---
+# Une ligne JSON par opération {'equipement_id', 'date', 'description', 'cout'} dans
+# MAINTENANCE_JOURNAL_FILE, au lieu d'une liste 'historique_maintenance' dans chaque équipement :
+# equipements.json ne garde que les cumuls (nombre, coût total, dernière date), mis à jour à chaque
+# opération. L'index des positions des lignes, par équipement et par date, est complété en ne
+# lisant que ce qui a été ajouté au journal depuis le passage précédent.
+_index_maintenance = {'taille': 0, 'par_equipement': {}, 'par_date': []}
+
+def _journal_maintenance_indexe():
+    global _index_maintenance
+    index = _index_maintenance
+    taille = _taille_fichier(MAINTENANCE_JOURNAL_FILE)
+    if taille < index['taille']: # Journal remplacé : index à refaire
+        index = _index_maintenance = {'taille': 0, 'par_equipement': {}, 'par_date': []}
+    if taille > index['taille']:
+        position = index['taille']
+        with open(MAINTENANCE_JOURNAL_FILE, 'rb') as f:
+            f.seek(position)
+            for ligne in f:
+                if not ligne.endswith(b'\n'):
+                    break # Ligne en cours d'écriture
+                try:
+                    operation = json.loads(ligne)
+                    index['par_equipement'].setdefault(operation['equipement_id'], []).append(position)
+                    insort(index['par_date'], (operation['date'], position))
+                except (ValueError, KeyError):
+                    pass
+                position += len(ligne)
+        index['taille'] = position
+    return index
+
+def _lire_operations_maintenance(positions):
+    if not positions:
+        return []
+    with open(MAINTENANCE_JOURNAL_FILE, 'rb') as f:
+        operations = []
+        for position in positions:
+            f.seek(position)
+            operations.append(json.loads(f.readline()))
+    return operations
+
+def operations_maintenance(equipement_id=None, date_debut=None, date_fin=None):
+    # Opérations d'un équipement (ordre d'enregistrement) ou de tous, filtrées par dates (AAAA-MM-JJ, incluses)
+    index = _journal_maintenance_indexe()
+    if equipement_id is not None:
+        operations = _lire_operations_maintenance(index['par_equipement'].get(equipement_id))
+        return [op for op in operations if (date_debut is None or op['date'] >= date_debut) and (date_fin is None or op['date'] <= date_fin)]
+    par_date = index['par_date']
+    debut = 0 if date_debut is None else bisect_left(par_date, (date_debut,))
+    fin = len(par_date) if date_fin is None else bisect_right(par_date, (date_fin, float('inf')))
+    return _lire_operations_maintenance([position for _, position in par_date[debut:fin]])
+
+def _cumuler_maintenance(equipement, operation):
+    equipement['nombre_maintenances'] = equipement.get('nombre_maintenances', 0) + 1
+    equipement['cout_maintenance_total'] = equipement.get('cout_maintenance_total', 0.0) + operation['cout']
+    if operation['date'] > (equipement.get('derniere_maintenance') or ''):
+        equipement['derniere_maintenance'] = operation['date']
+
+def _migrer_historique_maintenance(equipements, equipement):
+    # Déplace l'ancienne liste imbriquée dans le journal (dans une unité de travail) ; True si migré
+    historique = equipement.get('historique_maintenance')
+    if historique is None:
+        return False
+    with _modification_enregistrement(EQUIPEMENTS_FILE, equipements, equipement):
+        del equipement['historique_maintenance']
+        lignes = []
+        for ancienne in historique:
+            operation = {'equipement_id': equipement['id'], 'date': ancienne.get('date') or '',
+                         'description': ancienne.get('description'), 'cout': ancienne.get('cout', 0.0)}
+            lignes.append(json.dumps(operation))
+            _cumuler_maintenance(equipement, operation)
+    _ajouter_au_journal(MAINTENANCE_JOURNAL_FILE, lignes)
+    return True
+
+@_operation_exclusive
+def migrer_historiques_maintenance():
+    equipements = charger_donnees(EQUIPEMENTS_FILE)
+    with unite_de_travail():
+        migres = sum(_migrer_historique_maintenance(equipements, eq) for eq in equipements)
+        if migres:
+            sauvegarder_donnees(equipements, EQUIPEMENTS_FILE)
+    return migres
+
 # --- NOUVELLES FONCTIONS DE GESTION DES FOURNISSEURS ET CLIENTS ---
+@_operation_exclusive
 def ajouter_contact(nom_entreprise, type_contact, contact_personne=None, telephone=None, email=None, adresse=None, notes=None):
     contacts = charger_donnees(FOURNISSEURS_CLIENTS_FILE)
-    if any(c['nom_entreprise'].lower() == nom_entreprise.lower() and c['type_contact'].lower() == type_contact.lower() for c in contacts):
+    if _rechercher(FOURNISSEURS_CLIENTS_FILE, contacts, ('nom_entreprise', 'type_contact'), (nom_entreprise, type_contact)) is not None:
         print(f"Erreur : Un {type_contact} avec le nom '{nom_entreprise}' existe déjà.")
         return False
     
-    contact = {
-        'id': len(contacts) + 1,
-        'nom_entreprise': nom_entreprise,
-        'type_contact': type_contact, # 'fournisseur' ou 'client'
-        'contact_personne': contact_personne,
-        'telephone': telephone,
-        'email': email,
-        'adresse': adresse,
-        'notes': notes,
-        'date_ajout': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    contacts.append(contact)
-    sauvegarder_donnees(contacts, FOURNISSEURS_CLIENTS_FILE)
+    with unite_de_travail():
+        contact = {
+            'id': _prochain_id(FOURNISSEURS_CLIENTS_FILE, contacts),
+            'nom_entreprise': nom_entreprise,
+            'type_contact': type_contact, # 'fournisseur' ou 'client'
+            'contact_personne': contact_personne,
+            'telephone': telephone,
+            'email': email,
+            'adresse': adresse,
+            'notes': notes,
+            'date_ajout': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        contacts.append(contact)
+        _indexer(FOURNISSEURS_CLIENTS_FILE, contacts, contact)
+        sauvegarder_donnees(contacts, FOURNISSEURS_CLIENTS_FILE)
     print(f"{type_contact.capitalize()} '{nom_entreprise}' ajouté avec succès (ID: {contact['id']}).")
     return True
 
-def afficher_contacts(type_filtre=None):
-    contacts = charger_donnees(FOURNISSEURS_CLIENTS_FILE)
-    
-    if type_filtre:
-        contacts = [c for c in contacts if c['type_contact'].lower() == type_filtre.lower()]
+def _ligne_contact(c):
+    return f"{c.get('id', 'N/A'):<5} {c.get('nom_entreprise', 'N/A'):<25} {c.get('type_contact', 'N/A').capitalize():<10} {c.get('contact_personne') or 'N/A':<20} {c.get('telephone') or 'N/A':<15} {c.get('email') or 'N/A':<25}"
 
-    if not contacts:
-        if type_filtre:
-            print(f"Aucun {type_filtre} enregistré pour le moment.")
-        else:
-            print("Aucun fournisseur ou client enregistré pour le moment.")
-        return
-    
-    print(f"\n--- Liste des Contacts ({type_filtre.capitalize() if type_filtre else 'Tous'}) ---")
-    print(f"{'ID':<5} {'Nom Entreprise':<25} {'Type':<10} {'Personne Contact':<20} {'Téléphone':<15} {'Email':<25}")
-    print("-" * 105)
-    for c in contacts:
-        print(f"{c.get('id', 'N/A'):<5} {c.get('nom_entreprise', 'N/A'):<25} {c.get('type_contact', 'N/A').capitalize():<10} {c.get('contact_personne', 'N/A'):<20} {c.get('telephone', 'N/A'):<15} {c.get('email', 'N/A'):<25}")
-    print("-" * 105)
+def afficher_contacts(type_filtre=None, tri=None, decroissant=False):
+    message_vide = f"Aucun {type_filtre} enregistré pour le moment." if type_filtre else "Aucun fournisseur ou client enregistré pour le moment."
+    _afficher_liste(FOURNISSEURS_CLIENTS_FILE, f"Liste des Contacts ({type_filtre.capitalize() if type_filtre else 'Tous'})",
+                    f"{'ID':<5} {'Nom Entreprise':<25} {'Type':<10} {'Personne Contact':<20} {'Téléphone':<15} {'Email':<25}", 105,
+                    _ligne_contact, message_vide, {'type_contact': type_filtre} if type_filtre else None, None, tri, decroissant)
 
+@_operation_exclusive
 def modifier_contact(contact_id, nouveau_nom_entreprise=None, nouveau_type_contact=None, nouvelle_contact_personne=None, nouveau_telephone=None, nouvel_email=None, nouvelle_adresse=None, nouvelles_notes=None):
     contacts = charger_donnees(FOURNISSEURS_CLIENTS_FILE)
-    trouve = False
-    for c in contacts:
-        if c['id'] == contact_id:
-            if nouveau_nom_entreprise: c['nom_entreprise'] = nouveau_nom_entreprise
-            if nouveau_type_contact: c['type_contact'] = nouveau_type_contact
-            if nouvelle_contact_personne is not None: c['contact_personne'] = nouvelle_contact_personne
-            if nouveau_telephone is not None: c['telephone'] = nouveau_telephone
-            if nouvel_email is not None: c['email'] = nouvel_email
-            if nouvelle_adresse is not None: c['adresse'] = nouvelle_adresse
-            if nouvelles_notes is not None: c['notes'] = nouvelles_notes
-            trouve = True
-            break
-    
-    if trouve:
-        sauvegarder_donnees(contacts, FOURNISSEURS_CLIENTS_FILE)
-        print(f"Contact avec l'ID '{contact_id}' mis à jour avec succès.")
-        return True
-    else:
+    c = _rechercher(FOURNISSEURS_CLIENTS_FILE, contacts, 'id', contact_id)
+    if c is None:
         print(f"Erreur : Contact avec l'ID '{contact_id}' non trouvé.")
         return False
 
+    with _modification_enregistrement(FOURNISSEURS_CLIENTS_FILE, contacts, c):
+        if nouveau_nom_entreprise: c['nom_entreprise'] = nouveau_nom_entreprise
+        if nouveau_type_contact: c['type_contact'] = nouveau_type_contact
+        if nouvelle_adresse is not None: c['adresse'] = nouvelle_adresse # Champs de la recherche plein texte
+        if nouvelles_notes is not None: c['notes'] = nouvelles_notes
+        if nouvelle_contact_personne is not None: c['contact_personne'] = nouvelle_contact_personne
+        if nouveau_telephone is not None: c['telephone'] = nouveau_telephone
+        if nouvel_email is not None: c['email'] = nouvel_email
+    sauvegarder_donnees(contacts, FOURNISSEURS_CLIENTS_FILE)
+    print(f"Contact avec l'ID '{contact_id}' mis à jour avec succès.")
+    return True
+
+@_operation_exclusive
 def supprimer_contact(contact_id):
     contacts = charger_donnees(FOURNISSEURS_CLIENTS_FILE)
-    contacts_avant = len(contacts)
-    contacts = [c for c in contacts if c['id'] != contact_id]
-    
-    if len(contacts) < contacts_avant:
+    if _retirer(FOURNISSEURS_CLIENTS_FILE, contacts, 'id', contact_id):
         sauvegarder_donnees(contacts, FOURNISSEURS_CLIENTS_FILE)
         print(f"Contact avec l'ID '{contact_id}' supprimé avec succès.")
         return True
@@ -921,6 +3118,7 @@ def gerer_stock_menu():
         print("2. Afficher tous les stocks")
         print("3. Enregistrer une Vente")
         print("4. Enregistrer un Achat")
+        print("5. Importer des articles (CSV/JSONL)")
         print("0. Retour au Menu Principal")
 
         choix = input("Votre choix : ")
@@ -960,6 +3158,8 @@ def gerer_stock_menu():
                 enregistrer_achat(nom, quantite, prix, est_nouvel_article=nouveau, seuil_alerte=seuil, fournisseur_nom=fournisseur_nom)
             except ValueError:
                 print("Veuillez entrer des nombres valides pour la quantité et le prix.")
+        elif choix == '5':
+            _importer_depuis_menu('stock', "nom, quantite, seuil_alerte")
         elif choix == '0':
             break
         else:
@@ -972,6 +3172,7 @@ def gerer_finance_menu():
         print("2. Afficher l'Historique des Transactions")
         print("3. Enregistrer une autre Recette (non liée au stock)")
         print("4. Enregistrer une autre Dépense (non liée au stock)")
+        print("5. Importer des transactions (CSV/JSONL, ex : relevé bancaire)")
         print("0. Retour au Menu Principal")
 
         choix = input("Votre choix : ")
@@ -994,6 +3195,8 @@ def gerer_finance_menu():
                 enregistrer_transaction('depense', montant, description)
             except ValueError:
                 print("Veuillez entrer un montant valide.")
+        elif choix == '5':
+            _importer_depuis_menu('transactions', "date, type, montant, description")
         elif choix == '0':
             break
         else:
@@ -1006,6 +3209,7 @@ def gerer_animaux_menu():
         print("2. Afficher tous les animaux")
         print("3. Modifier un animal existant")
         print("4. Supprimer un animal")
+        print("5. Importer des animaux (CSV/JSONL)")
         print("0. Retour au Menu Principal")
 
         choix = input("Votre choix : ")
@@ -1035,6 +3239,8 @@ def gerer_animaux_menu():
         elif choix == '4':
             nom_id = input("ID de l'animal à supprimer : ").strip()
             supprimer_animal(nom_id)
+        elif choix == '5':
+            _importer_depuis_menu('animaux', "nom_id, type, date_naissance, sexe, etat_sante, date_prochain_vaccin, date_prochain_vermifuge")
         elif choix == '0':
             break
         else:
@@ -1047,6 +3253,7 @@ def gerer_cultures_menu():
         print("2. Afficher toutes les cultures")
         print("3. Modifier une culture existante")
         print("4. Supprimer une culture")
+        print("5. Importer des cultures (CSV/JSONL)")
         print("0. Retour au Menu Principal")
 
         choix = input("Votre choix : ")
@@ -1091,6 +3298,8 @@ def gerer_cultures_menu():
         elif choix == '4':
             nom_parcelle = input("Nom de la parcelle/culture à supprimer : ").strip()
             supprimer_culture(nom_parcelle)
+        elif choix == '5':
+            _importer_depuis_menu('cultures', "nom_parcelle, type_culture, date_semis, date_recolte_estimee, statut, surface_ou_quantite, unite")
         elif choix == '0':
             break
         else:
@@ -1149,6 +3358,7 @@ def gerer_taches_sous_menu():
         print("2. Afficher toutes les tâches")
         print("3. Modifier le statut d'une tâche")
         print("4. Supprimer une tâche")
+        print("5. Afficher les tâches d'un ouvrier")
         print("0. Retour au menu précédent")
 
         choix = input("Votre choix : ")
@@ -1181,6 +3391,13 @@ def gerer_taches_sous_menu():
                 supprimer_tache(tache_id)
             except ValueError:
                 print("Veuillez entrer un ID numérique valide.")
+        elif choix == '5':
+            try:
+                ouvrier_id = int(input("ID de l'ouvrier : "))
+                statut = input("Statut (En cours, Terminée, Annulée - laisser vide pour toutes) : ").strip() or None
+                afficher_taches_ouvrier(ouvrier_id, statut)
+            except ValueError:
+                print("Veuillez entrer un ID numérique valide.")
         elif choix == '0':
             break
         else:
@@ -1191,6 +3408,7 @@ def gerer_rapports_statistiques_menu():
         print("\n--- Rapports & Statistiques ---")
         print("1. Rapport de Profits et Pertes")
         print("2. Analyse des Dépenses par Catégorie")
+        print("3. Recompter les Statistiques")
         print("0. Retour au Menu Principal")
 
         choix = input("Votre choix : ")
@@ -1203,6 +3421,9 @@ def gerer_rapports_statistiques_menu():
             date_debut_str = input("Date de début (AAAA-MM-JJ) : ").strip()
             date_fin_str = input("Date de fin (AAAA-MM-JJ) : ").strip()
             analyser_depenses_par_categorie(date_debut_str, date_fin_str)
+        elif choix == '3':
+            recompter_statistiques()
+            print("Statistiques recomptées à partir des données.")
         elif choix == '0':
             break
         else:
@@ -1388,6 +3609,7 @@ def menu_principal():
         print("8. Gestion des Alertes")
         print("9. Gestion des Équipements")
         print("10. Gestion des Fournisseurs & Clients") # Ce module est maintenant fonctionnel !
+        print("11. Recherche (contacts, transactions, tâches, cultures)")
         print("0. Quitter l'application")
 
         choix = input("Votre choix : ")
@@ -1412,12 +3634,595 @@ def menu_principal():
             gerer_equipements_menu()
         elif choix == '10':
             gerer_fournisseurs_clients_menu() # Appel du nouveau menu de gestion
+        elif choix == '11':
+            requete = input("Mots à rechercher (tous requis, 'mot*' pour un début de mot) : ")
+            domaine = input(f"Domaine ({', '.join(DOMAINES_RECHERCHE)}) ou vide pour tous : ").strip().lower()
+            afficher_resultats_recherche(requete, [domaine] if domaine else None)
         elif choix == '0':
             print("Merci d'avoir utilisé le système de gestion de ferme. À bientôt !")
             break
         else:
             print("Choix invalide. Veuillez entrer un numéro valide.")
 
+# --- Serveur HTTP/JSON (tablettes et bureau sur les mêmes données) ---
+# GET <chemin>[?paramètres] : lecture ; POST <chemin> avec un objet JSON : appel de la fonction de la
+# table avec cet objet comme arguments nommés (ex. POST /stock/vente {"nom_article": "Maïs",
+# "quantite_vendue": 3, "prix_unitaire": 250}). Réponse : {'ok', 'resultat', 'messages'}.
+# Les fonctions de l'application partagent le cache, les index et l'unité de travail : elles
+# s'exécutent une à la fois sous _verrou_donnees (créé avec le serveur), ce qui sérialise aussi les écritures des fichiers.
+# Les réponses de lecture sont gardées déjà encodées avec les versions des fichiers dont elles
+# dépendent (voir _versions_dependances) : une lecture répétée ne fait qu'une comparaison, sous le
+# court _verrou_reponses seulement, sans attendre un calcul ou une écriture en cours.
+_verrou_donnees = None
+_verrou_reponses = None
+
+def _reponse_capturee(fonction, *args, **kwargs):
+    # Les messages affichés par les fonctions de l'application deviennent 'messages'
+    sortie = io.StringIO()
+    with redirect_stdout(sortie):
+        resultat = fonction(*args, **kwargs)
+    return {'ok': resultat is not False, # Les fonctions de l'application renvoient False en cas d'échec
+            'resultat': None if isinstance(resultat, bool) else resultat,
+            'messages': [ligne for ligne in sortie.getvalue().splitlines() if ligne.strip()]}
+
+LIMITE_TRANSACTIONS_SERVEUR = 100 # Taille de page par défaut : l'historique n'est jamais renvoyé en entier
+
+def _transactions_demandees(parametres):
+    # GET /finance/transactions?type=depense&debut=2024-01-01&fin=2024-03-31&desc=1&offset=0&limite=50
+    # Réponse : la page {'enregistrements', 'total' (None), 'offset', 'suivant'} de lister_transactions
+    try:
+        offset = int(parametres.get('offset', 0))
+        limite = int(parametres.get('limite', LIMITE_TRANSACTIONS_SERVEUR))
+    except ValueError:
+        print("Les paramètres 'offset' et 'limite' doivent être des nombres entiers.")
+        return False
+    if offset < 0 or limite < 1:
+        print("'offset' doit être positif et 'limite' au moins 1.")
+        return False
+    try:
+        return lister_transactions(parametres.get('type'), parametres.get('debut'), parametres.get('fin'),
+                                   parametres.get('desc') in ('1', 'true'), offset, limite)
+    except ValueError:
+        print("Format de date invalide. Veuillez utiliser AAAA-MM-JJ.")
+        return False
+
+# Paramètres de liste : tri, desc=1, offset, limite, champ_date/debut/fin ; tout autre paramètre est un filtre
+# sur le champ du même nom (ex. GET /animaux?type=Poule&tri=nom_id&limite=20). Sans offset ni limite,
+# la réponse reste la liste complète ; sinon c'est la page {'enregistrements', 'total', 'offset', 'suivant'}.
+PARAMETRES_LISTE = ('tri', 'desc', 'offset', 'limite', 'champ_date', 'debut', 'fin')
+
+def _liste_demandee(fichier, alias=None):
+    # alias : nom de paramètre -> champ filtré (ex. 'type' -> 'type_contact' pour /contacts)
+    def lister(parametres):
+        try:
+            offset = int(parametres.get('offset', 0))
+            limite = int(parametres['limite']) if 'limite' in parametres else None
+        except ValueError:
+            print("Les paramètres 'offset' et 'limite' doivent être des nombres entiers.")
+            return False
+        periode = None
+        if 'champ_date' in parametres:
+            if any(parametres.get(b) and _analyser_date(parametres[b]) is None for b in ('debut', 'fin')):
+                print("Format de date invalide. Veuillez utiliser AAAA-MM-JJ.")
+                return False
+            periode = (parametres['champ_date'], parametres.get('debut'), parametres.get('fin'))
+        filtres = {(alias or {}).get(champ, champ): valeur for champ, valeur in parametres.items() if champ not in PARAMETRES_LISTE}
+        page = lister_enregistrements(fichier, filtres, periode, parametres.get('tri'), parametres.get('desc') in ('1', 'true'), offset, limite)
+        return page if 'offset' in parametres or limite is not None else page['enregistrements']
+    return lister
+
+def _recherche_demandee(parametres):
+    # GET /recherche?q=engr*+uree&dans=contacts,taches&limite=20
+    try:
+        limite = int(parametres['limite']) if 'limite' in parametres else None
+    except ValueError:
+        print("Le paramètre 'limite' doit être un nombre entier.")
+        return False
+    domaines = [d.strip() for d in parametres.get('dans', '').split(',') if d.strip()]
+    return rechercher_texte(parametres.get('q', ''), domaines, limite)
+
+# chemin -> (fichiers dont dépend la réponse, dépend aussi de la date du jour, fonction(paramètres))
+ROUTES_LECTURE = {
+    '/stock': ([STOCK_FILE], False, _liste_demandee(STOCK_FILE)),
+    '/finance/solde': ([FINANCE_FILE], False, lambda p: get_solde_actuel()),
+    '/finance/transactions': ([FINANCE_FILE], False, _transactions_demandees),
+    '/finance/rapport': ([FINANCE_FILE], False, lambda p: _valeur_ou_echec(calculer_profits_pertes(p['debut'], p['fin']))),
+    '/finance/depenses': ([FINANCE_FILE, CATEGORIES_DEPENSES_FILE], False,
+                          lambda p: _valeur_ou_echec(calculer_depenses_par_categorie(p['debut'], p['fin']))),
+    '/animaux': ([ANIMAUX_FILE], False, _liste_demandee(ANIMAUX_FILE)),
+    '/cultures': ([CULTURES_FILE], False, _liste_demandee(CULTURES_FILE)),
+    '/ouvriers': ([OUVRIERS_FILE], False, _liste_demandee(OUVRIERS_FILE)),
+    '/taches': ([TACHES_FILE], False, _liste_demandee(TACHES_FILE)),
+    '/equipements': ([EQUIPEMENTS_FILE], False, _liste_demandee(EQUIPEMENTS_FILE)),
+    '/contacts': ([FOURNISSEURS_CLIENTS_FILE], False, _liste_demandee(FOURNISSEURS_CLIENTS_FILE, {'type': 'type_contact'})),
+    '/recherche': (list(DOMAINES_RECHERCHE.values()), False, _recherche_demandee),
+    '/alertes': (FICHIERS_ALERTES, True, lambda p: lister_toutes_les_alertes()),
+    '/statistiques': ([COMPTEURS_FILE], False, lambda p: get_statistiques_rapides_ferme()),
+    '/tableau-de-bord': ([FINANCE_FILE, COMPTEURS_FILE] + FICHIERS_ALERTES, True, lambda p: instantane_tableau_de_bord()),
+}
+# chemin -> fonction appelée avec le corps JSON de la requête
+ROUTES_ECRITURE = {
+    '/stock': ajouter_modifier_article,
+    '/stock/vente': enregistrer_vente,
+    '/stock/achat': enregistrer_achat,
+    '/stock/ventes-lot': enregistrer_ventes_lot,
+    '/stock/achats-lot': enregistrer_achats_lot,
+    '/finance/transaction': enregistrer_transaction,
+    '/animaux': ajouter_animal,
+    '/animaux/modifier': modifier_animal,
+    '/animaux/supprimer': supprimer_animal,
+    '/cultures': ajouter_culture,
+    '/cultures/modifier': modifier_culture,
+    '/cultures/supprimer': supprimer_culture,
+    '/ouvriers': ajouter_ouvrier,
+    '/ouvriers/supprimer': supprimer_ouvrier,
+    '/taches': ajouter_tache,
+    '/taches/statut': modifier_statut_tache,
+    '/taches/supprimer': supprimer_tache,
+    '/equipements': ajouter_equipement,
+    '/equipements/modifier': modifier_equipement,
+    '/equipements/maintenance': enregistrer_maintenance_reparation,
+    '/equipements/supprimer': supprimer_equipement,
+    '/contacts': ajouter_contact,
+    '/contacts/modifier': modifier_contact,
+    '/contacts/supprimer': supprimer_contact,
+}
+# Type attendu de chaque argument du corps JSON ; les autres arguments sont du texte.
+# Vérifié avant l'appel : une fonction ne doit jamais commencer une écriture avec une valeur d'un autre type.
+_ENTIERS = (int,)
+_NOMBRES = (int, float)
+TYPES_ARGUMENTS_ECRITURE = {
+    'quantite': _ENTIERS, 'quantite_vendue': _ENTIERS, 'quantite_achetee': _ENTIERS, 'seuil_alerte': _ENTIERS,
+    'ouvrier_id': _ENTIERS, 'ouvrier_assigne_id': _ENTIERS, 'tache_id': _ENTIERS,
+    'equipement_id': _ENTIERS, 'contact_id': _ENTIERS,
+    'prix_unitaire': _NOMBRES, 'montant': _NOMBRES, 'cout': _NOMBRES, 'cout_achat': _NOMBRES,
+    'nouveau_cout_achat': _NOMBRES, 'surface_ou_quantite': _NOMBRES, 'nouvelle_surface_ou_quantite': _NOMBRES,
+    'est_nouvel_article': (bool,),
+    'ventes': (list,), 'achats': (list,), # Contenu des lignes vérifié par _verifier_lot
+}
+TAILLE_MAX_REPONSES_SERVEUR = 256 # Réponses de lecture gardées (chemin + paramètres)
+_reponses_serveur = {} # (chemin, paramètres) -> (versions, corps encodé)
+
+def _valeur_ou_echec(valeur):
+    return valeur if valeur is not None else False
+
+def _encoder_reponse(reponse):
+    return json.dumps(reponse, ensure_ascii=False, default=str).encode('utf-8')
+
+def _repondre_lecture(chemin, parametres):
+    fichiers, depend_du_jour, calculer = ROUTES_LECTURE[chemin]
+    cle = (chemin, tuple(sorted(parametres.items())))
+    with _verrou_reponses:
+        entree = _reponses_serveur.get(cle)
+    # Une écriture en cours change au moins une version : la réponse gardée n'est alors plus servie
+    if entree is not None and entree[0] == _versions_dependances(fichiers, depend_du_jour):
+        return entree[1]
+    with _verrou_donnees:
+        with _verrou_reponses:
+            entree = _reponses_serveur.get(cle)
+        versions = _versions_dependances(fichiers, depend_du_jour)
+        if entree is not None and entree[0] == versions:
+            return entree[1] # Calculée par une autre requête pendant l'attente
+        # Encodé sous le verrou : le résultat référence les données en cache, qu'une écriture modifierait
+        corps = _encoder_reponse(_reponse_capturee(calculer, parametres))
+        # Versions relevées après le calcul : le chargement des fichiers incrémente leur génération
+        versions = _versions_dependances(fichiers, depend_du_jour)
+    with _verrou_reponses:
+        if len(_reponses_serveur) >= TAILLE_MAX_REPONSES_SERVEUR:
+            _reponses_serveur.clear()
+        _reponses_serveur[cle] = (versions, corps)
+    return corps
+
+def _verifier_arguments(fonction, arguments):
+    # Message d'erreur si le corps ne correspond pas à la fonction, None sinon
+    import inspect # Seulement pour le mode serveur
+    signature = inspect.signature(fonction)
+    try:
+        signature.bind(**arguments)
+    except TypeError as e: # Argument inconnu ou manquant
+        return str(e)
+    for nom, valeur in arguments.items():
+        types = TYPES_ARGUMENTS_ECRITURE.get(nom, (str,))
+        if valeur is None:
+            if signature.parameters[nom].default is not None:
+                return f"'{nom}' ne peut pas être null."
+        elif not isinstance(valeur, types) or (isinstance(valeur, bool) and bool not in types):
+            attendu = {_ENTIERS: "un entier", _NOMBRES: "un nombre", (bool,): "un booléen", (list,): "une liste"}.get(types, "du texte")
+            return f"'{nom}' doit être {attendu}."
+    return None
+
+def _repondre_ecriture(chemin, arguments):
+    with _verrou_donnees:
+        return _encoder_reponse(_reponse_capturee(ROUTES_ECRITURE[chemin], **arguments))
+
+def _creer_serveur(hote, port):
+    global _verrou_donnees, _verrou_reponses
+    import threading # Seulement pour le mode serveur
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qsl, urlsplit
+    if _verrou_donnees is None:
+        _verrou_donnees = threading.RLock()
+        _verrou_reponses = threading.Lock()
+
+    class GestionnaireRequetes(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # Connexions gardées ouvertes entre les requêtes d'un même poste
+
+        def _envoyer(self, code, corps):
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(corps)))
+            self.end_headers()
+            self.wfile.write(corps)
+
+        def _erreur(self, code, message):
+            self._envoyer(code, _encoder_reponse({'ok': False, 'resultat': None, 'messages': [message]}))
+
+        def do_GET(self):
+            adresse = urlsplit(self.path)
+            if adresse.path not in ROUTES_LECTURE:
+                return self._erreur(404, f"Chemin inconnu : {adresse.path}")
+            try:
+                self._envoyer(200, _repondre_lecture(adresse.path, dict(parse_qsl(adresse.query))))
+            except KeyError as e:
+                self._erreur(400, f"Paramètre manquant : {e}")
+            except Exception as e: # Jamais de connexion fermée sans réponse
+                self._erreur(500, f"Erreur interne : {e}")
+
+        def do_POST(self):
+            adresse = urlsplit(self.path)
+            if adresse.path not in ROUTES_ECRITURE:
+                return self._erreur(404, f"Chemin inconnu : {adresse.path}")
+            try:
+                arguments = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            except ValueError:
+                return self._erreur(400, "Corps JSON invalide.")
+            if not isinstance(arguments, dict):
+                return self._erreur(400, "Le corps doit être un objet JSON.")
+            erreur = _verifier_arguments(ROUTES_ECRITURE[adresse.path], arguments)
+            if erreur:
+                return self._erreur(400, f"Arguments invalides : {erreur}")
+            try:
+                self._envoyer(200, _repondre_ecriture(adresse.path, arguments))
+            except Exception as e: # Jamais de connexion fermée sans réponse
+                self._erreur(500, f"Erreur interne : {e}")
+
+        def log_message(self, format, *args):
+            pass # Pas de ligne par requête sur la console
+
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireRequetes)
+    serveur.daemon_threads = True
+    return serveur
+
+def demarrer_serveur(hote='127.0.0.1', port=8080):
+    # Les écritures ne demandent pas d'authentification : seul ce poste y a accès par défaut.
+    # hote='0.0.0.0' ouvre le serveur aux tablettes du réseau local.
+    afficher_ids_renumerotes(migrer_ids_en_double()) # Sur la console, avant la première requête
+    serveur = _creer_serveur(hote, port)
+    print(f"Serveur de la ferme à l'écoute sur http://{hote}:{port} (Ctrl+C pour arrêter).")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+
+# --- Ligne de commande (tâches planifiées, scripts) ---
+# python Ferme_app.py <domaine> <action> [arguments] [--json] ; sans argument, le menu interactif est lancé.
+# Chaque sous-commande appelle directement les fonctions ci-dessus, sans initialisation ni menu :
+# seuls les fichiers qu'elle lit sont chargés (et ceux à id, pour migrer_ids_en_double), et argparse
+# n'est importé que dans ce cas.
+# Avec --json, la sortie est un seul objet {'ok', 'resultat', 'messages'} ; 'messages' reprend les
+# lignes que les fonctions auraient affichées. Code de sortie : 0 si l'opération a réussi, 1 sinon.
+def _cli_filtres(args):
+    # --filtre champ=valeur, répétable
+    filtres = {}
+    for filtre in args.filtre or []:
+        champ, _, valeur = filtre.partition('=')
+        filtres[champ.strip()] = valeur.strip()
+    return filtres
+
+def _cli_liste(fichier, afficher, dates=True):
+    # Avec --json et sans --offset ni --limite, la liste complète ; sinon la page calculée par lister_enregistrements
+    def executer(args):
+        periode = None
+        if dates and args.champ_date:
+            if any(b and _analyser_date(b) is None for b in (args.debut, args.fin)):
+                print("Format de date invalide. Veuillez utiliser AAAA-MM-JJ.")
+                return False
+            periode = (args.champ_date, args.debut, args.fin)
+        criteres = {'tri': args.tri, 'decroissant': args.desc}
+        if periode is not None:
+            criteres['periode'] = periode
+        if not args.json:
+            return afficher(_cli_filtres(args), **criteres)
+        page = lister_enregistrements(fichier, _cli_filtres(args), offset=args.offset, limite=args.limite, **criteres)
+        return page if args.offset or args.limite is not None else page['enregistrements']
+    return executer
+
+def _cli_contacts(args):
+    if not args.json:
+        return afficher_contacts(type_filtre=args.type, tri=args.tri, decroissant=args.desc)
+    page = lister_enregistrements(FOURNISSEURS_CLIENTS_FILE, {'type_contact': args.type} if args.type else None,
+                                  tri=args.tri, decroissant=args.desc, offset=args.offset, limite=args.limite)
+    return page if args.offset or args.limite is not None else page['enregistrements']
+
+def _cli_transactions(args):
+    for borne in (args.debut, args.fin):
+        if borne and _analyser_date(borne) is None:
+            print("Format de date invalide. Veuillez utiliser AAAA-MM-JJ.")
+            return False
+    if not args.json:
+        return afficher_transactions_financieres(args.type, args.debut, args.fin, args.desc)
+    infos = {}
+    page = lister_transactions(args.type, args.debut, args.fin, args.desc, args.offset, args.limite, infos)
+    if args.offset or args.limite is not None or args.type or args.debut or args.fin:
+        return dict(page, solde=_solde_en_continu(infos))
+    return {'transactions': page['enregistrements'], 'solde': _solde_en_continu(infos)}
+
+def _cli_alertes(args):
+    alertes = lister_toutes_les_alertes()
+    return alertes if args.json else afficher_toutes_les_alertes(alertes) or True # Des alertes ne sont pas un échec
+
+def _cli_statistiques(args):
+    stats = get_statistiques_rapides_ferme()
+    if not args.json:
+        for cle, valeur in stats.items():
+            print(f"{cle} : {valeur}")
+    return stats
+
+def _cli_rapport(calculer, afficher):
+    def executer(args):
+        if args.json:
+            resultat = calculer(args.debut, args.fin)
+            return resultat if resultat is not None else False # None : dates invalides
+        if _periode_rapport(args.debut, args.fin) is None:
+            return False
+        return afficher(args.debut, args.fin)
+    return executer
+
+def _cli_historique(args):
+    equipement = _rechercher(EQUIPEMENTS_FILE, charger_donnees(EQUIPEMENTS_FILE), 'id', args.id)
+    if equipement is None:
+        print(f"Erreur : Équipement avec l'ID '{args.id}' non trouvé.")
+        return False
+    if not args.json:
+        return afficher_historique_maintenance(args.id)
+    return equipement.get('historique_maintenance', []) + operations_maintenance(args.id)
+
+def _cli_recompter(args):
+    compteurs = recompter_statistiques()
+    if compteurs is not False and not args.json:
+        print("Statistiques recomptées à partir des données.")
+    return compteurs
+
+def _cli_import(genre):
+    def executer(args):
+        resultat = importer_donnees(genre, args.chemin)
+        if not args.json:
+            _afficher_resultat_import(resultat)
+        return resultat if resultat is not None else False
+    return executer
+
+def _cli_parseur():
+    import argparse # Seulement pour la ligne de commande : le menu n'en a pas besoin
+
+    parseur = argparse.ArgumentParser(prog='Ferme_app.py', description="Gestion de ferme en ligne de commande (sans argument : menu interactif).")
+    commun = argparse.ArgumentParser(add_help=False)
+    commun.add_argument('--json', action='store_true', help="Sortie JSON (un seul objet)")
+    domaines = parseur.add_subparsers(dest='domaine', required=True, metavar='domaine')
+
+    def commande(parent, nom, executer, aide=None):
+        sous = parent.add_parser(nom, parents=[commun], help=aide)
+        sous.set_defaults(executer=executer)
+        return sous
+
+    def domaine(nom, aide):
+        return domaines.add_parser(nom, help=aide).add_subparsers(dest='action', required=True, metavar='action')
+
+    def periode(sous):
+        sous.add_argument('--debut', required=True, help="AAAA-MM-JJ")
+        sous.add_argument('--fin', required=True, help="AAAA-MM-JJ (incluse)")
+
+    def pagination(sous, tri=True):
+        if tri:
+            sous.add_argument('--tri', metavar='CHAMP', help="Champ de tri")
+        sous.add_argument('--desc', action='store_true', help="Ordre décroissant")
+        sous.add_argument('--offset', type=int, default=0, help="Avec --json : première ligne renvoyée")
+        sous.add_argument('--limite', type=int, help="Avec --json : nombre de lignes renvoyées")
+        return sous
+
+    def liste(parent, fichier, afficher, dates=True):
+        sous = pagination(commande(parent, 'lister', _cli_liste(fichier, afficher, dates)))
+        sous.add_argument('--filtre', action='append', metavar='CHAMP=VALEUR', help="Filtre (répétable)")
+        if dates:
+            sous.add_argument('--champ-date', metavar='CHAMP', help="Champ de date pour --debut/--fin")
+            sous.add_argument('--debut', help="AAAA-MM-JJ")
+            sous.add_argument('--fin', help="AAAA-MM-JJ (incluse)")
+
+    commande(domaines, 'tableau-de-bord', lambda a: instantane_tableau_de_bord() if a.json else afficher_tableau_de_bord(), "Aperçu rapide")
+    commande(domaines, 'alertes', _cli_alertes, "Toutes les alertes en cours")
+    commande(domaines, 'statistiques', _cli_statistiques, "Statistiques rapides")
+    sous = commande(domaines, 'rechercher', lambda a: rechercher_texte(' '.join(a.mots), a.dans, a.limite) if a.json
+                    else afficher_resultats_recherche(' '.join(a.mots), a.dans, a.limite), "Recherche plein texte")
+    sous.add_argument('mots', nargs='+', help="Mots tous requis ; 'mot*' pour un début de mot")
+    sous.add_argument('--dans', action='append', choices=list(DOMAINES_RECHERCHE), help="Domaine (répétable, tous par défaut)")
+    sous.add_argument('--limite', type=int, help="Résultats par domaine")
+
+    stock = domaine('stock', "Gestion du stock")
+    liste(stock, STOCK_FILE, afficher_stocks, dates=False)
+    sous = commande(stock, 'ajouter', lambda a: ajouter_modifier_article(a.nom, a.quantite, a.seuil), "Ajouter ou modifier un article")
+    sous.add_argument('nom')
+    sous.add_argument('quantite', type=int)
+    sous.add_argument('--seuil', type=int, default=5)
+    sous = commande(stock, 'vente', lambda a: enregistrer_vente(a.nom, a.quantite, a.prix, a.client))
+    sous.add_argument('nom')
+    sous.add_argument('quantite', type=int)
+    sous.add_argument('prix', type=float, help="Prix unitaire (XOF)")
+    sous.add_argument('--client')
+    sous = commande(stock, 'achat', lambda a: enregistrer_achat(a.nom, a.quantite, a.prix, a.nouveau, a.seuil, a.fournisseur))
+    sous.add_argument('nom')
+    sous.add_argument('quantite', type=int)
+    sous.add_argument('prix', type=float, help="Prix unitaire (XOF)")
+    sous.add_argument('--nouveau', action='store_true', help="Créer l'article s'il n'existe pas")
+    sous.add_argument('--seuil', type=int, default=5)
+    sous.add_argument('--fournisseur')
+    commande(stock, 'importer', _cli_import('stock')).add_argument('chemin')
+
+    finance = domaine('finance', "Gestion financière")
+    commande(finance, 'solde', lambda a: get_solde_actuel() if a.json else print(f"Solde Actuel : {get_solde_actuel():,.2f} XOF"))
+    sous = pagination(commande(finance, 'transactions', _cli_transactions), tri=False)
+    sous.add_argument('--type', choices=['recette', 'depense'])
+    sous.add_argument('--debut', help="AAAA-MM-JJ")
+    sous.add_argument('--fin', help="AAAA-MM-JJ (incluse)")
+    sous = commande(finance, 'transaction', lambda a: enregistrer_transaction(a.type, a.montant, a.description))
+    sous.add_argument('type', choices=['recette', 'depense'])
+    sous.add_argument('montant', type=float)
+    sous.add_argument('description')
+    periode(commande(finance, 'rapport', _cli_rapport(calculer_profits_pertes, generer_rapport_profits_pertes), "Profits et pertes"))
+    periode(commande(finance, 'depenses', _cli_rapport(calculer_depenses_par_categorie, analyser_depenses_par_categorie), "Dépenses par catégorie"))
+    commande(finance, 'importer', _cli_import('transactions')).add_argument('chemin')
+    commande(finance, 'compacter', lambda a: compacter_journal_finance(), "Intégrer le journal dans finance.json")
+
+    animaux = domaine('animaux', "Gestion des animaux")
+    liste(animaux, ANIMAUX_FILE, afficher_animaux)
+    sous = commande(animaux, 'ajouter', lambda a: ajouter_animal(a.nom_id, a.type, a.date_naissance, a.sexe, a.etat_sante, a.vaccin, a.vermifuge))
+    sous.add_argument('nom_id')
+    sous.add_argument('type')
+    sous.add_argument('date_naissance', help="AAAA-MM-JJ")
+    sous.add_argument('sexe')
+    sous.add_argument('--etat-sante', default="Bon")
+    sous.add_argument('--vaccin', help="Date du prochain vaccin")
+    sous.add_argument('--vermifuge', help="Date du prochain vermifuge")
+    sous = commande(animaux, 'modifier', lambda a: modifier_animal(a.nom_id, a.type, a.date_naissance, a.sexe, a.etat_sante, a.vaccin, a.vermifuge))
+    sous.add_argument('nom_id')
+    sous.add_argument('--type')
+    sous.add_argument('--date-naissance', help="AAAA-MM-JJ")
+    sous.add_argument('--sexe')
+    sous.add_argument('--etat-sante')
+    sous.add_argument('--vaccin', help="Date du prochain vaccin")
+    sous.add_argument('--vermifuge', help="Date du prochain vermifuge")
+    commande(animaux, 'supprimer', lambda a: supprimer_animal(a.nom_id)).add_argument('nom_id')
+    commande(animaux, 'importer', _cli_import('animaux')).add_argument('chemin')
+
+    cultures = domaine('cultures', "Gestion des cultures")
+    liste(cultures, CULTURES_FILE, afficher_cultures)
+    sous = commande(cultures, 'ajouter', lambda a: ajouter_culture(a.nom_parcelle, a.type_culture, a.date_semis, a.recolte, a.statut, a.surface, a.unite))
+    sous.add_argument('nom_parcelle')
+    sous.add_argument('type_culture')
+    sous.add_argument('date_semis', help="AAAA-MM-JJ")
+    sous.add_argument('--recolte', help="Date de récolte estimée")
+    sous.add_argument('--statut', default="En croissance")
+    sous.add_argument('--surface', type=float)
+    sous.add_argument('--unite', default="m²")
+    sous = commande(cultures, 'modifier', lambda a: modifier_culture(a.nom_parcelle, a.type, a.date_semis, a.recolte, a.statut, a.surface, a.unite))
+    sous.add_argument('nom_parcelle')
+    sous.add_argument('--type')
+    sous.add_argument('--date-semis', help="AAAA-MM-JJ")
+    sous.add_argument('--recolte', help="Date de récolte estimée")
+    sous.add_argument('--statut')
+    sous.add_argument('--surface', type=float)
+    sous.add_argument('--unite')
+    commande(cultures, 'supprimer', lambda a: supprimer_culture(a.nom_parcelle)).add_argument('nom_parcelle')
+    commande(cultures, 'importer', _cli_import('cultures')).add_argument('chemin')
+
+    ouvriers = domaine('ouvriers', "Gestion des ouvriers")
+    liste(ouvriers, OUVRIERS_FILE, afficher_ouvriers, dates=False)
+    sous = commande(ouvriers, 'ajouter', lambda a: ajouter_ouvrier(a.nom, a.contact, a.role))
+    sous.add_argument('nom')
+    sous.add_argument('contact')
+    sous.add_argument('role')
+    commande(ouvriers, 'supprimer', lambda a: supprimer_ouvrier(a.id)).add_argument('id', type=int)
+
+    taches = domaine('taches', "Gestion des tâches")
+    liste(taches, TACHES_FILE, afficher_taches)
+    sous = commande(taches, 'ajouter', lambda a: ajouter_tache(a.nom, a.description, a.date_limite, a.ouvrier))
+    sous.add_argument('nom')
+    sous.add_argument('description')
+    sous.add_argument('date_limite', help="AAAA-MM-JJ")
+    sous.add_argument('--ouvrier', type=int, help="ID de l'ouvrier assigné")
+    sous = commande(taches, 'statut', lambda a: modifier_statut_tache(a.id, a.statut))
+    sous.add_argument('id', type=int)
+    sous.add_argument('statut')
+    commande(taches, 'supprimer', lambda a: supprimer_tache(a.id)).add_argument('id', type=int)
+    sous = commande(taches, 'ouvrier', lambda a: lister_taches_ouvrier(a.id, a.statut) if a.json else afficher_taches_ouvrier(a.id, a.statut),
+                    "Tâches assignées à un ouvrier")
+    sous.add_argument('id', type=int, help="ID de l'ouvrier")
+    sous.add_argument('--statut')
+
+    equipements = domaine('equipements', "Gestion des équipements")
+    liste(equipements, EQUIPEMENTS_FILE, afficher_equipements)
+    sous = commande(equipements, 'ajouter', lambda a: ajouter_equipement(a.nom, a.type, a.date_achat, a.cout, a.etat, a.prochaine_maintenance))
+    sous.add_argument('nom')
+    sous.add_argument('type')
+    sous.add_argument('date_achat', help="AAAA-MM-JJ")
+    sous.add_argument('cout', type=float, help="Coût d'achat (XOF)")
+    sous.add_argument('--etat', default="Fonctionnel")
+    sous.add_argument('--prochaine-maintenance', help="AAAA-MM-JJ")
+    sous = commande(equipements, 'modifier', lambda a: modifier_equipement(a.id, a.nom, a.type, a.date_achat, a.cout, a.etat, a.prochaine_maintenance))
+    sous.add_argument('id', type=int)
+    sous.add_argument('--nom')
+    sous.add_argument('--type')
+    sous.add_argument('--date-achat', help="AAAA-MM-JJ")
+    sous.add_argument('--cout', type=float, help="Coût d'achat (XOF)")
+    sous.add_argument('--etat')
+    sous.add_argument('--prochaine-maintenance', help="AAAA-MM-JJ")
+    commande(equipements, 'supprimer', lambda a: supprimer_equipement(a.id)).add_argument('id', type=int)
+    commande(equipements, 'historique', _cli_historique, "Historique de maintenance").add_argument('id', type=int)
+    sous = commande(equipements, 'maintenance', lambda a: enregistrer_maintenance_reparation(a.id, a.date, a.description, a.cout))
+    sous.add_argument('id', type=int)
+    sous.add_argument('date', help="AAAA-MM-JJ")
+    sous.add_argument('description')
+    sous.add_argument('--cout', type=float, default=0.0)
+
+    contacts = domaine('contacts', "Fournisseurs et clients")
+    sous = pagination(commande(contacts, 'lister', _cli_contacts))
+    sous.add_argument('--type', choices=['fournisseur', 'client'])
+    sous = commande(contacts, 'ajouter', lambda a: ajouter_contact(a.nom_entreprise, a.type_contact, a.personne, a.telephone, a.email, a.adresse, a.notes))
+    sous.add_argument('nom_entreprise')
+    sous.add_argument('type_contact', choices=['fournisseur', 'client'])
+    sous.add_argument('--personne', help="Personne à contacter")
+    sous.add_argument('--telephone')
+    sous.add_argument('--email')
+    sous.add_argument('--adresse')
+    sous.add_argument('--notes')
+    sous = commande(contacts, 'modifier', lambda a: modifier_contact(a.id, a.nom_entreprise, a.type_contact, a.personne, a.telephone, a.email, a.adresse, a.notes))
+    sous.add_argument('id', type=int)
+    sous.add_argument('--nom-entreprise')
+    sous.add_argument('--type-contact', choices=['fournisseur', 'client'])
+    sous.add_argument('--personne', help="Personne à contacter")
+    sous.add_argument('--telephone')
+    sous.add_argument('--email')
+    sous.add_argument('--adresse')
+    sous.add_argument('--notes')
+    commande(contacts, 'supprimer', lambda a: supprimer_contact(a.id)).add_argument('id', type=int)
+
+    sous = commande(domaines, 'serveur', lambda a: demarrer_serveur(a.hote, a.port), "Serveur HTTP/JSON")
+    sous.add_argument('--hote', default='127.0.0.1', help="0.0.0.0 pour le réseau local (écritures sans authentification)")
+    sous.add_argument('--port', type=int, default=8080)
+
+    rapports = domaine('rapports', "Rapports et statistiques")
+    commande(rapports, 'recompter', _cli_recompter, "Recompter les statistiques à partir des données")
+
+    stockage = domaine('stockage', "Stockage des données")
+    commande(stockage, 'migrer-sqlite', lambda a: migrer_json_vers_sqlite(), f"Importer les fichiers JSON dans '{SQLITE_FILE}'")
+    return parseur
+
+def _cli_executer(args):
+    # Avec --json, les renumérotations signalées rejoignent 'messages'
+    afficher_ids_renumerotes(migrer_ids_en_double())
+    return args.executer(args)
+
+def executer_ligne_de_commande(arguments):
+    args = _cli_parseur().parse_args(arguments)
+    if not args.json:
+        return 0 if _cli_executer(args) is not False else 1
+
+    reponse = _reponse_capturee(_cli_executer, args)
+    print(json.dumps(reponse, ensure_ascii=False, default=str))
+    return 0 if reponse['ok'] else 1
+
 # --- Point d'entrée du programme ---
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(executer_ligne_de_commande(sys.argv[1:]))
     menu_principal()
@@ -0,0 +1,32 @@
+import contextlib
+import importlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Ferme_app
+
+
+class DonneesTemporaires(unittest.TestCase):
+    # Chaque test travaille dans un dossier vide avec un module rechargé (caches et index remis à zéro)
+    def setUp(self):
+        self._dossier = tempfile.TemporaryDirectory()
+        self._precedent = os.getcwd()
+        os.chdir(self._dossier.name)
+        self.F = importlib.reload(Ferme_app)
+        self.appeler(self.F.initialiser_fichiers_donnees)
+
+    def tearDown(self):
+        if self.F._verrou['fichier'] is not None:
+            self.F._verrou['fichier'].close()
+        os.chdir(self._precedent)
+        self._dossier.cleanup()
+
+    def appeler(self, fonction, *args, **kwargs):
+        # Les fonctions de l'application affichent leurs messages : ils sont gardés dans self.sortie
+        self.sortie = io.StringIO()
+        with contextlib.redirect_stdout(self.sortie):
+            return fonction(*args, **kwargs)
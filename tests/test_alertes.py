@@ -0,0 +1,128 @@
+import json
+from datetime import date, timedelta
+
+from tests.base import DonneesTemporaires
+
+
+def jour(decalage):
+    return (date.today() + timedelta(days=decalage)).strftime('%Y-%m-%d')
+
+
+class AlertesEcheances(DonneesTemporaires):
+    def test_en_retard_puis_a_venir_avec_les_messages_habituels(self):
+        F = self.F
+        self.appeler(F.ajouter_animal, 'V1', 'Vache', '2020-01-01', 'F', date_prochain_vaccin=jour(-2), date_prochain_vermifuge=jour(5))
+        self.appeler(F.ajouter_animal, 'V2', 'Vache', '2020-01-01', 'F', date_prochain_vaccin=jour(30))
+        self.appeler(F.ajouter_equipement, 'Tracteur', 'Engin', '2020-01-01', 1000.0, prochaine_maintenance=jour(20))
+        self.appeler(F.ajouter_tache, 'Clôture', 'Réparer', jour(1))
+        alertes = self.appeler(F.lister_toutes_les_alertes)
+        # "dans N jours" compte les jours pleins depuis maintenant, comme avant l'index des échéances
+        self.assertEqual(alertes[0], f"🔴 URGENCE SANTÉ : Vaccin en retard pour 'V1' (Vache) ! Date prévue: {jour(-2)}")
+        self.assertIn("🟠 ALERTE TÂCHE : Tâche 'Clôture' arrive à échéance le " + jour(1) + " (dans 0 jours). Assignée à 'Non assigné'.", alertes)
+        self.assertIn(f"🟠 ALERTE SANTÉ : Vermifuge à prévoir pour 'V1' (Vache) avant le {jour(5)} (dans 4 jours).", alertes)
+        self.assertTrue(any('Tracteur' in a for a in alertes))
+        self.assertFalse(any("'V2'" in a for a in alertes)) # Au-delà du délai de 7 jours
+        self.assertEqual(len(self.appeler(F.generer_alertes_sante_animale, 30)), 3)
+
+    def test_statut_absent_ou_nul_ignore(self):
+        F = self.F
+        taches = [{'id': 1, 'nom': 'A', 'description': '', 'date_limite': jour(-1), 'statut': None},
+                  {'id': 2, 'nom': 'B', 'description': '', 'date_limite': jour(-1)},
+                  {'id': 3, 'nom': 'C', 'description': '', 'date_limite': jour(-1), 'statut': 'En cours'}]
+        with open(F.TACHES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(taches, f)
+        F.vider_cache_donnees()
+        alertes = self.appeler(F.generer_alertes_taches)
+        self.assertEqual(len(alertes), 1)
+        self.assertIn("'C'", alertes[0])
+
+    def ecrire_taches_en_double(self, premiere_date):
+        # Anciennes données : deux tâches avec le même identifiant
+        F = self.F
+        taches = [{'id': 3, 'nom': 'A', 'description': '', 'date_limite': premiere_date, 'statut': 'En cours'},
+                  {'id': 3, 'nom': 'B', 'description': '', 'date_limite': '2020-01-05', 'statut': 'En cours'}]
+        with open(F.TACHES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(taches, f)
+        F.vider_cache_donnees()
+
+    def test_identifiants_en_double_avec_date_vide(self):
+        self.ecrire_taches_en_double('')
+        self.assertEqual(self.appeler(self.F.executer_ligne_de_commande, ['alertes', '--json']), 0)
+        alertes = json.loads(self.sortie.getvalue())['resultat']
+        self.assertEqual(len(alertes), 1)
+        self.assertIn("'B'", alertes[0])
+
+    def test_identifiants_en_double_chacun_son_alerte(self):
+        self.ecrire_taches_en_double('2020-01-03')
+        alertes = self.appeler(self.F.generer_alertes_taches)
+        self.assertEqual(len(alertes), 2)
+        self.assertIn("'A'", alertes[0])
+        self.assertIn("'B'", alertes[1])
+
+
+class AlertesIncrementales(DonneesTemporaires):
+    def setUp(self):
+        super().setUp()
+        F = self.F
+        for i in range(20):
+            self.appeler(F.ajouter_animal, f'A{i}', 'Vache', '2020-01-01', 'F', date_prochain_vaccin=jour(30 + i))
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 5)
+        self.appeler(F.ajouter_tache, 'Clôture', 'Réparer', jour(2))
+        self.assertEqual(len(self.appeler(F.lister_toutes_les_alertes)), 1) # La tâche seulement
+        self.etat = F._etat_alertes_ferme
+
+    def verifier_sans_reconstruction(self):
+        # Les modifications ont mis à jour l'état en place, sans le reconstruire depuis les collections
+        alertes = self.appeler(self.F.lister_toutes_les_alertes)
+        self.assertIs(self.F._etat_alertes_ferme, self.etat)
+        return alertes
+
+    def test_seuls_les_enregistrements_modifies_changent_leurs_alertes(self):
+        F = self.F
+        self.appeler(F.modifier_animal, 'A3', nouvelle_date_prochain_vaccin=jour(-1))
+        self.appeler(F.enregistrer_vente, 'Maïs', 6, 10.0)
+        self.appeler(F.modifier_statut_tache, 1, 'Terminée')
+        alertes = self.verifier_sans_reconstruction()
+        self.assertEqual(alertes, ["ALERTE STOCK : Le stock de 'Maïs' est de 4 (seuil: 5).",
+                                   f"🔴 URGENCE SANTÉ : Vaccin en retard pour 'A3' (Vache) ! Date prévue: {jour(-1)}"])
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 50, 5)
+        self.appeler(F.modifier_statut_tache, 1, 'En cours')
+        alertes = self.verifier_sans_reconstruction()
+        self.assertEqual(len(alertes), 2)
+        self.assertIn('Clôture', alertes[1])
+        self.assertEqual(len(self.etat['echeances']), 21)
+
+    def test_retrait_d_un_doublon_par_identite(self):
+        F = self.F
+        taches = [{'id': 3, 'nom': 'A', 'description': '', 'date_limite': '2020-01-05', 'statut': 'En cours'},
+                  {'id': 3, 'nom': 'B', 'description': '', 'date_limite': '2020-01-05', 'statut': 'En cours'}]
+        with open(F.TACHES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(taches, f)
+        F.vider_cache_donnees()
+        self.assertEqual(len(self.appeler(F.generer_alertes_taches)), 2)
+        collection = F.charger_donnees(F.TACHES_FILE)
+        etat = F._etat_alertes_ferme
+        F._maj_alertes(F.TACHES_FILE, collection, collection[1], False)
+        collection[1]['statut'] = 'Terminée'
+        self.assertIs(F._etat_alertes_ferme, etat)
+        self.assertEqual([e[3] for e in etat['echeances'] if e[1] == 'tache'], [id(collection[0])])
+        alertes = self.appeler(F.generer_alertes_taches)
+        self.assertEqual(len(alertes), 1)
+        self.assertIn("'A'", alertes[0])
+
+    def test_passage_des_jours_sans_recalcul(self):
+        F = self.F
+        dans_trois_jours = F.datetime.now() + timedelta(days=3)
+
+        class Horloge(F.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return dans_trois_jours
+
+        vraie_datetime = F.datetime
+        F.datetime = Horloge
+        try:
+            alertes = self.verifier_sans_reconstruction()
+        finally:
+            F.datetime = vraie_datetime
+        self.assertTrue(alertes[0].startswith("🔴 URGENCE TÂCHE : Tâche 'Clôture' est en retard"))
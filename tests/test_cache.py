@@ -0,0 +1,43 @@
+import json
+
+from tests.base import DonneesTemporaires
+
+
+class CacheDonnees(DonneesTemporaires):
+    def compter_lectures(self):
+        lectures = []
+        lire = self.F._lire_json
+        self.F._lire_json = lambda fichier: lectures.append(fichier) or lire(fichier)
+        self.addCleanup(setattr, self.F, '_lire_json', lire)
+        return lectures
+
+    def test_lectures_repetees_sans_relire_le_fichier(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        F.vider_cache_donnees()
+        lectures = self.compter_lectures()
+        stocks = F.charger_donnees(F.STOCK_FILE)
+        for _ in range(5):
+            self.assertIs(F.charger_donnees(F.STOCK_FILE), stocks)
+            self.assertEqual(F.get_stock_quantite('maïs'), 10)
+        self.assertEqual(lectures, [F.STOCK_FILE])
+
+    def test_ecriture_de_l_application_garde_le_cache(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        lectures = self.compter_lectures()
+        self.appeler(F.enregistrer_vente, 'Maïs', 3, 100.0)
+        self.appeler(F.enregistrer_vente, 'Maïs', 2, 100.0)
+        self.assertEqual(F.get_stock_quantite('Maïs'), 5)
+        self.assertEqual(F.get_solde_actuel(), 500.0)
+        self.assertEqual(lectures, [F.FINANCE_FILE]) # Première vente : historique pas encore chargé
+
+    def test_fichier_modifie_par_un_autre_programme(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        generation = F.generation_donnees(F.STOCK_FILE)
+        with open(F.STOCK_FILE, 'w', encoding='utf-8') as f:
+            json.dump([{'nom': 'Maïs', 'quantite': 42, 'seuil_alerte': 2}, {'nom': 'Riz', 'quantite': 1, 'seuil_alerte': 0}], f)
+        self.assertEqual(F.get_stock_quantite('Maïs'), 42)
+        self.assertEqual(F.get_stock_quantite('Riz'), 1)
+        self.assertGreater(F.generation_donnees(F.STOCK_FILE), generation)
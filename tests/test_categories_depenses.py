@@ -0,0 +1,39 @@
+import json
+import os
+
+from tests.base import DonneesTemporaires
+
+
+class CategoriesDepenses(DonneesTemporaires):
+    def ecrire_regles(self, regles):
+        avant = os.stat(self.F.CATEGORIES_DEPENSES_FILE).st_mtime_ns
+        with open(self.F.CATEGORIES_DEPENSES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(regles, f, ensure_ascii=False)
+        os.utime(self.F.CATEGORIES_DEPENSES_FILE, ns=(avant + 10**9, avant + 10**9)) # Signature toujours différente
+
+    def test_regles_par_defaut_dans_l_ordre_des_categories(self):
+        F = self.F
+        self.assertEqual(F.categoriser_depense('Achat engrais'), 'Achats / Intrants')
+        self.assertEqual(F.categoriser_depense('SALAIRE ouvrier'), 'Salaires')
+        # Deux mots-clés : la première catégorie des règles l'emporte, quelle que soit la position
+        self.assertEqual(F.categoriser_depense('Essence pour achat de semence'), 'Achats / Intrants')
+        self.assertEqual(F.categoriser_depense('Divers'), F.CATEGORIE_DEPENSE_PAR_DEFAUT)
+
+    def test_regles_du_fichier_recompilees_quand_il_change(self):
+        F = self.F
+        self.assertEqual(F.categoriser_depense('Clôture électrique'), F.CATEGORIE_DEPENSE_PAR_DEFAUT)
+        categoriseur = F._charger_categoriseur()
+        self.assertIs(F._charger_categoriseur(), categoriseur) # Fichier inchangé : pas de recompilation
+        self.ecrire_regles({'Clôtures': ['clôture', 'grillage'], 'Salaires': ['salaire']})
+        self.assertEqual(F.categoriser_depense('Clôture électrique'), 'Clôtures')
+        self.assertEqual(F.categoriser_depense('Achat engrais'), F.CATEGORIE_DEPENSE_PAR_DEFAUT)
+        self.assertIsNot(F._charger_categoriseur(), categoriseur)
+
+    def test_rapport_par_categorie(self):
+        F = self.F
+        for montant, description in ((50.0, 'Achat semence'), (30.0, 'Carburant tracteur'), (20.0, 'Achat engrais')):
+            self.appeler(F.enregistrer_transaction, 'depense', montant, description)
+        self.appeler(F.enregistrer_transaction, 'recette', 500.0, 'Vente essence') # Les recettes ne sont pas classées
+        aujourd_hui = F.datetime.now().strftime('%Y-%m-%d')
+        categories = self.appeler(F.calculer_depenses_par_categorie, aujourd_hui, aujourd_hui)
+        self.assertEqual(categories, {'Achats / Intrants': 70.0, 'Carburant': 30.0})
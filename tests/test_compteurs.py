@@ -0,0 +1,51 @@
+import os
+
+from tests.base import DonneesTemporaires
+
+
+class Compteurs(DonneesTemporaires):
+    def remplir(self):
+        F = self.F
+        for i, type_animal in enumerate(('Poule', 'Poule', 'Vache')):
+            self.appeler(F.ajouter_animal, f'A{i}', type_animal, '2024-01-01', 'F')
+        self.appeler(F.ajouter_ouvrier, 'Awa', '0102', 'Berger')
+        for nom in ('T1', 'T2', 'T3'):
+            self.appeler(F.ajouter_tache, nom, '', '2030-01-01', 1)
+        self.appeler(F.ajouter_contact, 'Agro CI', 'client')
+        self.appeler(F.ajouter_contact, 'Semences SA', 'fournisseur')
+
+    def test_tenus_a_jour_par_chaque_modification(self):
+        F = self.F
+        self.remplir()
+        self.appeler(F.modifier_statut_tache, 2, 'Terminée')
+        self.appeler(F.supprimer_tache, 3)
+        self.appeler(F.supprimer_animal, 'A2')
+        self.appeler(F.modifier_contact, 2, nouveau_type_contact='client')
+        stats = F.get_statistiques_rapides_ferme()
+        self.assertEqual((stats['Total Animaux'], stats['Tâches En Cours'], stats['Clients Enregistrés'], stats['Fournisseurs Enregistrés']),
+                         (2, 1, 2, 0))
+        self.assertEqual(F._compteurs()[F.ANIMAUX_FILE]['type'], {'poule': 2})
+        self.assertEqual(F._compteurs(), self.appeler(F.recompter_statistiques))
+
+    def test_statistiques_sans_lire_les_collections(self):
+        F = self.F
+        self.remplir()
+        F.vider_cache_donnees()
+        lus = []
+        lire = F._lire_json
+        F._lire_json = lambda fichier: lus.append(fichier) or lire(fichier)
+        try:
+            stats = F.get_statistiques_rapides_ferme()
+        finally:
+            F._lire_json = lire
+        self.assertEqual(lus, [F.COMPTEURS_FILE])
+        self.assertEqual((stats['Total Animaux'], stats['Ouvriers Enregistrés'], stats['Tâches En Cours']), (3, 1, 3))
+
+    def test_recomptes_si_le_fichier_manque(self):
+        F = self.F
+        self.remplir()
+        F.get_statistiques_rapides_ferme() # Crée les compteurs (la première fois, à partir des collections)
+        os.remove(F.COMPTEURS_FILE)
+        F.vider_cache_donnees()
+        self.assertEqual(F.get_statistiques_rapides_ferme()['Clients Enregistrés'], 1)
+        self.assertTrue(os.path.exists(F.COMPTEURS_FILE))
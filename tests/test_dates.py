@@ -0,0 +1,43 @@
+from datetime import date, datetime
+
+from tests.base import DonneesTemporaires
+
+
+class Dates(DonneesTemporaires):
+    def test_normalisation(self):
+        F = self.F
+        self.assertEqual(F.normaliser_date('2024-3-5'), '2024-03-05')
+        self.assertEqual(F.normaliser_date(' 2024-03-05 '), '2024-03-05')
+        self.assertEqual(F.normaliser_date(date(2024, 3, 5)), '2024-03-05')
+        self.assertEqual(F.normaliser_date(datetime(2024, 3, 5, 10, 30)), '2024-03-05')
+        for invalide in ('2024-02-30', '05/03/2024', 'demain', '', None, 20240305, '2024-W10-1'):
+            with self.subTest(invalide=invalide):
+                self.assertIsNone(F.normaliser_date(invalide))
+
+    def test_dates_normalisees_a_la_saisie(self):
+        F = self.F
+        self.appeler(F.ajouter_animal, 'A1', 'Poule', '2024-1-9', 'F', date_prochain_vaccin=date(2024, 6, 1))
+        animal = F.charger_donnees(F.ANIMAUX_FILE)[0]
+        self.assertEqual((animal['date_naissance'], animal['date_prochain_vaccin'], animal['date_prochain_vermifuge']),
+                         ('2024-01-09', '2024-06-01', None))
+        self.appeler(F.modifier_animal, 'A1', nouvelle_date_prochain_vaccin='2024-7-1')
+        self.assertEqual(F.charger_donnees(F.ANIMAUX_FILE)[0]['date_prochain_vaccin'], '2024-07-01')
+
+    def test_dates_invalides_refusees_a_la_saisie(self):
+        F = self.F
+        self.assertIs(self.appeler(F.ajouter_animal, 'A1', 'Poule', '2024-13-01', 'F'), False)
+        self.assertIn("Date invalide pour 'date_naissance'", self.sortie.getvalue())
+        self.assertIs(self.appeler(F.ajouter_tache, 'Clôture', '', ''), False)
+        self.assertIn("Date manquante pour 'date_limite'", self.sortie.getvalue())
+        self.appeler(F.ajouter_culture, 'P1', 'Maïs', '2024-03-01')
+        self.assertIs(self.appeler(F.modifier_culture, 'P1', nouvelle_date_recolte_estimee='31/07/2024'), False)
+        self.assertEqual(F.charger_donnees(F.ANIMAUX_FILE), [])
+        self.assertEqual(F.charger_donnees(F.TACHES_FILE), [])
+        self.assertIsNone(F.charger_donnees(F.CULTURES_FILE)[0]['date_recolte_estimee'])
+
+    def test_analyse_memorisee(self):
+        F = self.F
+        F._analyser_date.cache_clear()
+        for _ in range(3):
+            self.assertEqual(F._analyser_date('2024-03-05'), date(2024, 3, 5))
+        self.assertEqual(F._analyser_date.cache_info().misses, 1)
@@ -0,0 +1,79 @@
+import importlib
+import json
+
+from tests.base import DonneesTemporaires
+
+
+class Identifiants(DonneesTemporaires):
+    def relancer(self):
+        # Nouveau lancement : module rechargé, caches et séquences relus depuis les fichiers
+        if self.F._verrou['fichier'] is not None:
+            self.F._verrou['fichier'].close()
+        self.F = importlib.reload(self.F)
+        self.appeler(self.F.initialiser_fichiers_donnees)
+
+    def ecrire(self, fichier, donnees):
+        with open(fichier, 'w', encoding='utf-8') as f:
+            json.dump(donnees, f)
+        self.F.vider_cache_donnees()
+
+    def ids(self, fichier):
+        self.F.vider_cache_donnees()
+        return [e['id'] for e in self.F.charger_donnees(fichier)]
+
+    def test_id_supprime_jamais_reattribue_apres_relance(self):
+        F = self.F
+        for nom in ('Awa', 'Koffi', 'Moussa'):
+            self.appeler(F.ajouter_ouvrier, nom, '0102', 'Berger')
+        self.appeler(F.supprimer_ouvrier, 3) # Le dernier : len + 1 le redonnerait
+        self.appeler(F.supprimer_ouvrier, 1)
+        self.relancer()
+        self.appeler(self.F.ajouter_ouvrier, 'Fanta', '0304', 'Vacher')
+        self.assertEqual(self.ids(self.F.OUVRIERS_FILE), [2, 4])
+        self.relancer()
+        self.appeler(self.F.supprimer_ouvrier, 4)
+        self.appeler(self.F.ajouter_equipement, 'Tracteur', 'Engin', '2024-01-01', 100.0)
+        self.appeler(self.F.ajouter_ouvrier, 'Issa', '0405', 'Berger')
+        self.assertEqual(self.ids(self.F.OUVRIERS_FILE), [2, 5])
+        self.assertEqual(self.ids(self.F.EQUIPEMENTS_FILE), [1])
+
+    def test_doublons_des_anciennes_versions_renumerotes_au_lancement(self):
+        F = self.F
+        self.ecrire(F.OUVRIERS_FILE, [{'id': 1, 'nom': 'Awa'}, {'id': 2, 'nom': 'Koffi'}, {'id': 2, 'nom': 'Moussa'}])
+        self.ecrire(F.TACHES_FILE, [{'id': 1, 'nom': 'Clôture', 'statut': 'En cours', 'ouvrier_assigne': 'Koffi', 'ouvrier_assigne_id': 2},
+                                    {'id': 1, 'nom': 'Traite', 'statut': 'En cours', 'ouvrier_assigne': 'Moussa', 'ouvrier_assigne_id': 2}])
+        self.relancer()
+        F = self.F
+        self.assertIn("l'ID 2 devient l'ID 3", self.sortie.getvalue())
+        self.assertEqual(self.ids(F.OUVRIERS_FILE), [1, 2, 3])
+        self.assertEqual(self.ids(F.TACHES_FILE), [1, 2])
+        taches = F.charger_donnees(F.TACHES_FILE)
+        self.assertEqual([(t['nom'], t['ouvrier_assigne_id']) for t in taches], [('Clôture', 2), ('Traite', 3)])
+        self.assertEqual([t['nom'] for t in self.appeler(F.lister_taches_ouvrier, 3)], ['Traite'])
+        # La séquence continue après les ids attribués par la migration
+        self.appeler(F.ajouter_ouvrier, 'Fanta', '0304', 'Vacher')
+        self.assertEqual(self.ids(F.OUVRIERS_FILE), [1, 2, 3, 4])
+        self.relancer()
+        self.assertNotIn('en double', self.sortie.getvalue())
+
+    def test_doublons_ajoutes_hors_de_l_application(self):
+        F = self.F
+        self.appeler(F.ajouter_contact, 'Agro CI', 'client')
+        self.ecrire(F.FOURNISSEURS_CLIENTS_FILE, [{'id': 1, 'nom_entreprise': 'Agro CI', 'type_contact': 'client'},
+                                                 {'id': 1, 'nom_entreprise': 'Semences SA', 'type_contact': 'fournisseur'}])
+        self.appeler(F.ajouter_contact, 'Lait Frais', 'client')
+        self.assertEqual(self.ids(F.FOURNISSEURS_CLIENTS_FILE), [1, 2, 3])
+        self.assertEqual(F.charger_donnees(F.SEQUENCES_FILE)[F.FOURNISSEURS_CLIENTS_FILE], 3)
+
+    def test_renumerotation_signalee_par_la_ligne_de_commande(self):
+        F = self.F
+        self.ecrire(F.OUVRIERS_FILE, [{'id': 1, 'nom': 'Awa'}, {'id': 1, 'nom': 'Koffi'}])
+        self.assertEqual(self.appeler(F.executer_ligne_de_commande, ['ouvriers', 'lister', '--json']), 0)
+        reponse = json.loads(self.sortie.getvalue()) # Une seule ligne JSON, messages compris
+        self.assertEqual(reponse['messages'], [f"Identifiant en double dans '{F.OUVRIERS_FILE}' : l'ID 1 devient l'ID 2."])
+        self.assertEqual(self.ids(F.OUVRIERS_FILE), [1, 2])
+        # Doublon apparu après le lancement : renuméroté à l'attribution, sans message
+        self.ecrire(F.OUVRIERS_FILE, [{'id': 1, 'nom': 'Awa'}, {'id': 1, 'nom': 'Koffi'}])
+        self.appeler(F.ajouter_ouvrier, 'Fanta', '0304', 'Vacher')
+        self.assertNotIn('en double', self.sortie.getvalue())
+        self.assertEqual(self.ids(F.OUVRIERS_FILE), [1, 3, 4])
@@ -0,0 +1,85 @@
+import json
+
+from tests.base import DonneesTemporaires
+
+
+class Import(DonneesTemporaires):
+    def ecrire(self, nom, texte):
+        with open(nom, 'w', encoding='utf-8') as f:
+            f.write(texte)
+        return nom
+
+    def test_animaux_csv_avec_rejets(self):
+        F = self.F
+        self.appeler(F.ajouter_animal, 'A0', 'Poule', '2024-01-01', 'F')
+        chemin = self.ecrire('animaux.csv', "nom_id;type;date_naissance;sexe\n"
+                                            "A1;Poule;2024-1-2;F\n"
+                                            "a0;Poule;2024-01-01;F\n"
+                                            "A2;Poule;2024-02-30;F\n"
+                                            "A3;;2024-01-03;M\n"
+                                            "A1;Canard;2024-01-04;M\n"
+                                            "A4;Canard;2024-01-05;M\n")
+        resultat = self.appeler(F.importer_donnees, 'animaux', chemin)
+        self.assertEqual(resultat['importes'], 2)
+        self.assertEqual([numero for numero, _ in resultat['rejets']], [3, 4, 5, 6])
+        self.assertIn("existe déjà", resultat['rejets'][0][1])
+        self.assertIn("Date invalide", resultat['rejets'][1][1])
+        self.assertIn("'type' manquant", resultat['rejets'][2][1])
+        animaux = F.charger_donnees(F.ANIMAUX_FILE)
+        self.assertEqual([(a['nom_id'], a['date_naissance']) for a in animaux], [('A0', '2024-01-01'), ('A1', '2024-01-02'), ('A4', '2024-01-05')])
+        self.assertEqual(F.get_statistiques_rapides_ferme()['Total Animaux'], 3)
+
+    def test_une_seule_ecriture_du_fichier(self):
+        F = self.F
+        chemin = self.ecrire('stock.jsonl', '\n'.join(json.dumps({'nom': f'Article {i}', 'quantite': i, 'seuil_alerte': 1}) for i in range(50)))
+        ecrire = F._ecrire_json_atomique
+        ecrits = []
+        F._ecrire_json_atomique = lambda donnees, fichier: ecrits.append(fichier) or ecrire(donnees, fichier)
+        try:
+            resultat = self.appeler(F.importer_donnees, 'stock', chemin)
+        finally:
+            F._ecrire_json_atomique = ecrire
+        self.assertEqual((resultat['importes'], resultat['rejets']), (50, []))
+        self.assertEqual(ecrits.count(F.STOCK_FILE), 1)
+        self.assertEqual(F.get_stock_quantite('article 49'), 49)
+
+    def test_releve_bancaire_en_jsonl(self):
+        F = self.F
+        chemin = self.ecrire('releve.jsonl', '{"date": "2024-03-01", "type": "Recette", "montant": "100,5", "description": "Vente"}\n'
+                                             '{"date": "2024-03-01", "type": "recette", "montant": 100.5, "description": "Vente"}\n'
+                                             'pas du json\n'
+                                             '\n'
+                                             '{"date": "2024-03-02", "type": "depense", "montant": -3, "description": "Frais"}\n'
+                                             '{"date": "2024-03-02 09:00:00", "type": "dépense", "montant": 20, "description": "Engrais"}\n')
+        resultat = self.appeler(F.importer_donnees, 'transactions', chemin)
+        # Deux lignes identiques du même relevé sont deux transactions
+        self.assertEqual(resultat['importes'], 3)
+        self.assertEqual([numero for numero, _ in resultat['rejets']], [3, 5])
+        self.assertEqual(F.get_solde_actuel(), 181.0)
+        self.assertEqual(F.charger_donnees(F.FINANCE_FILE)['transactions'][0]['date'], '2024-03-01 00:00:00')
+        # Réimporter le relevé n'ajoute rien : chaque transaction enregistrée écarte une ligne
+        resultat = self.appeler(F.importer_donnees, 'transactions', chemin)
+        self.assertEqual(resultat['importes'], 0)
+        self.assertEqual([numero for numero, _ in resultat['rejets']], [1, 2, 3, 5, 6])
+        self.assertEqual(F.get_solde_actuel(), 181.0)
+
+    def test_stock_existant_complete(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 3)
+        chemin = self.ecrire('stock.csv', "nom,quantite,seuil_alerte\nMaïs,5,8\nMaïs,2,\nBlé,4,\n")
+        resultat = self.appeler(F.importer_donnees, 'stock', chemin)
+        self.assertEqual((resultat['importes'], resultat['rejets']), (3, []))
+        self.assertEqual(F.get_stock_quantite('Maïs'), 17)
+        self.assertEqual(F.get_stock_quantite('Blé'), 4)
+        self.assertEqual(len(F.charger_donnees(F.STOCK_FILE)), 2)
+        self.assertEqual(F.charger_donnees(F.STOCK_FILE)[0]['seuil_alerte'], 3)
+
+    def test_fichier_illisible_et_ligne_de_commande(self):
+        F = self.F
+        self.assertIsNone(self.appeler(F.importer_donnees, 'cultures', 'absent.csv'))
+        self.assertIn("Impossible de lire le fichier 'absent.csv'", self.sortie.getvalue())
+        chemin = self.ecrire('cultures.csv', "nom_parcelle,type_culture,date_semis,surface_ou_quantite\nP1,Maïs,2024-03-01,\"2,5\"\n")
+        code = self.appeler(F.executer_ligne_de_commande, ['cultures', 'importer', chemin, '--json'])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(self.sortie.getvalue())['resultat']['importes'], 1)
+        self.assertEqual(F.charger_donnees(F.CULTURES_FILE)[0]['surface_ou_quantite'], 2.5)
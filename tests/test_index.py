@@ -0,0 +1,52 @@
+import json
+
+from tests.base import DonneesTemporaires
+
+
+class IndexCles(DonneesTemporaires):
+    def test_recherches_sans_tenir_compte_de_la_casse(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs Jaune', 10, 2)
+        self.appeler(F.ajouter_animal, 'POULE-01', 'Poule', '2024-01-01', 'F')
+        self.appeler(F.ajouter_culture, 'Parcelle Nord', 'Maïs', '2024-03-01')
+        self.assertEqual(F.get_stock_quantite('maïs jaune'), 10)
+        self.appeler(F.enregistrer_vente, 'MAÏS JAUNE', 4, 10.0)
+        self.assertEqual(F.get_stock_quantite('Maïs Jaune'), 6)
+        self.assertIsNot(self.appeler(F.modifier_animal, 'poule-01', nouvel_etat_sante='Malade'), False)
+        self.assertIsNot(self.appeler(F.modifier_culture, 'PARCELLE NORD', nouveau_statut='Récoltée'), False)
+        animaux = F.charger_donnees(F.ANIMAUX_FILE)
+        self.assertEqual(F._rechercher(F.ANIMAUX_FILE, animaux, 'nom_id', 'Poule-01')['etat_sante'], 'Malade')
+
+    def test_doublons_refuses(self):
+        F = self.F
+        self.appeler(F.ajouter_animal, 'A1', 'Poule', '2024-01-01', 'F')
+        self.assertIs(self.appeler(F.ajouter_animal, 'a1', 'Poule', '2024-01-01', 'F'), False)
+        self.appeler(F.ajouter_equipement, 'Tracteur', 'Engin', '2024-01-01', 100.0)
+        self.assertIs(self.appeler(F.ajouter_equipement, 'TRACTEUR', 'Engin', '2024-01-01', 100.0), False)
+        # Clé composée : même nom, autre type de contact
+        self.appeler(F.ajouter_contact, 'Agro CI', 'client')
+        self.assertIs(self.appeler(F.ajouter_contact, 'agro ci', 'client'), False)
+        self.assertIsNot(self.appeler(F.ajouter_contact, 'Agro CI', 'fournisseur'), False)
+        self.assertEqual(len(F.charger_donnees(F.ANIMAUX_FILE)), 1)
+        self.assertEqual(len(F.charger_donnees(F.FOURNISSEURS_CLIENTS_FILE)), 2)
+
+    def test_index_tenu_a_jour(self):
+        F = self.F
+        self.appeler(F.ajouter_equipement, 'Tracteur', 'Engin', '2024-01-01', 100.0)
+        self.appeler(F.modifier_equipement, 1, nouveau_nom='Moissonneuse')
+        equipements = F.charger_donnees(F.EQUIPEMENTS_FILE)
+        self.assertIsNone(F._rechercher(F.EQUIPEMENTS_FILE, equipements, 'nom', 'tracteur'))
+        self.assertEqual(F._rechercher(F.EQUIPEMENTS_FILE, equipements, 'nom', 'moissonneuse')['id'], 1)
+        self.appeler(F.ajouter_animal, 'A1', 'Poule', '2024-01-01', 'F')
+        self.appeler(F.supprimer_animal, 'a1')
+        self.assertIsNot(self.appeler(F.ajouter_animal, 'A1', 'Canard', '2024-01-01', 'M'), False)
+        self.assertEqual(F._rechercher(F.ANIMAUX_FILE, F.charger_donnees(F.ANIMAUX_FILE), 'nom_id', 'a1')['type'], 'Canard')
+
+    def test_index_reconstruit_apres_modification_externe(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        self.assertEqual(F.get_stock_quantite('maïs'), 10)
+        with open(F.STOCK_FILE, 'w', encoding='utf-8') as f:
+            json.dump([{'nom': 'Riz', 'quantite': 3, 'seuil_alerte': 1}], f)
+        self.assertEqual(F.get_stock_quantite('RIZ'), 3)
+        self.assertIsNone(F.get_stock_quantite('maïs'))
@@ -0,0 +1,99 @@
+import json
+import os
+
+from tests.base import DonneesTemporaires
+
+
+class JournalFinance(DonneesTemporaires):
+    def lire_finance(self):
+        self.F.vider_cache_donnees()
+        return self.F.charger_donnees(self.F.FINANCE_FILE)
+
+    def test_rejeu_du_journal(self):
+        F = self.F
+        for montant in (100.0, 30.0):
+            self.appeler(F.enregistrer_transaction, 'recette', montant, 'Vente')
+        self.appeler(F.enregistrer_transaction, 'depense', 20.0, 'Engrais')
+        self.assertTrue(os.path.exists(F.FINANCE_JOURNAL_FILE))
+        finance = self.lire_finance()
+        self.assertEqual([t['montant'] for t in finance['transactions']], [100.0, 30.0, 20.0])
+        self.assertEqual(finance['solde'], 110.0)
+
+    def test_lignes_deja_integrees_et_ligne_incomplete_ignorees(self):
+        F = self.F
+        self.appeler(F.enregistrer_transaction, 'recette', 100.0, 'Vente')
+        with open(F.FINANCE_JOURNAL_FILE, encoding='utf-8') as f:
+            journal = f.read()
+        self.appeler(F.compacter_journal_finance)
+        self.assertFalse(os.path.exists(F.FINANCE_JOURNAL_FILE))
+        # Arrêt pendant une compaction : le journal est encore là, FINANCE_FILE le contient déjà
+        with open(F.FINANCE_JOURNAL_FILE, 'w', encoding='utf-8') as f:
+            f.write(journal + '{"n": 2, "transac')
+        finance = self.lire_finance()
+        self.assertEqual(len(finance['transactions']), 1)
+        self.assertEqual(finance['solde'], 100.0)
+
+    def test_compaction_apres_une_unite_de_travail(self):
+        F = self.F
+        F.TAILLE_MAX_JOURNAL_FINANCE = 300
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 100, 2)
+        for _ in range(10):
+            self.assertIsNot(self.appeler(F.enregistrer_vente, 'Maïs', 1, 50.0), False, self.sortie.getvalue())
+            taille = os.path.getsize(F.FINANCE_JOURNAL_FILE) if os.path.exists(F.FINANCE_JOURNAL_FILE) else 0
+            self.assertLessEqual(taille, 300)
+        finance = self.lire_finance()
+        self.assertEqual(len(finance['transactions']), 10)
+        self.assertEqual(finance['solde'], 500.0)
+        self.assertEqual(F.get_stock_quantite('Maïs'), 90)
+
+    def test_reprise_d_une_unite_de_travail_interrompue(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        # Arrêt après l'écriture de la liste des remplacements, avant les remplacements eux-mêmes
+        temporaire = F._ecrire_json_atomique([{'nom': 'Maïs', 'quantite': 7, 'seuil_alerte': 2}], F.STOCK_FILE)
+        transaction = {'date': '2024-01-01 10:00:00', 'type': 'recette', 'montant': 300.0, 'description': 'Vente de Maïs'}
+        F._ecrire_json_atomique({'fichiers': [F.STOCK_FILE], 'journal': [json.dumps({'n': 1, 'transaction': transaction})], 'ajouts': {}},
+                                F.UNITE_DE_TRAVAIL_FILE)
+        os.replace(F.UNITE_DE_TRAVAIL_FILE + '.tmp', F.UNITE_DE_TRAVAIL_FILE)
+        self.assertTrue(os.path.exists(temporaire))
+        F.vider_cache_donnees()
+        self.assertEqual(F.get_stock_quantite('Maïs'), 7)
+        self.assertEqual(F.charger_donnees(F.FINANCE_FILE)['solde'], 300.0)
+        self.assertFalse(os.path.exists(F.UNITE_DE_TRAVAIL_FILE))
+        self.assertFalse(os.path.exists(temporaire))
+
+    def test_annulation_d_une_unite_de_travail(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        with self.assertRaises(RuntimeError):
+            with F.unite_de_travail():
+                stocks = F.charger_donnees(F.STOCK_FILE)
+                stocks[0]['quantite'] = 0
+                F.sauvegarder_donnees(stocks, F.STOCK_FILE)
+                raise RuntimeError
+        self.assertEqual(F.get_stock_quantite('Maïs'), 10)
+
+    def test_une_transaction_ajoute_une_ligne_sans_reecrire_l_historique(self):
+        F = self.F
+        self.appeler(F.enregistrer_transaction, 'recette', 10.0, 'Vente')
+        self.appeler(F.compacter_journal_finance)
+        signature = F._signature_fichier(F.FINANCE_FILE)
+        self.appeler(F.enregistrer_transaction, 'depense', 4.0, 'Engrais')
+        self.assertEqual(F._signature_fichier(F.FINANCE_FILE), signature)
+        with open(F.FINANCE_JOURNAL_FILE, encoding='utf-8') as f:
+            self.assertEqual([json.loads(ligne) for ligne in f],
+                             [{'n': 2, 'transaction': F.charger_donnees(F.FINANCE_FILE)['transactions'][1]}])
+        self.assertEqual(self.lire_finance()['solde'], 6.0)
+
+    def test_point_de_controle_du_solde(self):
+        F = self.F
+        F.INTERVALLE_POINT_CONTROLE_SOLDE = 3
+        for _ in range(3):
+            self.appeler(F.enregistrer_transaction, 'recette', 0.1, 'Oeufs')
+        with open(F.FINANCE_JOURNAL_FILE, encoding='utf-8') as f:
+            entrees = [json.loads(ligne) for ligne in f]
+        self.assertEqual(entrees[-1], {'n': 3, 'solde': F.charger_donnees(F.FINANCE_FILE)['solde']})
+        # Le point de contrôle fait foi au rejeu
+        with open(F.FINANCE_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'n': 3, 'solde': 0.3}) + '\n')
+        self.assertEqual(self.lire_finance()['solde'], 0.3)
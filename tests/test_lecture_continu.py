@@ -0,0 +1,68 @@
+import json
+import random
+
+from tests.base import DonneesTemporaires
+
+
+class LectureEnContinu(DonneesTemporaires):
+    TAILLES_BLOC = (1, 2, 3, 5, 7, 16, 61)
+
+    def ecrire_finance(self, transactions, solde):
+        with open(self.F.FINANCE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'transactions': transactions, 'solde': solde}, f, indent=4, ensure_ascii=False)
+        self.F.vider_cache_donnees()
+
+    def transactions_lues(self):
+        infos = {}
+        transactions = list(self.F.iterer_transactions(infos))
+        return transactions, infos['solde']
+
+    def test_equivalence_avec_json_load(self):
+        F = self.F
+        hasard = random.Random(4)
+        transactions = [{'date': f'2024-01-{i % 28 + 1:02d} 10:00:00', 'type': hasard.choice(['recette', 'depense']),
+                         'montant': hasard.choice([0, 1.5, 98765.25, 1e-07, 12345678901.0, -3.75]),
+                         'description': hasard.choice(['Maïs', 'œufs "frais"', 'a\\nb', '', 'é' * 40]),
+                         'extra': hasard.choice([None, True, False, [], {}, [1, [2.5e10, {'x': -0.5}]]])}
+                        for i in range(60)]
+        for solde in (98765.25, 1e-07, -12.0, 0, 3):
+            self.ecrire_finance(transactions, solde)
+            with open(F.FINANCE_FILE, encoding='utf-8') as f:
+                attendu = json.load(f)
+            for taille in self.TAILLES_BLOC:
+                with self.subTest(solde=solde, taille=taille):
+                    F.TAILLE_BLOC_LECTURE = taille
+                    self.assertEqual(self.transactions_lues(), (attendu['transactions'], attendu['solde']))
+
+    def test_nombre_coupe_a_chaque_position(self):
+        # Le point décimal et l'exposant du solde tombent successivement sur toutes les limites de bloc
+        F = self.F
+        for solde in (98765.5, 2.5e-05, 1234567.125):
+            for decalage in range(12):
+                texte = '{"transactions": [], ' + ' ' * decalage + f'"solde": {solde!r}' + '}'
+                with open(F.FINANCE_FILE, 'w', encoding='utf-8') as f:
+                    f.write(texte)
+                F.vider_cache_donnees()
+                for taille in self.TAILLES_BLOC:
+                    with self.subTest(solde=solde, decalage=decalage, taille=taille):
+                        F.TAILLE_BLOC_LECTURE = taille
+                        self.assertEqual(self.transactions_lues(), ([], json.loads(texte)['solde']))
+
+    def test_listes_de_premier_niveau(self):
+        F = self.F
+        stocks = [{'nom': f'Article {i}', 'quantite': i * 1000 + 0.5, 'seuil_alerte': 5} for i in range(30)]
+        with open(F.STOCK_FILE, 'w', encoding='utf-8') as f:
+            json.dump(stocks, f)
+        F.vider_cache_donnees()
+        for taille in self.TAILLES_BLOC:
+            with self.subTest(taille=taille):
+                F.TAILLE_BLOC_LECTURE = taille
+                self.assertEqual(list(F.iterer_enregistrements(F.STOCK_FILE)), stocks)
+
+    def test_json_invalide(self):
+        F = self.F
+        with open(F.STOCK_FILE, 'w', encoding='utf-8') as f:
+            f.write('[{"nom": "a"} {"nom": "b"}]')
+        F.vider_cache_donnees()
+        with self.assertRaises(ValueError):
+            list(F.iterer_enregistrements(F.STOCK_FILE))
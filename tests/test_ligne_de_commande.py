@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+from tests.base import DonneesTemporaires
+
+
+class LigneDeCommande(DonneesTemporaires):
+    def executer(self, *arguments):
+        code = self.appeler(self.F.executer_ligne_de_commande, list(arguments))
+        return code, self.sortie.getvalue()
+
+    def executer_json(self, *arguments):
+        code, sortie = self.executer(*arguments, '--json')
+        return code, json.loads(sortie)
+
+    def test_alertes_sans_modules_des_autres_commandes(self):
+        # Nouveau processus : les modules déjà chargés par les autres tests ne comptent pas
+        depot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = ("import sys; sys.path.insert(0, sys.argv[1]); import Ferme_app; Ferme_app.executer_ligne_de_commande(['alertes', '--json']); "
+                  "print(sorted(m for m in ('sqlite3', 'mmap', 'csv', 'threading', 'inspect', 'unicodedata') if m in sys.modules))")
+        sortie = subprocess.run([sys.executable, '-c', script, depot], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(sortie.splitlines()[-1], '[]')
+
+    def test_recompter_corrige_les_compteurs(self):
+        F = self.F
+        self.executer('animaux', 'ajouter', 'A1', 'Poule', '2024-01-01', 'F')
+        compteurs = self.appeler(F._compteurs)
+        compteurs[F.ANIMAUX_FILE]['total'] = 99
+        F.sauvegarder_donnees(compteurs, F.COMPTEURS_FILE)
+        code, sortie = self.executer('rapports', 'recompter')
+        self.assertEqual(code, 0)
+        self.assertIn('recomptées', sortie)
+        F.vider_cache_donnees()
+        self.assertEqual(F.charger_donnees(F.COMPTEURS_FILE)[F.ANIMAUX_FILE]['total'], 1)
+
+    def test_equipements(self):
+        self.assertEqual(self.executer('equipements', 'ajouter', 'Tracteur', 'Engin', '2024-01-01', '1500000')[0], 0)
+        self.assertEqual(self.executer('equipements', 'modifier', '1', '--etat', 'En panne')[0], 0)
+        self.assertEqual(self.executer('equipements', 'maintenance', '1', '2024-02-01', 'Vidange', '--cout', '20000')[0], 0)
+        code, reponse = self.executer_json('equipements', 'historique', '1')
+        self.assertEqual(code, 0)
+        self.assertEqual([op['description'] for op in reponse['resultat']], ['Vidange'])
+        self.assertEqual(self.executer('equipements', 'historique', '7')[0], 1)
+        code, reponse = self.executer_json('equipements', 'lister')
+        self.assertEqual(reponse['resultat'][0]['etat'], 'En panne')
+        self.assertEqual(self.executer('equipements', 'supprimer', '1')[0], 0)
+        self.assertEqual(self.executer_json('equipements', 'lister')[1]['resultat'], [])
+
+    def test_contacts(self):
+        self.assertEqual(self.executer('contacts', 'ajouter', 'Agro CI', 'fournisseur', '--notes', 'Engrais')[0], 0)
+        self.assertEqual(self.executer('contacts', 'modifier', '1', '--telephone', '0102030405', '--type-contact', 'client')[0], 0)
+        code, reponse = self.executer_json('contacts', 'lister', '--type', 'client')
+        self.assertEqual([(c['nom_entreprise'], c['telephone']) for c in reponse['resultat']], [('Agro CI', '0102030405')])
+        self.assertEqual(self.executer('contacts', 'supprimer', '1')[0], 0)
+        self.assertEqual(self.executer('contacts', 'supprimer', '1')[0], 1)
+
+    def test_modifier_animaux_et_cultures(self):
+        self.executer('animaux', 'ajouter', 'A1', 'Poule', '2024-01-01', 'F')
+        self.executer('cultures', 'ajouter', 'P1', 'Maïs', '2024-03-01')
+        self.assertEqual(self.executer('animaux', 'modifier', 'A1', '--etat-sante', 'Malade', '--vaccin', '2024-06-01')[0], 0)
+        self.assertEqual(self.executer('cultures', 'modifier', 'P1', '--statut', 'Récoltée', '--surface', '2.5')[0], 0)
+        self.assertEqual(self.executer('animaux', 'modifier', 'A1', '--vaccin', '2024-13-01')[0], 1)
+        animal = self.executer_json('animaux', 'lister')[1]['resultat'][0]
+        culture = self.executer_json('cultures', 'lister')[1]['resultat'][0]
+        self.assertEqual((animal['etat_sante'], animal['date_prochain_vaccin']), ('Malade', '2024-06-01'))
+        self.assertEqual((culture['statut'], culture['surface_ou_quantite']), ('Récoltée', 2.5))
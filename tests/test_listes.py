@@ -0,0 +1,127 @@
+import json
+
+from tests.base import DonneesTemporaires
+
+
+class Listes(DonneesTemporaires):
+    def lignes_affichees(self, fonction, *args, **kwargs):
+        self.appeler(fonction, *args, **kwargs)
+        return self.sortie.getvalue().splitlines()
+
+    def test_filtre_apres_modification(self):
+        F = self.F
+        self.appeler(F.ajouter_animal, 'A1', 'Poule', '2024-01-01', 'F')
+        self.appeler(F.ajouter_animal, 'A2', 'Poule', '2024-01-01', 'F')
+        self.appeler(F.ajouter_equipement, 'Tracteur', 'Engin', '2024-01-01', 100.0)
+        self.assertEqual(F.lister_enregistrements(F.ANIMAUX_FILE, {'sexe': 'F'})['total'], 2) # Index de groupe construit
+        self.assertEqual(F.lister_enregistrements(F.EQUIPEMENTS_FILE, {'etat': 'Fonctionnel'})['total'], 1)
+        self.appeler(F.modifier_animal, 'A1', nouveau_sexe='M')
+        self.appeler(F.modifier_equipement, 1, nouvel_etat='En panne')
+        self.assertEqual([a['nom_id'] for a in F.lister_enregistrements(F.ANIMAUX_FILE, {'sexe': 'M'})['enregistrements']], ['A1'])
+        self.assertEqual([a['nom_id'] for a in F.lister_enregistrements(F.ANIMAUX_FILE, {'sexe': 'F'})['enregistrements']], ['A2'])
+        self.assertEqual(F.lister_enregistrements(F.EQUIPEMENTS_FILE, {'etat': 'Fonctionnel'})['total'], 0)
+        self.assertEqual([e['nom'] for e in F.lister_enregistrements(F.EQUIPEMENTS_FILE, {'etat': 'en panne'})['enregistrements']], ['Tracteur'])
+
+    def test_ids_en_double_des_anciennes_versions(self):
+        # Fichiers écrits par une ancienne version (id = len + 1) et relus sans la migration du lancement
+        F = self.F
+        with open(F.OUVRIERS_FILE, 'w', encoding='utf-8') as f:
+            json.dump([{'id': 1, 'nom': 'Awa'}], f)
+        with open(F.TACHES_FILE, 'w', encoding='utf-8') as f:
+            json.dump([{'id': 2, 'nom': 'A', 'statut': 'En cours', 'ouvrier_assigne': 'Awa', 'ouvrier_assigne_id': 1},
+                       {'id': 2, 'nom': 'B', 'statut': 'Terminée', 'ouvrier_assigne': 'Awa', 'ouvrier_assigne_id': 1},
+                       {'id': 3, 'nom': 'C', 'statut': 'En cours', 'ouvrier_assigne': 'Non assigné', 'ouvrier_assigne_id': None}], f)
+        F.vider_cache_donnees()
+        self.assertEqual([t['nom'] for t in F.lister_taches_ouvrier(1)], ['A', 'B'])
+        self.assertEqual([t['nom'] for t in F.lister_taches_ouvrier(1, 'terminée')], ['B'])
+        self.assertEqual(F.lister_enregistrements(F.TACHES_FILE, {'ouvrier_assigne_id': 1})['total'], 2)
+        self.assertEqual(F.lister_enregistrements(F.TACHES_FILE, {'id': 2})['total'], 2)
+        self.appeler(F.supprimer_ouvrier, 1)
+        F.vider_cache_donnees()
+        self.assertEqual([t['ouvrier_assigne_id'] for t in F.charger_donnees(F.TACHES_FILE)], [None, None, None])
+
+    def test_doublon_ajoute_puis_retire(self):
+        F = self.F
+        self.appeler(F.ajouter_ouvrier, 'Awa', '0102', 'Berger')
+        for nom in ('A', 'B'):
+            self.appeler(F.ajouter_tache, nom, '', '2030-01-01', 1)
+        taches = F.charger_donnees(F.TACHES_FILE)
+        self.assertEqual(len(F.lister_taches_ouvrier(1)), 2) # Groupes construits
+        doublon = dict(taches[0], nom='A bis')
+        taches.append(doublon)
+        F._indexer(F.TACHES_FILE, taches, doublon)
+        self.assertEqual([t['nom'] for t in F.lister_taches_ouvrier(1)], ['A', 'A bis', 'B'])
+        taches.remove(doublon)
+        F._desindexer(F.TACHES_FILE, taches, doublon)
+        self.assertEqual([t['nom'] for t in F.lister_taches_ouvrier(1)], ['A', 'B'])
+
+    def test_pages_triees(self):
+        F = self.F
+        for i in (5, 3, 9, 1, 7, 2, 8):
+            self.appeler(F.ajouter_animal, f'A{i}', 'Poule', f'2024-01-0{i}', 'F')
+        pages = [F.lister_enregistrements(F.ANIMAUX_FILE, tri='nom_id', decroissant=True, offset=o, limite=3) for o in (0, 3, 6)]
+        self.assertEqual([[a['nom_id'] for a in p['enregistrements']] for p in pages], [['A9', 'A8', 'A7'], ['A5', 'A3', 'A2'], ['A1']])
+        self.assertEqual([p['suivant'] for p in pages], [3, 6, None])
+        self.assertEqual(pages[0]['total'], 7)
+
+    def test_affichage_en_une_seule_selection(self):
+        F = self.F
+        for i in range(10):
+            self.appeler(F.ajouter_animal, f'A{i}', 'Poule', '2024-01-01', 'F')
+        F.TAILLE_PAGE = 3
+        selection = F._selection
+        appels = []
+        F._selection = lambda *args, **kwargs: appels.append(args) or selection(*args, **kwargs)
+        try:
+            lignes = self.lignes_affichees(F.afficher_animaux, tri='nom_id', decroissant=True)
+        finally:
+            F._selection = selection
+        self.assertEqual(len(appels), 1)
+        self.assertEqual([ligne.split()[0] for ligne in lignes if ligne.startswith('A')], [f'A{i}' for i in range(9, -1, -1)])
+        self.assertEqual(sum(ligne.startswith('---') and 'Animaux' in ligne for ligne in lignes), 1)
+
+    def test_transactions_lues_une_seule_fois(self):
+        F = self.F
+        for i in range(10):
+            self.appeler(F.enregistrer_transaction, 'recette' if i % 2 else 'depense', float(i + 1), f't{i}')
+        F.TAILLE_PAGE = 3
+        iterer = F.iterer_transactions
+        appels = []
+        F.iterer_transactions = lambda *args: appels.append(args) or iterer(*args)
+        try:
+            lignes = self.lignes_affichees(F.afficher_transactions_financieres, decroissant=True)
+        finally:
+            F.iterer_transactions = iterer
+        self.assertEqual(len(appels), 1) # Le solde est relevé au même parcours
+        self.assertEqual([ligne.split()[-1] for ligne in lignes if ligne[:4].isdigit()], [f't{i}' for i in range(9, -1, -1)])
+        self.assertIn('Solde Actuel : 5.00 XOF', lignes[-1])
+        # Historique hors du cache : une seule lecture aussi pour la ligne de commande
+        F.vider_cache_donnees()
+        appels.clear()
+        F.iterer_transactions = lambda *args: appels.append(args) or iterer(*args)
+        try:
+            self.assertEqual(self.appeler(F.executer_ligne_de_commande, ['finance', 'transactions', '--json']), 0)
+        finally:
+            F.iterer_transactions = iterer
+        self.assertEqual(len(appels), 1)
+        self.assertEqual(json.loads(self.sortie.getvalue())['resultat']['solde'], 5.0)
+        self.assertEqual([t['description'] for t in F.lister_transactions('recette', offset=1, limite=2)['enregistrements']], ['t3', 't5'])
+
+    def test_taches_d_un_ouvrier_ecrites_par_page(self):
+        F = self.F
+        self.appeler(F.ajouter_ouvrier, 'Awa', '0102', 'Berger')
+        for i in range(5):
+            self.appeler(F.ajouter_tache, f'T{i}', '', '2030-01-01', 1)
+        self.appeler(F.modifier_statut_tache, 2, 'Terminée')
+        F.TAILLE_PAGE = 2
+        ecrire = F._ecrire_tableau
+        ecritures = []
+        F._ecrire_tableau = lambda lignes: ecritures.append(list(lignes)) or ecrire(lignes)
+        try:
+            lignes = self.lignes_affichees(F.afficher_taches_ouvrier, 1, 'en cours')
+        finally:
+            F._ecrire_tableau = ecrire
+        self.assertEqual(len(ecritures), 2) # Pages de TAILLE_PAGE lignes : 4 tâches en cours
+        self.assertEqual([ligne.split()[1] for ligne in lignes if ligne[:1].isdigit()], ['T0', 'T2', 'T3', 'T4'])
+        self.assertEqual(sum(ligne.startswith('--- Tâches de Awa') for ligne in lignes), 1)
+        self.assertIn("Aucune tâche assignée à 'Awa' avec le statut 'Annulée'.", self.lignes_affichees(F.afficher_taches_ouvrier, 1, 'Annulée'))
@@ -0,0 +1,46 @@
+from tests.base import DonneesTemporaires
+
+
+class Lots(DonneesTemporaires):
+    def setUp(self):
+        super().setUp()
+        self.appeler(self.F.ajouter_modifier_article, 'Maïs', 10, 2)
+        self.appeler(self.F.ajouter_modifier_article, 'Oeufs', 100, 10)
+
+    def test_ventes_verifiees_ligne_a_ligne_puis_ecrites_une_fois(self):
+        F = self.F
+        ecrire = F._ecrire_json_atomique
+        ecrits = []
+        F._ecrire_json_atomique = lambda donnees, fichier: ecrits.append(fichier) or ecrire(donnees, fichier)
+        try:
+            resultats = self.appeler(F.enregistrer_ventes_lot, [('Maïs', 6, 100.0, 'Awa'), ('maïs', 5, 100.0), ('Oeufs', 30, 5.0),
+                                                                ('Riz', 1, 10.0), ('Oeufs', 0, 5.0), ('Oeufs',), ('Maïs', 4, 90.0)])
+        finally:
+            F._ecrire_json_atomique = ecrire
+        self.assertEqual(self.sortie.getvalue(), '') # Résultats renvoyés, rien d'affiché
+        self.assertEqual([r['ok'] for r in resultats], [True, False, True, False, False, False, True])
+        self.assertIn("Stock disponible : 4", resultats[1]['message'])
+        self.assertIn("non trouvé", resultats[3]['message'])
+        self.assertEqual([r['montant'] for r in resultats if r['ok']], [600.0, 150.0, 360.0])
+        self.assertEqual((F.get_stock_quantite('Maïs'), F.get_stock_quantite('Oeufs')), (0, 70))
+        self.assertEqual(ecrits.count(F.STOCK_FILE), 1)
+        transactions = F.charger_donnees(F.FINANCE_FILE)['transactions']
+        self.assertEqual([t['description'] for t in transactions], ["Vente de 6 'Maïs' à Awa", "Vente de 30 'Oeufs'", "Vente de 4 'Maïs'"])
+        self.assertEqual(F.get_solde_actuel(), 1110.0)
+        self.assertEqual(len(self.appeler(F.afficher_alertes_stock)), 1) # Maïs sous son seuil
+
+    def test_achats(self):
+        F = self.F
+        resultats = self.appeler(F.enregistrer_achats_lot, [('Maïs', 5, 80.0, 'Coop'), ('Engrais', 2, 1500.0), ('Oeufs', 1, -1)])
+        self.assertEqual([r['ok'] for r in resultats], [True, True, False])
+        self.assertIn("enregistré financièrement seulement", resultats[1]['message'])
+        self.assertIsNone(F.get_stock_quantite('Engrais'))
+        self.assertEqual(F.get_stock_quantite('Maïs'), 15)
+        self.assertEqual(F.get_solde_actuel(), -3400.0)
+
+    def test_lot_entierement_refuse(self):
+        F = self.F
+        resultats = self.appeler(F.enregistrer_ventes_lot, [('Maïs', 11, 10.0), ('Maïs', 'trois', 10.0)])
+        self.assertFalse(any(r['ok'] for r in resultats))
+        self.assertEqual(F.get_stock_quantite('Maïs'), 10)
+        self.assertEqual(F.charger_donnees(F.FINANCE_FILE)['transactions'], [])
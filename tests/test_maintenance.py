@@ -0,0 +1,49 @@
+import json
+
+from tests.base import DonneesTemporaires
+
+
+class JournalMaintenance(DonneesTemporaires):
+    def setUp(self):
+        super().setUp()
+        self.appeler(self.F.ajouter_equipement, 'Tracteur', 'Engin', '2024-01-01', 1000.0)
+        self.appeler(self.F.ajouter_equipement, 'Pompe', 'Irrigation', '2024-01-01', 200.0)
+
+    def test_operations_dans_le_journal_et_cumuls_dans_l_equipement(self):
+        F = self.F
+        for equipement_id, jour, cout in ((1, '2024-03-10', 50.0), (2, '2024-02-01', 0.0), (1, '2024-01-05', 20.0)):
+            self.assertTrue(self.appeler(F.enregistrer_maintenance_reparation, equipement_id, jour, 'Entretien', cout))
+        with open(F.EQUIPEMENTS_FILE, encoding='utf-8') as f:
+            tracteur = json.load(f)[0]
+        self.assertNotIn('historique_maintenance', tracteur)
+        self.assertEqual((tracteur['nombre_maintenances'], tracteur['cout_maintenance_total'], tracteur['derniere_maintenance']),
+                         (2, 70.0, '2024-03-10'))
+        self.assertEqual([op['date'] for op in F.operations_maintenance(1)], ['2024-03-10', '2024-01-05'])
+        self.assertEqual([op['equipement_id'] for op in F.operations_maintenance(date_debut='2024-01-01', date_fin='2024-02-28')], [1, 2])
+        self.assertEqual(F.get_solde_actuel(), -70.0) # Seules les opérations payantes sont des dépenses
+        self.appeler(F.afficher_historique_maintenance, 1)
+        self.assertIn("2 opération(s), coût total : 70.00 XOF, dernière le 2024-03-10", self.sortie.getvalue())
+
+    def test_lignes_ajoutees_par_un_autre_programme(self):
+        F = self.F
+        self.appeler(F.enregistrer_maintenance_reparation, 1, '2024-03-10', 'Vidange', 0.0)
+        self.assertEqual(len(F.operations_maintenance(1)), 1)
+        with open(F.MAINTENANCE_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'equipement_id': 1, 'date': '2024-04-01', 'description': 'Pneus', 'cout': 0.0}) + '\n')
+            f.write('{"equipement_id": 2, "da') # Ligne en cours d'écriture : ignorée
+        self.assertEqual([op['description'] for op in F.operations_maintenance(1)], ['Vidange', 'Pneus'])
+        self.assertEqual(F.operations_maintenance(2), [])
+
+    def test_migration_des_anciens_historiques(self):
+        F = self.F
+        equipements = [{'id': 1, 'nom': 'Tracteur', 'historique_maintenance': [{'date': '2023-05-01', 'description': 'Vidange', 'cout': 30.0},
+                                                                              {'date': '2023-09-01', 'description': 'Freins', 'cout': 70.0}]}]
+        with open(F.EQUIPEMENTS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(equipements, f)
+        F.vider_cache_donnees()
+        for _ in range(2): # Au lancement ; le second ne trouve plus rien à migrer
+            self.appeler(F.initialiser_fichiers_donnees)
+        tracteur = F.charger_donnees(F.EQUIPEMENTS_FILE)[0]
+        self.assertNotIn('historique_maintenance', tracteur)
+        self.assertEqual((tracteur['nombre_maintenances'], tracteur['cout_maintenance_total']), (2, 100.0))
+        self.assertEqual([op['description'] for op in F.operations_maintenance(1)], ['Vidange', 'Freins'])
@@ -0,0 +1,134 @@
+import json
+import os
+
+from tests.base import DonneesTemporaires
+
+
+class RapportsFinance(DonneesTemporaires):
+    def ecrire_finance(self, transactions):
+        with open(self.F.FINANCE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'transactions': transactions, 'solde': 0.0}, f)
+        self.F.vider_cache_donnees()
+
+    def attendu(self, transactions, debut, fin):
+        # Calcul direct sur la liste, comme avant les colonnes et les agrégats
+        recettes = depenses = 0.0
+        categories = {}
+        for t in transactions:
+            if self.F._horodatage_transaction(t['date']) == self.F._DATE_INVALIDE or not debut <= t['date'][:10] <= fin:
+                continue
+            if t['type'] == 'recette':
+                recettes += t['montant']
+            elif t['type'] == 'depense':
+                depenses += t['montant']
+                categorie = self.F.categoriser_depense(t['description'])
+                categories[categorie] = categories.get(categorie, 0.0) + t['montant']
+        return recettes, depenses, categories
+
+    def verifier(self, transactions):
+        F = self.F
+        self.ecrire_finance(transactions)
+        for debut, fin in (('2024-01-01', '2024-12-31'), ('2024-02-10', '2024-03-05'), ('2023-01-01', '2023-12-31')):
+            recettes, depenses, categories = self.attendu(transactions, debut, fin)
+            with self.subTest(debut=debut, fin=fin, en_memoire=False):
+                F.vider_cache_donnees()
+                rapport = self.appeler(F.calculer_profits_pertes, debut, fin)
+                self.assertAlmostEqual(rapport['recettes'], recettes)
+                self.assertAlmostEqual(rapport['depenses'], depenses)
+                self.assertEqual(self.appeler(F.calculer_depenses_par_categorie, debut, fin), categories)
+            with self.subTest(debut=debut, fin=fin, en_memoire=True):
+                F.charger_donnees(F.FINANCE_FILE)
+                self.assertEqual(self.appeler(F.calculer_depenses_par_categorie, debut, fin), categories)
+
+    def test_historique_trie(self):
+        types = ['recette', 'depense', 'depense', 'autre']
+        descriptions = ['Achat engrais NPK', 'Salaire ouvrier', 'Vente de Maïs', 'Carburant tracteur', 'Divers "x"']
+        transactions = [{'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 08:00:00', 'type': types[i % 4], 'montant': float(i),
+                         'description': descriptions[i % 5]} for i in range(200)]
+        self.verifier(sorted(transactions, key=lambda t: t['date']))
+
+    def test_historique_desordonne_avec_dates_invalides(self):
+        transactions = [{'date': f'2024-{(i * 7) % 12 + 1:02d}-{(i * 5) % 28 + 1:02d} 08:00:00', 'type': 'depense' if i % 3 else 'recette',
+                         'montant': 10.0 + i, 'description': 'Achat engrais' if i % 2 else 'Salaire ouvrier'} for i in range(120)]
+        transactions[5]['date'] = 'pas une date'
+        transactions[9]['date'] = '2024-02-30 08:00:00'
+        self.verifier(transactions)
+
+    def test_reconstruction_sans_tronquer_les_colonnes_projetees(self):
+        F = self.F
+        self.ecrire_finance([{'date': f'2024-01-{i + 1:02d} 08:00:00', 'type': 'depense', 'montant': float(i), 'description': 'Engrais'}
+                             for i in range(20)])
+        chemin = F._chemin_colonne_finance('montants.bin')
+        with F._colonnes_finance() as (meta, colonnes):
+            inode = os.stat(chemin).st_ino
+            F.reconstruire_colonnes_finance()
+            # Nouveau fichier mis en place par os.replace : la projection existante garde l'ancien, intact
+            self.assertNotEqual(os.stat(chemin).st_ino, inode)
+            self.assertEqual(list(colonnes['montants']), [float(i) for i in range(20)])
+        # Projections fermées à la sortie
+        self.assertRaises(ValueError, lambda: colonnes['montants'][0])
+        self.assertFalse([nom for nom in os.listdir(F.FINANCE_COLONNES_DIR) if nom.endswith('.tmp')])
+
+    def test_periode_ouverte_jusqu_a_date_max(self):
+        F = self.F
+        self.ecrire_finance([{'date': '2024-03-05 08:00:00', 'type': 'recette', 'montant': 100.0, 'description': 'Vente'},
+                             {'date': '9999-12-31 08:00:00', 'type': 'depense', 'montant': 30.0, 'description': 'Achat engrais'}])
+        rapport = self.appeler(F.calculer_profits_pertes, '2024-01-01', F.DATE_MAX)
+        self.assertEqual((rapport['recettes'], rapport['depenses']), (100.0, 30.0))
+        rapport = self.appeler(F.calculer_profits_pertes, F.DATE_MIN, '9999-12-30')
+        self.assertEqual((rapport['recettes'], rapport['depenses']), (100.0, 0.0))
+        code = self.appeler(F.executer_ligne_de_commande, ['finance', 'rapport', '--debut', '2024-01-01', '--fin', '9999-12-31', '--json'])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(self.sortie.getvalue())['resultat']['profit_net'], 70.0)
+
+    def test_periode_lue_sans_decoder_le_debut_de_l_historique(self):
+        F = self.F
+        transactions = [{'date': f'2024-{i // 28 + 1:02d}-{i % 28 + 1:02d} 08:00:00', 'type': 'recette', 'montant': float(i),
+                         'description': f'Vente "{i}" é'} for i in range(300)]
+        self.ecrire_finance(transactions)
+        F._meta_colonnes_finance()
+        F.vider_cache_donnees()
+        iterer = F.iterer_transactions
+        F.iterer_transactions = lambda *args: self.fail("lecture de l'historique depuis le début")
+        try:
+            periode = list(F.transactions_entre('2024-10-03', '2024-10-05'))
+        finally:
+            F.iterer_transactions = iterer
+        self.assertEqual(periode, [t for t in transactions if '2024-10-03' <= t['date'][:10] <= '2024-10-05'])
+        self.assertEqual(len(periode), 3)
+
+    def test_colonnes_d_une_ancienne_version_reconstruites(self):
+        F = self.F
+        self.ecrire_finance([{'date': '2024-01-02 08:00:00', 'type': 'recette', 'montant': 5.0, 'description': 'Vente'}])
+        F._meta_colonnes_finance()
+        chemin_meta = F._chemin_colonne_finance('meta.json')
+        with open(chemin_meta, encoding='utf-8') as f:
+            meta = json.load(f)
+        del meta['version']
+        with open(chemin_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.remove(F._chemin_colonne_finance('transactions.jsonl'))
+        F.vider_cache_donnees()
+        self.assertEqual([t['montant'] for t in F.transactions_entre('2024-01-01', '2024-01-31')], [5.0])
+
+    def test_agregats_completes_par_un_journal(self):
+        F = self.F
+        aujourd_hui = F.date.today().isoformat()
+        self.appeler(F.enregistrer_transaction, 'recette', 100.0, 'Vente')
+        inode = os.stat(F.FINANCE_AGREGATS_FILE).st_ino
+        self.appeler(F.enregistrer_transaction, 'depense', 30.0, 'Achat engrais')
+        self.appeler(F.enregistrer_transaction, 'recette', 5.0, 'Vente')
+        # Chaque écriture ajoute une ligne au journal, sans réécrire les agrégats
+        self.assertEqual(os.stat(F.FINANCE_AGREGATS_FILE).st_ino, inode)
+        with open(F.FINANCE_AGREGATS_JOURNAL_FILE, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        F._agregats_finance = None
+        rapport = self.appeler(F.calculer_profits_pertes, aujourd_hui, aujourd_hui)
+        self.assertEqual((rapport['recettes'], rapport['depenses']), (105.0, 30.0))
+        # Replié dans agregats.json une fois la limite atteinte
+        F.LIMITE_JOURNAL_AGREGATS = 2
+        self.appeler(F.enregistrer_transaction, 'depense', 1.0, 'Carburant')
+        self.assertFalse(os.path.exists(F.FINANCE_AGREGATS_JOURNAL_FILE))
+        F._agregats_finance = None
+        rapport = self.appeler(F.calculer_profits_pertes, aujourd_hui, aujourd_hui)
+        self.assertEqual((rapport['recettes'], rapport['depenses']), (105.0, 31.0))
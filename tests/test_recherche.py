@@ -0,0 +1,40 @@
+from tests.base import DonneesTemporaires
+
+
+class Recherche(DonneesTemporaires):
+    def test_accents_prefixes_et_domaines(self):
+        F = self.F
+        self.appeler(F.ajouter_contact, 'Coopérative Agro', 'fournisseur', notes='Engrais bio')
+        self.appeler(F.ajouter_culture, 'P1', 'Maïs', '2024-03-01')
+        self.appeler(F.ajouter_tache, 'Épandage', 'Engrais sur P1', '2024-04-01')
+        self.appeler(F.enregistrer_transaction, 'depense', 20.0, 'Achat engrais')
+        resultats = self.appeler(F.rechercher_texte, 'ENGRAIS')
+        self.assertEqual(len(resultats['contacts']), 1)
+        self.assertEqual(len(resultats['taches']), 1)
+        self.assertEqual([t['montant'] for t in resultats['transactions']], [20.0])
+        self.assertEqual(self.appeler(F.rechercher_texte, 'mai*', ['cultures'])['cultures'][0]['nom_parcelle'], 'P1')
+        self.assertEqual(self.appeler(F.rechercher_texte, 'cooperative', ['contacts'])['contacts'][0]['nom_entreprise'], 'Coopérative Agro')
+        self.assertIs(self.appeler(F.rechercher_texte, 'engrais', ['inconnu']), False)
+
+    def test_index_suit_les_modifications(self):
+        F = self.F
+        self.appeler(F.ajouter_contact, 'Agro CI', 'client', notes='Lait')
+        self.assertEqual(len(self.appeler(F.rechercher_texte, 'lait', ['contacts'])['contacts']), 1)
+        self.appeler(F.supprimer_contact, 1)
+        self.assertEqual(self.appeler(F.rechercher_texte, 'lait', ['contacts'])['contacts'], [])
+
+    def test_transactions_lues_a_leur_position(self):
+        F = self.F
+        with F.unite_de_travail():
+            for i in range(200):
+                self.appeler(F.enregistrer_transaction, 'recette', float(i), 'Vente lait' if i % 50 == 0 else 'Vente maïs')
+        F.vider_cache_donnees()
+        charger = F.charger_donnees
+        F.charger_donnees = lambda fichier, *args, **kwargs: (self.assertNotEqual(fichier, F.FINANCE_FILE), charger(fichier, *args, **kwargs))[1]
+        try:
+            resultats = self.appeler(F.rechercher_texte, 'lait', ['transactions'], 2)
+        finally:
+            F.charger_donnees = charger
+        # De la plus récente à la plus ancienne, sans charger l'historique
+        self.assertEqual([t['montant'] for t in resultats['transactions']], [150.0, 100.0])
+        self.assertIsNone(F._donnees_en_memoire(F.FINANCE_FILE))
@@ -0,0 +1,106 @@
+import http.client
+import json
+import threading
+
+from tests.base import DonneesTemporaires
+
+
+class Serveur(DonneesTemporaires):
+    def setUp(self):
+        super().setUp()
+        self.serveur = self.F._creer_serveur('127.0.0.1', 0)
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+        super().tearDown()
+
+    def requete(self, methode, chemin, corps=None):
+        connexion = http.client.HTTPConnection('127.0.0.1', self.serveur.server_address[1], timeout=10)
+        try:
+            connexion.request(methode, chemin, body=None if corps is None else json.dumps(corps),
+                              headers={'Content-Type': 'application/json'})
+            reponse = connexion.getresponse()
+            return reponse.status, json.loads(reponse.read())
+        finally:
+            connexion.close()
+
+    def contacts(self):
+        self.F.vider_cache_donnees()
+        return self.F.charger_donnees(self.F.FOURNISSEURS_CLIENTS_FILE)
+
+    def test_ecriture_valide(self):
+        code, reponse = self.requete('POST', '/contacts', {'nom_entreprise': 'Agri SA', 'type_contact': 'fournisseur'})
+        self.assertEqual(code, 200)
+        self.assertTrue(reponse['ok'])
+        self.assertEqual([c['nom_entreprise'] for c in self.contacts()], ['Agri SA'])
+
+    def test_type_invalide_refuse_sans_ecriture(self):
+        for corps in ({'nom_entreprise': 'Agri SA', 'type_contact': 5},
+                      {'nom_entreprise': 'Agri SA', 'type_contact': 'client', 'notes': ['x']},
+                      {'nom_entreprise': 'Agri SA', 'type_contact': None},
+                      {'nom_entreprise': 'Agri SA'},
+                      {'nom_entreprise': 'Agri SA', 'type_contact': 'client', 'inconnu': 1}):
+            code, reponse = self.requete('POST', '/contacts', corps)
+            self.assertEqual(code, 400, corps)
+            self.assertFalse(reponse['ok'])
+        self.assertEqual(self.contacts(), [])
+
+    def test_nombres_et_identifiants(self):
+        code, _ = self.requete('POST', '/stock', {'nom_article': 'Maïs', 'quantite': True, 'seuil_alerte': 5})
+        self.assertEqual(code, 400)
+        code, _ = self.requete('POST', '/stock', {'nom_article': 'Maïs', 'quantite': 1.5, 'seuil_alerte': 5})
+        self.assertEqual(code, 400)
+        code, _ = self.requete('POST', '/finance/transaction', {'type_transaction': 'revenu', 'montant': '100', 'description': 'x'})
+        self.assertEqual(code, 400)
+        code, _ = self.requete('POST', '/contacts/supprimer', {'contact_id': '1'})
+        self.assertEqual(code, 400)
+        code, _ = self.requete('POST', '/taches', {'nom_tache': 'T', 'description': 'd', 'date_limite': '2030-01-01',
+                                                   'ouvrier_assigne_id': None})
+        self.assertEqual(code, 200)
+
+    def test_exception_renvoie_500(self):
+        def echouer(params):
+            raise AttributeError('panne')
+        self.F.ROUTES_LECTURE['/statistiques'] = ([self.F.COMPTEURS_FILE], False, echouer)
+        code, reponse = self.requete('GET', '/statistiques')
+        self.assertEqual(code, 500)
+        self.assertFalse(reponse['ok'])
+        self.assertIn('panne', reponse['messages'][0])
+        # Le serveur répond toujours ensuite
+        self.assertEqual(self.requete('POST', '/contacts', {'nom_entreprise': 'B', 'type_contact': 'client'})[0], 200)
+
+    def test_lecture_gardee_servie_pendant_un_calcul(self):
+        F = self.F
+        attendu = self.requete('GET', '/statistiques')
+        # Un calcul ou une écriture en cours tient _verrou_donnees : la réponse gardée est servie quand même
+        with F._verrou_donnees:
+            self.assertEqual(self.requete('GET', '/statistiques'), attendu)
+
+    def test_transactions_par_page(self):
+        F = self.F
+        with F.unite_de_travail():
+            for i in range(150):
+                self.appeler(F.enregistrer_transaction, 'depense' if i % 2 else 'recette', float(i + 1), f'Op {i}')
+        code, reponse = self.requete('GET', '/finance/transactions')
+        self.assertEqual(code, 200)
+        page = reponse['resultat']
+        self.assertEqual((len(page['enregistrements']), page['offset'], page['suivant']), (F.LIMITE_TRANSACTIONS_SERVEUR, 0, 100))
+        page = self.requete('GET', '/finance/transactions?type=depense&desc=1&offset=10&limite=5')[1]['resultat']
+        self.assertEqual([t['montant'] for t in page['enregistrements']], [130.0, 128.0, 126.0, 124.0, 122.0])
+        self.assertEqual(page['suivant'], 15)
+        self.assertFalse(self.requete('GET', '/finance/transactions?debut=hier')[1]['ok'])
+        self.assertFalse(self.requete('GET', '/finance/transactions?limite=0')[1]['ok'])
+
+    def test_ecoute_locale_par_defaut(self):
+        F = self.F
+        adresses = []
+        demarrer = F.demarrer_serveur
+        F.demarrer_serveur = lambda hote, port: adresses.append((hote, port))
+        try:
+            self.appeler(F.executer_ligne_de_commande, ['serveur'])
+        finally:
+            F.demarrer_serveur = demarrer
+        self.assertEqual(adresses, [('127.0.0.1', 8080)])
+        self.assertEqual(demarrer.__defaults__, ('127.0.0.1', 8080))
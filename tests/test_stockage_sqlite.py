@@ -0,0 +1,84 @@
+import json
+
+from tests.base import DonneesTemporaires
+
+
+class StockageSqlite(DonneesTemporaires):
+    def tearDown(self):
+        if self.F._connexion is not None:
+            self.F._connexion.close()
+        super().tearDown()
+
+    def passer_en_sqlite(self):
+        self.appeler(self.F.definir_backend_stockage, 'sqlite')
+
+    def relire(self, fichier):
+        # Comme un nouveau lancement : tout est relu depuis la base
+        self.F.vider_cache_donnees()
+        self.F._lignes_sqlite.clear()
+        return self.F.charger_donnees(fichier)
+
+    def instructions(self, fonction, *args):
+        executees = []
+        self.F._connexion_sqlite().set_trace_callback(executees.append)
+        try:
+            self.assertIsNot(self.appeler(fonction, *args), False, self.sortie.getvalue())
+        finally:
+            self.F._connexion_sqlite().set_trace_callback(None)
+        return [i for i in executees if i.split()[0] in ('INSERT', 'UPDATE', 'DELETE', 'SELECT')]
+
+    def test_ferme_json_importee_a_la_premiere_ouverture(self):
+        F = self.F
+        self.appeler(F.ajouter_animal, 'A1', 'Poule', '2024-01-01', 'F')
+        self.appeler(F.ajouter_ouvrier, 'Awa', '0102', 'Berger')
+        self.appeler(F.supprimer_ouvrier, 1)
+        self.appeler(F.enregistrer_transaction, 'recette', 100.0, 'Vente')
+        self.passer_en_sqlite()
+        self.assertEqual([a['nom_id'] for a in self.appeler(F.charger_donnees, F.ANIMAUX_FILE)], ['A1'])
+        self.assertIn("importé(s) de 'animaux.json'", self.sortie.getvalue())
+        self.assertEqual(F.get_solde_actuel(), 100.0)
+        # La séquence suit la base : l'id 1 supprimé n'est pas réattribué
+        self.appeler(F.ajouter_ouvrier, 'Koffi', '0203', 'Berger')
+        self.assertEqual([o['id'] for o in self.relire(F.OUVRIERS_FILE)], [2])
+
+    def test_migration_en_ligne_de_commande(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        code = self.appeler(F.executer_ligne_de_commande, ['stockage', 'migrer-sqlite', '--json'])
+        self.assertEqual(code, 0)
+        self.assertTrue(json.loads(self.sortie.getvalue())['ok'])
+        self.passer_en_sqlite()
+        self.assertEqual(F.get_stock_quantite('Maïs'), 10)
+
+    def test_une_modification_ecrit_une_seule_ligne(self):
+        F = self.F
+        self.passer_en_sqlite()
+        for i in range(30):
+            self.appeler(F.ajouter_animal, f'A{i}', 'Poule', '2024-01-01', 'F')
+        for i in range(5):
+            self.appeler(F.enregistrer_transaction, 'recette', 10.0, f'Vente {i}')
+        self.relire(F.ANIMAUX_FILE)
+
+        ecritures = [i for i in self.instructions(F.modifier_animal, 'A7', None, None, None, 'Malade') if not i.startswith('SELECT')]
+        self.assertEqual([i.split()[0] for i in ecritures if 'animaux' in i], ['UPDATE'])
+        ecritures = [i for i in self.instructions(F.supprimer_animal, 'A3') if 'animaux' in i]
+        self.assertEqual([i.split()[0] for i in ecritures], ['DELETE'])
+        finance = self.instructions(F.enregistrer_transaction, 'depense', 5.0, 'Engrais')
+        self.assertEqual(len([i for i in finance if i.startswith('INSERT INTO transactions')]), 1)
+        self.assertFalse([i for i in finance if 'count(' in i])
+
+        animaux = self.relire(F.ANIMAUX_FILE)
+        self.assertEqual(len(animaux), 29)
+        self.assertEqual(F._rechercher(F.ANIMAUX_FILE, animaux, 'nom_id', 'a7')['etat_sante'], 'Malade')
+        self.assertEqual(len(self.relire(F.FINANCE_FILE)['transactions']), 6)
+        self.assertEqual(F.get_solde_actuel(), 45.0)
+
+    def test_modifications_hors_index_ecrites(self):
+        F = self.F
+        self.passer_en_sqlite()
+        self.appeler(F.ajouter_culture, 'P1', 'Maïs', '2024-03-01')
+        self.appeler(F.ajouter_contact, 'Agro CI', 'client')
+        self.appeler(F.modifier_culture, 'P1', nouvelle_surface_ou_quantite=2.5, nouvelle_unite='ha')
+        self.appeler(F.modifier_contact, 1, nouveau_telephone='0102030405')
+        self.assertEqual((self.relire(F.CULTURES_FILE)[0]['surface_ou_quantite'], self.relire(F.CULTURES_FILE)[0]['unite']), (2.5, 'ha'))
+        self.assertEqual(self.relire(F.FOURNISSEURS_CLIENTS_FILE)[0]['telephone'], '0102030405')
@@ -0,0 +1,45 @@
+import json
+
+from tests.base import DonneesTemporaires
+
+
+class TableauDeBord(DonneesTemporaires):
+    def setUp(self):
+        super().setUp()
+        self.calculs = []
+        for partie, (fichiers, depend_du_jour, calculer) in list(self.F.PARTIES_TABLEAU_DE_BORD.items()):
+            self.F.PARTIES_TABLEAU_DE_BORD[partie] = (fichiers, depend_du_jour, self.compter(partie, calculer))
+
+    def compter(self, partie, calculer):
+        return lambda: self.calculs.append(partie) or calculer()
+
+    def recalculees(self):
+        del self.calculs[:]
+        instantane = self.appeler(self.F.instantane_tableau_de_bord)
+        return sorted(self.calculs), instantane
+
+    def test_parties_recalculees_selon_leurs_fichiers(self):
+        F = self.F
+        self.assertEqual(self.recalculees()[0], ['alertes', 'solde', 'statistiques'])
+        self.assertEqual(self.recalculees()[0], [])
+        self.appeler(F.enregistrer_transaction, 'recette', 25.0, 'Vente')
+        parties, instantane = self.recalculees()
+        self.assertEqual((parties, instantane['solde']), (['solde'], 25.0))
+        self.appeler(F.ajouter_animal, 'A1', 'Poule', '2024-01-01', 'F')
+        parties, instantane = self.recalculees()
+        self.assertEqual(parties, ['alertes', 'statistiques'])
+        self.assertEqual(instantane['statistiques']['Total Animaux'], 1)
+
+    def test_modification_par_un_autre_programme(self):
+        F = self.F
+        self.recalculees()
+        with open(F.STOCK_FILE, 'w', encoding='utf-8') as f:
+            json.dump([{'nom': 'Maïs', 'quantite': 1, 'seuil_alerte': 5}], f)
+        parties, instantane = self.recalculees()
+        self.assertEqual(parties, ['alertes'])
+        self.assertEqual(instantane['alertes'], ["ALERTE STOCK : Le stock de 'Maïs' est de 1 (seuil: 5)."])
+
+    def test_affichage(self):
+        self.appeler(self.F.afficher_tableau_de_bord)
+        self.assertIn('Solde Financier Actuel : 0.00 XOF', self.sortie.getvalue())
+        self.assertIn('Total Animaux : 0', self.sortie.getvalue())
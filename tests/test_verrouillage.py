@@ -0,0 +1,56 @@
+import json
+import os
+
+from tests.base import DonneesTemporaires
+
+
+class VerificationDesVersions(DonneesTemporaires):
+    def test_ecriture_d_un_autre_programme_annule_l_operation(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        F.charger_donnees(F.STOCK_FILE)
+        # Un autre programme réécrit le fichier sans passer par le cache de celui-ci
+        with open(F.STOCK_FILE, 'w', encoding='utf-8') as f:
+            json.dump([{'nom': 'Maïs', 'quantite': 42, 'seuil_alerte': 2}, {'nom': 'Riz', 'quantite': 1, 'seuil_alerte': 1}], f)
+        stocks = F._cache_donnees[F.STOCK_FILE][1]
+        stocks[0]['quantite'] = 0
+        with self.assertRaises(F.ConflitDeVersion):
+            F.sauvegarder_donnees(stocks, F.STOCK_FILE)
+        with open(F.STOCK_FILE, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]['quantite'], 42)
+        # Relu après le conflit : l'opération suivante part de la version de l'autre programme
+        self.assertEqual(F.get_stock_quantite('Maïs'), 42)
+
+    def test_conflit_rapporte_par_une_operation(self):
+        F = self.F
+        self.appeler(F.ajouter_modifier_article, 'Maïs', 10, 2)
+        sauvegarder = F.sauvegarder_donnees
+
+        def ecriture_concurrente(donnees, fichier):
+            # Un autre programme écrit entre la lecture et la sauvegarde de l'opération
+            with open(F.STOCK_FILE, 'w', encoding='utf-8') as f:
+                json.dump([{'nom': 'Maïs', 'quantite': 42, 'seuil_alerte': 2}, {'nom': 'Riz', 'quantite': 1, 'seuil_alerte': 1}], f)
+            sauvegarder(donnees, fichier)
+
+        F.sauvegarder_donnees = ecriture_concurrente
+        try:
+            resultat = self.appeler(F.ajouter_modifier_article, 'Maïs', 5, 2)
+        finally:
+            F.sauvegarder_donnees = sauvegarder
+        self.assertIs(resultat, False)
+        self.assertIn('Opération annulée', self.sortie.getvalue())
+        self.assertEqual(F.get_stock_quantite('Maïs'), 42)
+
+    def test_compaction_du_journal_par_enregistrer_transaction(self):
+        F = self.F
+        F.TAILLE_MAX_JOURNAL_FINANCE = 300
+        for i in range(10):
+            resultat = self.appeler(F.enregistrer_transaction, 'recette', 1.0, f'Vente {i}')
+            self.assertIsNot(resultat, False, self.sortie.getvalue())
+            self.assertNotIn('Opération annulée', self.sortie.getvalue())
+            taille = os.path.getsize(F.FINANCE_JOURNAL_FILE) if os.path.exists(F.FINANCE_JOURNAL_FILE) else 0
+            self.assertLessEqual(taille, 300)
+        F.vider_cache_donnees()
+        finance = F.charger_donnees(F.FINANCE_FILE)
+        self.assertEqual(len(finance['transactions']), 10)
+        self.assertEqual(finance['solde'], 10.0)